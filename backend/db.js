@@ -24,15 +24,17 @@ const getLatestSessionPath = () => {
 const dbPath = getLatestSessionPath();
 console.log('Database location:', dbPath);
 
-// Create database connection
-const db = new sqlite3.Database(dbPath, sqlite3.OPEN_READWRITE, (err) => {
+// Create a read-only connection: the scanner owns all writes, and with the
+// database in WAL mode dashboard reads never block them
+const db = new sqlite3.Database(dbPath, sqlite3.OPEN_READONLY, (err) => {
   if (err) {
     console.error('Error connecting to database:', err.message);
     process.exit(1);
   } else {
-    console.log('Connected to the SQLite database');
+    console.log('Connected to the SQLite database (read-only)');
   }
 });
+db.configure('busyTimeout', 5000);
 
 // Verify database schema
 db.get("PRAGMA table_info(scan_records)", (err, row) => {
@@ -699,7 +699,7 @@ app.get('/api/tokens/:address/history', async (req, res) => {
   try {
     // Find token in scan_records
     const token = await db.get(
-      'SELECT token_name, token_address FROM scan_records WHERE LOWER(token_address) = LOWER(?)',
+      'SELECT token_name, token_address, scan_timestamp FROM scan_records WHERE LOWER(token_address) = LOWER(?)',
       [address]
     );
     console.log('Token found in scan_records:', token);
@@ -708,51 +708,19 @@ app.get('/api/tokens/:address/history', async (req, res) => {
       return res.status(404).json({ error: 'Token not found' });
     }
 
-    // Find matching history table
-    const tables = await db.all(
-      "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?",
-      [`%${address.toLowerCase()}%`]
-    );
-    console.log('Found tables with matching address:', tables);
-
-    if (tables.length === 0) {
-      return res.status(404).json({ error: 'No history table found for token' });
-    }
-
-    const historyTable = tables[0].name;
-    console.log('Using history table:', historyTable);
-
-    // First get table info to see what columns exist
-    const tableInfo = await db.all(`PRAGMA table_info("${historyTable}")`);
-    console.log('Table structure:', tableInfo);
-
-    // Build query based on available columns
-    const hasHPLiquidity = tableInfo.some(col => col.name === 'hp_liquidity_amount');
-    const hasGPLiquidity = tableInfo.some(col => col.name === 'gp_dex_info');
-    const hasTimestamp = tableInfo.some(col => col.name === 'scan_timestamp');
-    const hasHolderCount = tableInfo.some(col => col.name === 'gp_holder_count');
-    const hasLpHolderCount = tableInfo.some(col => col.name === 'gp_lp_holder_count');
-
-    if (!hasTimestamp) {
-      throw new Error('Table is missing required timestamp column');
-    }
-
-    let selectClauses = ['scan_timestamp'];
-    if (hasHPLiquidity) selectClauses.push('hp_liquidity_amount');
-    if (hasGPLiquidity) selectClauses.push('gp_dex_info');
-    if (hasHolderCount) selectClauses.push('gp_holder_count');
-    if (hasLpHolderCount) selectClauses.push('gp_lp_holder_count');
-
-    // Query history data
-    const query = `
-      SELECT ${selectClauses.join(', ')}
-      FROM "${historyTable}"
-      ORDER BY scan_timestamp ASC
-    `;
-    console.log('Executing query:', query);
-
-    const history = await db.all(query);
-    console.log('Raw history data:', history);
+    // Optional time range in ms, e.g. ?from=1700000000000&to=1700100000000
+    const from = req.query.from ? Math.floor(Number(req.query.from) / 1000) : 0;
+    const to = req.query.to ? Math.floor(Number(req.query.to) / 1000) : Number.MAX_SAFE_INTEGER;
+
+    // scan_history holds a token's first scan and every scan that changed something;
+    // this range read is served from its covering index
+    const history = await db.all(`
+      SELECT scan_ts, hp_liquidity_amount, gp_liquidity, gp_holder_count, gp_lp_holder_count
+      FROM scan_history
+      WHERE token_address = ? AND scan_ts BETWEEN ? AND ?
+      ORDER BY scan_ts ASC
+    `, [token.token_address, from, to]);
+    console.log('History records:', history.length);
     
     if (!history || history.length === 0) {
       return res.status(404).json({ error: 'No liquidity history available' });
@@ -760,26 +728,11 @@ app.get('/api/tokens/:address/history', async (req, res) => {
 
     // Transform data for chart
     const chartData = history.map(record => {
-      const timestamp = new Date(record.scan_timestamp).getTime(); // Convert to Unix timestamp in ms
-      let hpLiquidity = 0;
-      let gpLiquidity = 0;
-      let holderCount = record.gp_holder_count || 0;
-      let lpHolderCount = record.gp_lp_holder_count || 0;
-
-      if (record.hp_liquidity_amount) {
-        hpLiquidity = parseFloat(record.hp_liquidity_amount);
-      }
-
-      if (record.gp_dex_info) {
-        try {
-          const dexInfo = JSON.parse(record.gp_dex_info);
-          if (Array.isArray(dexInfo) && dexInfo[0] && dexInfo[0].liquidity) {
-            gpLiquidity = parseFloat(dexInfo[0].liquidity);
-          }
-        } catch (e) {
-          console.error('Error parsing gp_dex_info:', e);
-        }
-      }
+      const timestamp = record.scan_ts * 1000; // Unix timestamp in ms
+      const hpLiquidity = record.hp_liquidity_amount ? parseFloat(record.hp_liquidity_amount) : 0;
+      const gpLiquidity = record.gp_liquidity || 0;
+      const holderCount = record.gp_holder_count || 0;
+      const lpHolderCount = record.gp_lp_holder_count || 0;
 
       return {
         timestamp,
@@ -791,11 +744,48 @@ app.get('/api/tokens/:address/history', async (req, res) => {
       };
     }).filter(point => !isNaN(point.hpLiquidity) || !isNaN(point.gpLiquidity));
 
+    // Scans that changed nothing are not stored; carry the last values up to the latest scan
+    const lastScan = new Date(token.scan_timestamp).getTime();
+    const lastPoint = chartData[chartData.length - 1];
+    if (lastPoint && lastScan > lastPoint.timestamp && lastScan <= to * 1000) {
+      chartData.push({ ...lastPoint, timestamp: lastScan });
+    }
+
     console.log('Transformed chart data:', chartData);
 
+    // On-chain liquidity from Sync logs at the finest resolution (0 = per block,
+    // 60 or 600 seconds) whose retained points still cover the start of the range
+    const tokenKey = token.token_address.toLowerCase();
+    const levels = await db.all(`
+      SELECT resolution, MIN(ts) AS first_ts FROM liquidity_series
+      WHERE token_address = ? GROUP BY resolution ORDER BY resolution
+    `, [tokenKey]);
+    let liquiditySeries = [];
+    let seriesResolution = null;
+    if (levels.length > 0) {
+      const start = from || Math.min(...history.map(record => record.scan_ts));
+      const covering = levels.find(level => level.first_ts <= start);
+      seriesResolution = covering
+        ? covering.resolution
+        : levels.reduce((a, b) => (b.first_ts < a.first_ts ? b : a)).resolution;
+      const points = await db.all(`
+        SELECT ts, block_number, liquidity_usd, reserve_token, reserve_weth
+        FROM liquidity_series
+        WHERE token_address = ? AND resolution = ? AND ts BETWEEN ? AND ?
+        ORDER BY ts ASC
+      `, [tokenKey, seriesResolution, start, to]);
+      liquiditySeries = points.map(point => ({
+        timestamp: point.ts * 1000,
+        blockNumber: point.block_number,
+        liquidityUsd: point.liquidity_usd,
+        reserveToken: point.reserve_token,
+        reserveWeth: point.reserve_weth
+      }));
+    }
+
     // Add debug info to the response
     const debugInfo = {
-      tableName: historyTable,
+      tableName: 'scan_history',
       recordCount: history.length,
       highestLiquidity: Math.max(...chartData.map(d => d.totalLiquidity)),
       lowestLiquidity: Math.min(...chartData.map(d => d.totalLiquidity)),
@@ -816,6 +806,8 @@ app.get('/api/tokens/:address/history', async (req, res) => {
 
     res.json({ 
       history: chartData,
+      liquiditySeries,
+      seriesResolution,
       debug: debugInfo
     });
 
@@ -980,49 +972,21 @@ async function testDataRetrieval() {
     }
     console.log('Sample token address:', sampleToken.token_address);
 
-    // Find the history table for this token
-    const tables = await db.all(
-      "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?",
-      [`%${sampleToken.token_address.toLowerCase()}%`]
-    );
-    console.log('Found tables:', tables);
-
-    if (tables.length === 0) {
-      console.log('No history table found for token');
-      return;
-    }
-
-    const historyTable = tables[0].name;
-    console.log('Using history table:', historyTable);
-
-    // Get table structure
-    const tableInfo = await db.all(`PRAGMA table_info("${historyTable}")`);
-    console.log('Table columns:', tableInfo.map(col => col.name));
-
-    // Query the last 5 records
+    // Query the last 5 scans
     const records = await db.all(`
-      SELECT scan_timestamp, hp_liquidity_amount, gp_dex_info
-      FROM "${historyTable}"
-      ORDER BY scan_timestamp DESC
+      SELECT scan_ts, hp_liquidity_amount, gp_liquidity
+      FROM scan_history
+      WHERE token_address = ?
+      ORDER BY scan_ts DESC
       LIMIT 5
-    `);
+    `, [sampleToken.token_address]);
 
     console.log('\nSample records:');
     records.forEach(record => {
-      let gpLiquidity = 0;
-      if (record.gp_dex_info) {
-        try {
-          const dexInfo = JSON.parse(record.gp_dex_info);
-          if (Array.isArray(dexInfo) && dexInfo[0] && dexInfo[0].liquidity) {
-            gpLiquidity = parseFloat(dexInfo[0].liquidity);
-          }
-        } catch (e) {
-          console.error('Error parsing gp_dex_info:', e);
-        }
-      }
+      const gpLiquidity = record.gp_liquidity || 0;
 
       console.log({
-        timestamp: record.scan_timestamp,
+        timestamp: new Date(record.scan_ts * 1000).toLocaleString(),
         hp_liquidity: record.hp_liquidity_amount,
         gp_liquidity: gpLiquidity,
         total_liquidity: (parseFloat(record.hp_liquidity_amount) || 0) + gpLiquidity
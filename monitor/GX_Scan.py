@@ -1,8 +1,6 @@
-# API Delay Settings
-# These delays help prevent rate limiting and ensure stable API operation
-GOPLUS_BASE_DELAY = 5  # Initial delay before first GoPlus API call (reduced from 30)
-GOPLUS_RETRY_DELAY = 25  # Delay between GoPlus API retries on failure (reduced from 120)
-HONEYPOT_BASE_DELAY = 5  # Delay before Honeypot API call (reduced from 10)
+# API Rate Limits
+# Upstream rate limits (GoPlus, honeypot.is, Infura) are token buckets configured
+# in the "rate_limits" section of config.json, see rate_limiter.py
 
 # Debug Output Settings
 # Control what information is displayed during program execution
@@ -28,10 +26,12 @@ TOKEN_KICK_CONDITIONS = {
 
 import asyncio
 import time
+from collections import Counter
+from functools import partial
 import aiohttp
 from web3 import Web3, HTTPProvider
 from web3.exceptions import TransactionNotFound, ContractLogicError
-from typing import Dict, Optional, Tuple, List, Any
+from typing import Dict, Optional, Tuple, List, Any, Set
 from datetime import datetime, timedelta 
 import sqlite3
 import json
@@ -50,9 +50,25 @@ from rich.table import Table
 from terminal_display import console, create_pair_table, create_security_table, log_message
 from api_wrapper import api_wrapper
 from api_tracker import api_tracker
+from rate_limiter import rate_limiter
+from scan_scheduler import ScanScheduler, PRIORITY_NEW
+from rescan_cadence import RescanCadence, CADENCE_DEFAULTS
+from pair_ingester import PairCreatedIngester, SECONDS_PER_BLOCK
+from pair_backfill import PairBackfill
+from liquidity_tracker import LiquidityTracker, create_liquidity_series
+from activity_watcher import ActivityWatcher
+from pipeline import Pipeline, PIPELINE_DEFAULTS
+from histogram import Histogram, LOCAL_LATENCY_BUCKETS
+from metrics_server import MetricsServer
+from clock import clock
+from session_db import SessionDB
+from scan_history import ScanHistory, REFRESHED_COLUMNS
 
 init(autoreset=True)  # Initialize colorama
 
+# Addresses per query when checking new pairs against the session database (SQLite variable limit)
+KNOWN_TOKENS_BATCH = 300
+
 def initialize_database_structure(folder_name: str) -> None:
     """Initialize all required database structures with single record per token"""
     try:
@@ -157,27 +173,7 @@ def initialize_database_structure(folder_name: str) -> None:
                     total_scans INTEGER DEFAULT 1,
                     honeypot_failures INTEGER DEFAULT 0,
                     last_error TEXT,
-                    status TEXT DEFAULT 'new',
-                    liq10 REAL,
-                    liq20 REAL,
-                    liq30 REAL,
-                    liq40 REAL,
-                    liq50 REAL,
-                    liq60 REAL,
-                    liq70 REAL,
-                    liq80 REAL,
-                    liq90 REAL,
-                    liq100 REAL,
-                    liq110 REAL,
-                    liq120 REAL,
-                    liq130 REAL,
-                    liq140 REAL,
-                    liq150 REAL,
-                    liq160 REAL,
-                    liq170 REAL,
-                    liq180 REAL,
-                    liq190 REAL,
-                    liq200 REAL
+                    status TEXT DEFAULT 'new'
                 )''')
                 
                 # Create indexes
@@ -493,25 +489,24 @@ def prepare_goplus_values(self, goplus_data: dict, token_address: str) -> tuple:
 
 
 class TokenChecker:
-    def __init__(self, tracker: TokenTracker, folder_name: str):
+    def __init__(self, tracker: TokenTracker, folder_name: str, db_settings: Optional[Dict] = None):
         self.tracker = tracker
         self.folder_name = folder_name
         self.web3 = Web3(HTTPProvider(self.tracker.config.node_rpc))
         self.logger = tracker.logger
         self.config = tracker.config
-        self.goplus_cache = {}  # Cache for GoPlus API responses
-        self.cache_duration = 300  # Cache duration in seconds (5 minutes)
+        self.db_write_latency = Histogram(LOCAL_LATENCY_BUCKETS)  # Seconds per scan write
+        self.scan_writes = Counter()  # "new", "changed" or "unchanged" -> scans persisted
+        # Ensure directory exists
+        os.makedirs(self.folder_name, exist_ok=True)
+        self.db = SessionDB(os.path.join(self.folder_name, 'scan_records.db'), db_settings)
+        self.history = ScanHistory(self.db)
         self.ensure_database_ready()
 
     def ensure_database_ready(self):
         """Ensure database and tables exist before operations"""
-        db_path = os.path.join(self.folder_name, 'scan_records.db')
-        
-        # Ensure directory exists
-        os.makedirs(self.folder_name, exist_ok=True)
-        
         try:
-            with sqlite3.connect(db_path) as db:
+            with self.db.transaction() as db:
                 cursor = db.cursor()
                 
                 # Create HONEYPOTS table
@@ -547,16 +542,17 @@ class TokenChecker:
                 
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_honeypot_timestamp ON HONEYPOTS(removal_timestamp)')
                 
-                # Create scan_records table if it doesn't exist
+                # Create xHoneypot_removed table for tokens dropped after repeated failures
                 cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scan_records (
+                CREATE TABLE IF NOT EXISTS xHoneypot_removed (
                     token_address TEXT PRIMARY KEY,
-                    scan_timestamp TEXT NOT NULL,
-                    pair_address TEXT,
+                    removal_timestamp TEXT NOT NULL,
+                    original_scan_timestamp TEXT,
                     token_name TEXT,
                     token_symbol TEXT,
                     token_decimals INTEGER,
                     token_total_supply TEXT,
+                    token_pair_address TEXT,
                     token_age_hours REAL,
                     hp_simulation_success INTEGER,
                     hp_buy_tax REAL,
@@ -571,115 +567,18 @@ class TokenChecker:
                     hp_holder_count INTEGER,
                     hp_is_honeypot INTEGER,
                     hp_honeypot_reason TEXT,
-                    hp_is_open_source INTEGER,
-                    hp_is_proxy INTEGER,
-                    hp_is_mintable INTEGER,
-                    hp_can_be_minted INTEGER,
-                    hp_owner_address TEXT,
-                    hp_creator_address TEXT,
-                    hp_deployer_address TEXT,
-                    hp_has_proxy_calls INTEGER,
-                    hp_pair_liquidity REAL,
-                    hp_pair_liquidity_token0 REAL,
-                    hp_pair_liquidity_token1 REAL,
-                    hp_pair_token0_symbol TEXT,
-                    hp_pair_token1_symbol TEXT,
-                    hp_flags TEXT,
-                    gp_is_open_source INTEGER,
-                    gp_is_proxy INTEGER,
-                    gp_is_mintable INTEGER,
-                    gp_owner_address TEXT,
-                    gp_creator_address TEXT,
-                    gp_can_take_back_ownership INTEGER,
-                    gp_owner_change_balance INTEGER,
-                    gp_hidden_owner INTEGER,
-                    gp_selfdestruct INTEGER,
-                    gp_external_call INTEGER,
-                    gp_buy_tax REAL,
-                    gp_sell_tax REAL,
-                    gp_is_anti_whale INTEGER,
-                    gp_anti_whale_modifiable INTEGER,
-                    gp_cannot_buy INTEGER,
-                    gp_cannot_sell_all INTEGER,
-                    gp_slippage_modifiable INTEGER,
-                    gp_personal_slippage_modifiable INTEGER,
-                    gp_trading_cooldown INTEGER,
-                    gp_is_blacklisted INTEGER,
-                    gp_is_whitelisted INTEGER,
-                    gp_is_in_dex INTEGER,
-                    gp_transfer_pausable INTEGER,
-                    gp_can_be_minted INTEGER,
-                    gp_total_supply TEXT,
-                    gp_holder_count INTEGER,
-                    gp_owner_percent REAL,
-                    gp_owner_balance TEXT,
-                    gp_creator_percent REAL,
-                    gp_creator_balance TEXT,
-                    gp_lp_holder_count INTEGER,
-                    gp_lp_total_supply TEXT,
-                    gp_is_true_token INTEGER,
-                    gp_is_airdrop_scam INTEGER,
-                    gp_trust_list TEXT,
-                    gp_other_potential_risks TEXT,
-                    gp_note TEXT,
-                    gp_honeypot_with_same_creator INTEGER,
-                    gp_fake_token INTEGER,
-                    gp_holders TEXT,
-                    gp_lp_holders TEXT,
-                    gp_dex_info TEXT,
-                    total_scans INTEGER DEFAULT 1,
-                    honeypot_failures INTEGER DEFAULT 0,
+                    total_scans INTEGER,
+                    honeypot_failures INTEGER,
                     last_error TEXT,
-                    status TEXT DEFAULT 'new',
-                    liq10 REAL,
-                    liq20 REAL,
-                    liq30 REAL,
-                    liq40 REAL,
-                    liq50 REAL,
-                    liq60 REAL,
-                    liq70 REAL,
-                    liq80 REAL,
-                    liq90 REAL,
-                    liq100 REAL,
-                    liq110 REAL,
-                    liq120 REAL,
-                    liq130 REAL,
-                    liq140 REAL,
-                    liq150 REAL,
-                    liq160 REAL,
-                    liq170 REAL,
-                    liq180 REAL,
-                    liq190 REAL,
-                    liq200 REAL
+                    removal_reason TEXT
                 )''')
                 
-                # Create token_tables table to track token-specific tables
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS token_tables (
-                    table_name TEXT PRIMARY KEY,
-                    token_address TEXT NOT NULL,
-                    token_name TEXT,
-                    created_at TEXT NOT NULL
-                )''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_removal_timestamp ON xHoneypot_removed(removal_timestamp DESC)')
                 
-                db.commit()
-                print(f"Verified database tables exist in {self.folder_name}")
-        except sqlite3.Error as e:
-            print(f"Database error during table verification: {str(e)}")
-            raise
-
-    def create_token_specific_table(self, db, token_address: str, token_name: str, token_table_name: str):
-        """Create a token-specific table if it doesn't exist"""
-        try:
-            cursor = db.cursor()
-            
-            # First check if table already exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (token_table_name,))
-            if cursor.fetchone() is None:
-                # Create the token-specific table with the same schema as scan_records
-                cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS {token_table_name} (
-                    token_address TEXT,
+                # Create scan_records table if it doesn't exist
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scan_records (
+                    token_address TEXT PRIMARY KEY,
                     scan_timestamp TEXT NOT NULL,
                     pair_address TEXT,
                     token_name TEXT,
@@ -759,49 +658,37 @@ class TokenChecker:
                     total_scans INTEGER DEFAULT 1,
                     honeypot_failures INTEGER DEFAULT 0,
                     last_error TEXT,
-                    status TEXT DEFAULT 'new',
-                    liq10 REAL,
-                    liq20 REAL,
-                    liq30 REAL,
-                    liq40 REAL,
-                    liq50 REAL,
-                    liq60 REAL,
-                    liq70 REAL,
-                    liq80 REAL,
-                    liq90 REAL,
-                    liq100 REAL,
-                    liq110 REAL,
-                    liq120 REAL,
-                    liq130 REAL,
-                    liq140 REAL,
-                    liq150 REAL,
-                    liq160 REAL,
-                    liq170 REAL,
-                    liq180 REAL,
-                    liq190 REAL,
-                    liq200 REAL
-                )""")
+                    status TEXT DEFAULT 'new'
+                )''')
                 
-                # Record the table creation
+                # scan_history holds every scan; older sessions' per-token tables are moved into it
+                self.history.create(db)
+                self.history.migrate(db)
+                
+                # Create ingest_cursor table to resume pair discovery after a restart
                 cursor.execute('''
-                    INSERT INTO token_tables (table_name, token_address, token_name, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (token_table_name, token_address, token_name, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                CREATE TABLE IF NOT EXISTS ingest_cursor (
+                    name TEXT PRIMARY KEY,
+                    last_block INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                )''')
+                
+                # Create liquidity_series table for on-chain reserves from Sync logs
+                create_liquidity_series(db)
                 
                 db.commit()
-                return True
-            return False
+                print(f"Verified database tables exist in {self.folder_name}")
         except sqlite3.Error as e:
-            print(f"Error creating token-specific table: {str(e)}")
-            return False
+            print(f"Database error during table verification: {str(e)}")
+            raise
 
-    async def check_honeypot(self, address: str) -> Dict:
+    async def check_honeypot(self, address: str, force_refresh: bool = False) -> Dict:
         """Check token using Honeypot API with improved tracking"""
-        return await api_wrapper.call_honeypot_api(address, delay=HONEYPOT_BASE_DELAY)
+        return await api_wrapper.call_honeypot_api(address, force_refresh)
 
-    async def check_goplus(self, address: str) -> Dict:
+    async def check_goplus(self, address: str, force_refresh: bool = False) -> Dict:
         """Check token using GoPlus API with improved tracking"""
-        return await api_wrapper.call_goplus_api(address, delay=GOPLUS_BASE_DELAY)
+        return await api_wrapper.call_goplus_api(address, force_refresh)
 
     async def process_new_pair(self, token_address: str, pair_address: str):
         """Process and update token data silently"""
@@ -815,9 +702,9 @@ class TokenChecker:
             return True
         return False
 
-    async def move_token_to_removed(self, db_path: str, token_address: str, reason: str):
+    async def move_token_to_removed(self, token_address: str, reason: str):
         """Move token to REMOVED table"""
-        with sqlite3.connect(db_path) as db:
+        def write(db):
             cursor = db.cursor()
             
             # Get token data from scan_records
@@ -859,7 +746,7 @@ class TokenChecker:
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     token_data[0],  # token_address
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),  # removal_timestamp
+                    clock.now().strftime('%Y-%m-%d %H:%M:%S'),  # removal_timestamp
                     token_data[1],  # original_scan_timestamp
                     token_data[3],  # token_name
                     token_data[4],  # token_symbol
@@ -888,1026 +775,758 @@ class TokenChecker:
                 
                 # Delete from scan_records
                 cursor.execute('DELETE FROM scan_records WHERE token_address = ?', (token_address,))
-                db.commit()
 
-    async def process_token(self, token_address: str, pair_address: str):
-        """Process a token by checking its honeypot status and other data"""
-        # Define db_path at start to ensure availability in error handlers
-        db_path = os.path.join(self.folder_name, 'scan_records.db')
+        await self.db.write(write)
+
+    async def enrich_token(self, token_address: str, pair_address: str, force_refresh: bool = False) -> Dict:
+        """Fetch honeypot.is and GoPlus data for a token concurrently (enrich stage)"""
         error_message = None
         
+        # Create tasks for both API calls
+        honeypot_task = asyncio.create_task(self.check_honeypot(token_address, force_refresh))
+        goplus_task = asyncio.create_task(self.check_goplus(token_address, force_refresh))
+        
+        # Wait for both tasks with timeout
         try:
-            print("\n" + "="*80)
-            log_message(f"Processing Token: {token_address}", "INFO")
-            log_message(f"Pair Address: {pair_address}", "INFO")
-            print("="*80 + "\n")
-
-            # Create tasks for both API calls
-            honeypot_task = asyncio.create_task(self.check_honeypot(token_address))
-            goplus_task = asyncio.create_task(self.check_goplus(token_address))
+            honeypot_data, goplus_data = await asyncio.gather(
+                honeypot_task,
+                goplus_task,
+                return_exceptions=True
+            )
             
-            # Wait for both tasks with timeout
-            try:
-                honeypot_data, goplus_data = await asyncio.gather(
-                    honeypot_task,
-                    goplus_task,
-                    return_exceptions=True
-                )
-                
-                # Check for exceptions
-                if isinstance(honeypot_data, Exception):
-                    error_message = f"Honeypot API error: {str(honeypot_data)}"
-                    log_message(error_message, "ERROR")
-                    honeypot_data = {}
-                
-                if isinstance(goplus_data, Exception):
-                    error_message = f"GoPlus API error: {str(goplus_data)}"
-                    log_message(error_message, "ERROR")
-                    goplus_data = {}
-
-            except asyncio.TimeoutError:
-                error_message = "API calls timed out"
+            # Check for exceptions
+            if isinstance(honeypot_data, Exception):
+                error_message = f"Honeypot API error: {str(honeypot_data)}"
                 log_message(error_message, "ERROR")
                 honeypot_data = {}
+            
+            if isinstance(goplus_data, Exception):
+                error_message = f"GoPlus API error: {str(goplus_data)}"
+                log_message(error_message, "ERROR")
                 goplus_data = {}
 
-            # Display honeypot data in a nice table
-            if honeypot_data:
-                # Token Info
-                token_info = honeypot_data.get('token', {})
-                pair_info = honeypot_data.get('pair', {})
-                simulation = honeypot_data.get('simulationResult', {})
-                contract = honeypot_data.get('contractCode', {})
-                honeypot_result = honeypot_data.get('honeypotResult', {})
-                holder_analysis = honeypot_data.get('holderAnalysis', {})
-
-                pair_data = {
-                    "Token Info": {
-                        "Token Address": token_address,
-                        "Pair Address": pair_address,
-                        "Token Name": token_info.get('name', 'Unknown'),
-                        "Token Symbol": token_info.get('symbol', 'Unknown'),
-                        "Decimals": token_info.get('decimals', 'Unknown'),
-                        "Total Supply": token_info.get('totalSupply', '0'),
-                        "Total Holders": token_info.get('totalHolders', '0')
-                    },
-                    "Pair Info": {
-                        "Liquidity": f"${float(pair_info.get('liquidity', 0)):,.2f}",
-                        "Creation Time": pair_info.get('createdAtTimestamp', 'Unknown'),
-                        "Reserves Token0": pair_info.get('reserves0', '0'),
-                        "Reserves Token1": pair_info.get('reserves1', '0'),
-                        "Creation Tx": pair_info.get('creationTxHash', 'Unknown')
-                    },
-                    "Simulation": {
-                        "Success": "Yes" if honeypot_data.get('simulationSuccess', False) else "No",
-                        "Buy Tax": f"{float(simulation.get('buyTax', 0)):.2f}%",
-                        "Sell Tax": f"{float(simulation.get('sellTax', 0)):.2f}%",
-                        "Transfer Tax": f"{float(simulation.get('transferTax', 0)):.2f}%",
-                        "Buy Gas": simulation.get('buyGas', 'Unknown'),
-                        "Sell Gas": simulation.get('sellGas', 'Unknown')
-                    },
-                    "Contract": {
-                        "Open Source": "Yes" if contract.get('openSource', False) else "No",
-                        "Is Proxy": "Yes" if contract.get('isProxy', False) else "No",
-                        "Has Proxy Calls": "Yes" if contract.get('hasProxyCalls', False) else "No"
-                    },
-                    "Honeypot Analysis": {
-                        "Is Honeypot": "Yes" if honeypot_result.get('isHoneypot', True) else "No",
-                        "Honeypot Reason": honeypot_result.get('honeypotReason', 'None'),
-                        "Risk Level": honeypot_data.get('summary', {}).get('riskLevel', 'Unknown'),
-                        "Risk Type": honeypot_data.get('summary', {}).get('risk', 'Unknown')
-                    },
-                    "Holder Analysis": {
-                        "Total Holders": holder_analysis.get('holders', '0'),
-                        "Successful Txs": holder_analysis.get('successful', '0'),
-                        "Failed Txs": holder_analysis.get('failed', '0'),
-                        "Average Tax": f"{float(holder_analysis.get('averageTax', 0)):.2f}%",
-                        "Average Gas": holder_analysis.get('averageGas', '0'),
-                        "Highest Tax": f"{float(holder_analysis.get('highestTax', 0)):.2f}%",
-                        "High Tax Wallets": holder_analysis.get('highTaxWallets', '0'),
-                        "Snipers Failed": holder_analysis.get('snipersFailed', '0'),
-                        "Snipers Success": holder_analysis.get('snipersSuccess', '0')
-                    }
-                }
-                console.print(create_pair_table(pair_data))
+        except asyncio.TimeoutError:
+            error_message = "API calls timed out"
+            log_message(error_message, "ERROR")
+            honeypot_data = {}
+            goplus_data = {}
+
+        return {
+            'token_address': token_address,
+            'pair_address': pair_address,
+            'honeypot_data': honeypot_data,
+            'goplus_data': goplus_data,
+            'error_message': error_message
+        }
+
+    def classify_token(self, scan: Dict) -> Dict:
+        """Derive token age, honeypot verdict and display data from the API responses (classify stage)"""
+        token_address = scan['token_address']
+        pair_address = scan['pair_address']
+        honeypot_data = scan['honeypot_data']
+        goplus_data = scan['goplus_data']
+
+        # Nothing can be recorded without the honeypot.is simulation
+        if not honeypot_data:
+            raise ValueError(scan['error_message'] or "Empty honeypot.is response")
+
+        # Honeypot data for the token analysis table
+        token_info = honeypot_data.get('token', {})
+        pair_info = honeypot_data.get('pair', {})
+        simulation = honeypot_data.get('simulationResult', {})
+        contract = honeypot_data.get('contractCode', {})
+        honeypot_result = honeypot_data.get('honeypotResult', {})
+        holder_analysis = honeypot_data.get('holderAnalysis', {})
+
+        pair_data = {
+            "Token Info": {
+                "Token Address": token_address,
+                "Pair Address": pair_address,
+                "Token Name": token_info.get('name', 'Unknown'),
+                "Token Symbol": token_info.get('symbol', 'Unknown'),
+                "Decimals": token_info.get('decimals', 'Unknown'),
+                "Total Supply": token_info.get('totalSupply', '0'),
+                "Total Holders": token_info.get('totalHolders', '0')
+            },
+            "Pair Info": {
+                "Liquidity": f"${float(pair_info.get('liquidity', 0)):,.2f}",
+                "Creation Time": pair_info.get('createdAtTimestamp', 'Unknown'),
+                "Reserves Token0": pair_info.get('reserves0', '0'),
+                "Reserves Token1": pair_info.get('reserves1', '0'),
+                "Creation Tx": pair_info.get('creationTxHash', 'Unknown')
+            },
+            "Simulation": {
+                "Success": "Yes" if honeypot_data.get('simulationSuccess', False) else "No",
+                "Buy Tax": f"{float(simulation.get('buyTax', 0)):.2f}%",
+                "Sell Tax": f"{float(simulation.get('sellTax', 0)):.2f}%",
+                "Transfer Tax": f"{float(simulation.get('transferTax', 0)):.2f}%",
+                "Buy Gas": simulation.get('buyGas', 'Unknown'),
+                "Sell Gas": simulation.get('sellGas', 'Unknown')
+            },
+            "Contract": {
+                "Open Source": "Yes" if contract.get('openSource', False) else "No",
+                "Is Proxy": "Yes" if contract.get('isProxy', False) else "No",
+                "Has Proxy Calls": "Yes" if contract.get('hasProxyCalls', False) else "No"
+            },
+            "Honeypot Analysis": {
+                "Is Honeypot": "Yes" if honeypot_result.get('isHoneypot', True) else "No",
+                "Honeypot Reason": honeypot_result.get('honeypotReason', 'None'),
+                "Risk Level": honeypot_data.get('summary', {}).get('riskLevel', 'Unknown'),
+                "Risk Type": honeypot_data.get('summary', {}).get('risk', 'Unknown')
+            },
+            "Holder Analysis": {
+                "Total Holders": holder_analysis.get('holders', '0'),
+                "Successful Txs": holder_analysis.get('successful', '0'),
+                "Failed Txs": holder_analysis.get('failed', '0'),
+                "Average Tax": f"{float(holder_analysis.get('averageTax', 0)):.2f}%",
+                "Average Gas": holder_analysis.get('averageGas', '0'),
+                "Highest Tax": f"{float(holder_analysis.get('highestTax', 0)):.2f}%",
+                "High Tax Wallets": holder_analysis.get('highTaxWallets', '0'),
+                "Snipers Failed": holder_analysis.get('snipersFailed', '0'),
+                "Snipers Success": holder_analysis.get('snipersSuccess', '0')
+            }
+        }
+
+        # Security data for the GoPlus table
+        security_data = None
+        if goplus_data and 'result' in goplus_data:
+            token_data = goplus_data['result'].get(token_address.lower(), {})
             
-            # Display security data in a nice table
-            if goplus_data and 'result' in goplus_data:
-                token_data = goplus_data['result'].get(token_address.lower(), {})
-                
-                def safe_float(value, default=0.0):
-                    """Safely convert value to float, handling empty strings"""
-                    if not value or value == '':
-                        return default
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-
-                security_data = {
-                    "Token Info": {
-                        "passed": True,
-                        "details": f"Name: {token_data.get('token_name')}\nSymbol: {token_data.get('token_symbol')}\nTotal Supply: {token_data.get('total_supply')}"
-                    },
-                    "Security Status": {
-                        "passed": not any([
-                            bool(int(token_data.get('is_honeypot', '0'))),
-                            bool(int(token_data.get('honeypot_with_same_creator', '0'))),
-                            bool(int(token_data.get('is_blacklisted', '0')))
-                        ]),
-                        "details": "\n".join([
-                            f"Is Honeypot: {'Yes' if bool(int(token_data.get('is_honeypot', '0'))) else 'No'}",
-                            f"Honeypot Same Creator: {'Yes' if bool(int(token_data.get('honeypot_with_same_creator', '0'))) else 'No'}",
-                            f"Blacklisted: {'Yes' if bool(int(token_data.get('is_blacklisted', '0'))) else 'No'}",
-                            f"Whitelisted: {'Yes' if bool(int(token_data.get('is_whitelisted', '0'))) else 'No'}"
-                        ])
-                    },
-                    "Contract": {
-                        "passed": bool(int(token_data.get('is_open_source', '0'))),
-                        "details": "\n".join([
-                            f"Open Source: {'Yes' if bool(int(token_data.get('is_open_source', '0'))) else 'No'}",
-                            f"Proxy: {'Yes' if bool(int(token_data.get('is_proxy', '0'))) else 'No'}",
-                            f"Mintable: {'Yes' if bool(int(token_data.get('is_mintable', '0'))) else 'No'}",
-                            f"External Calls: {'Yes' if bool(int(token_data.get('external_call', '0'))) else 'No'}",
-                            f"Can Self-Destruct: {'Yes' if bool(int(token_data.get('selfdestruct', '0'))) else 'No'}"
-                        ])
-                    },
-                    "Taxes": {
-                        "passed": safe_float(token_data.get('buy_tax', '100')) <= 10 and safe_float(token_data.get('sell_tax', '100')) <= 10,
-                        "details": f"Buy Tax: {safe_float(token_data.get('buy_tax', '0')) * 100:.2f}%\nSell Tax: {safe_float(token_data.get('sell_tax', '0')) * 100:.2f}%"
-                    },
-                    "Ownership": {
-                        "passed": not any([
-                            bool(int(token_data.get('hidden_owner', '0'))),
-                            bool(int(token_data.get('can_take_back_ownership', '0'))),
-                            bool(int(token_data.get('owner_change_balance', '0')))
-                        ]),
-                        "details": "\n".join([
-                            f"Hidden Owner: {'Yes' if bool(int(token_data.get('hidden_owner', '0'))) else 'No'}",
-                            f"Can Take Back Ownership: {'Yes' if bool(int(token_data.get('can_take_back_ownership', '0'))) else 'No'}",
-                            f"Owner Change Balance: {'Yes' if bool(int(token_data.get('owner_change_balance', '0'))) else 'No'}",
-                            f"Owner Address: {token_data.get('owner_address', 'Unknown')}",
-                            f"Owner Balance: {token_data.get('owner_balance', '0')}",
-                            f"Owner Percent: {float(token_data.get('owner_percent', '0')) * 100:.2f}%"
-                        ])
-                    },
-                    "Trading Restrictions": {
-                        "passed": not any([
-                            bool(int(token_data.get('cannot_buy', '0'))),
-                            bool(int(token_data.get('cannot_sell_all', '0'))),
-                            bool(int(token_data.get('trading_cooldown', '0'))),
-                            bool(int(token_data.get('transfer_pausable', '0')))
-                        ]),
-                        "details": "\n".join([
-                            f"Cannot Buy: {'Yes' if bool(int(token_data.get('cannot_buy', '0'))) else 'No'}",
-                            f"Cannot Sell All: {'Yes' if bool(int(token_data.get('cannot_sell_all', '0'))) else 'No'}",
-                            f"Trading Cooldown: {'Yes' if bool(int(token_data.get('trading_cooldown', '0'))) else 'No'}",
-                            f"Transfer Pausable: {'Yes' if bool(int(token_data.get('transfer_pausable', '0'))) else 'No'}"
-                        ])
-                    },
-                    "Anti-Whale": {
-                        "passed": True,
-                        "details": "\n".join([
-                            f"Anti-Whale: {'Yes' if bool(int(token_data.get('is_anti_whale', '0'))) else 'No'}",
-                            f"Anti-Whale Modifiable: {'Yes' if bool(int(token_data.get('anti_whale_modifiable', '0'))) else 'No'}",
-                            f"Slippage Modifiable: {'Yes' if bool(int(token_data.get('slippage_modifiable', '0'))) else 'No'}",
-                            f"Personal Slippage Modifiable: {'Yes' if bool(int(token_data.get('personal_slippage_modifiable', '0'))) else 'No'}"
-                        ])
-                    },
-                    "Holders": {
-                        "passed": True,
-                        "details": "\n".join([
-                            f"Total Holders: {token_data.get('holder_count', '0')}",
-                            f"LP Holders: {token_data.get('lp_holder_count', '0')}",
-                            f"Creator Balance: {token_data.get('creator_balance', '0')}",
-                            f"Creator %: {float(token_data.get('creator_percent', '0')) * 100:.2f}%",
-                            f"LP Total Supply: {token_data.get('lp_total_supply', '0')}"
-                        ])
-                    },
-                    "Liquidity": {
-                        "passed": True,
-                        "details": "\n".join(
-                            [f"{dex['name']}: ${float(dex.get('liquidity', 0)):,.2f}" for dex in token_data.get('dex', [])]
-                            if token_data.get('dex') else ["No liquidity data available"]
-                        )
-                    }
-                }
-                
-                # Print the security analysis table
-                print("\nGoPlus Security Analysis:")
-                print("=" * 50)
-                console.print(create_security_table(security_data))
-            else:
-                log_message("Invalid or missing GoPlus data format", "WARNING")
-                print("\nGoPlus Debug Info:")
-                print("=" * 50)
-                print(f"Response is dict: {isinstance(goplus_data, dict)}")
-                print(f"Response has 'result' key: {'result' in goplus_data if isinstance(goplus_data, dict) else False}")
-                print(f"Raw response: {json.dumps(goplus_data, indent=2)}")
-
-            # Calculate token age
-            token_age_hours = None
-            creation_time_str = honeypot_data.get('pair', {}).get('createdAtTimestamp')
-            if creation_time_str:
+            def safe_float(value, default=0.0):
+                """Safely convert value to float, handling empty strings"""
+                if not value or value == '':
+                    return default
                 try:
-                    if str(creation_time_str).isdigit():
-                        creation_time = datetime.fromtimestamp(int(creation_time_str))
-                        token_age_hours = float((datetime.now() - creation_time).total_seconds() / 3600)
-                    else:
-                        creation_time = datetime.strptime(creation_time_str, '%Y-%m-%d %H:%M:%S')
-                        token_age_hours = float((datetime.now() - creation_time).total_seconds() / 3600)
+                    return float(value)
                 except (ValueError, TypeError):
-                    token_age_hours = None
-
-            # Get current scan count and create token-specific table
-            with sqlite3.connect(db_path) as db:
-                cursor = db.cursor()
-                
-                # Create token-specific table first
-                token_name_safe = ''.join(c for c in token_info.get('name', 'Unknown') if c.isalnum())
-                token_table_name = f"{token_name_safe}_{token_address.lower()}"
-                self.create_token_specific_table(db, token_address, token_info.get('name', 'Unknown'), token_table_name)
-
-                # Rest of the database operations...
-                cursor.execute('SELECT total_scans, honeypot_failures FROM scan_records WHERE token_address = ?', 
-                            (token_address,))
-                result = cursor.fetchone()
-                total_scans = (result[0] + 1) if result else 1
-                honeypot_failures = result[1] if result else 0
-
-                # Extract all data components
-                token_info = honeypot_data.get('token', {})
-                simulation = honeypot_data.get('simulationResult', {})
-                contract = honeypot_data.get('contractCode', {})
-                pair_info = honeypot_data.get('pair', {})
-                pair_details = pair_info.get('pair', {})
-                honeypot_result = honeypot_data.get('honeypotResult', {})
-
-                # Prepare Honeypot values
-                honeypot_values = [
-                    token_address,
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    pair_address,
-                    token_info.get('name', 'Unknown'),
-                    token_info.get('symbol', 'Unknown'),
-                    token_info.get('decimals', 18),
-                    token_info.get('totalSupply', '0'),
-                    token_age_hours,
-                    bool(honeypot_data.get('simulationSuccess', False)),
-                    float(simulation.get('buyTax', 0)),
-                    float(simulation.get('sellTax', 0)),
-                    float(simulation.get('transferTax', 0)),
-                    float(pair_info.get('liquidity', 0)),
-                    str(pair_info.get('reserves0', '')),
-                    str(pair_info.get('reserves1', '')),
-                    int(simulation.get('buyGas', 0)),
-                    int(simulation.get('sellGas', 0)),
-                    pair_info.get('createdAtTimestamp', ''),
-                    int(token_info.get('totalHolders', 0)),
-                    bool(honeypot_result.get('isHoneypot', True)),
-                    honeypot_result.get('honeypotReason', ''),
-                    bool(contract.get('openSource', False)),
-                    bool(contract.get('isProxy', False)),
-                    bool(contract.get('isMintable', False)),
-                    bool(contract.get('canBeMinted', False)),
-                    token_info.get('owner', ''),
-                    token_info.get('creator', ''),
-                    token_info.get('deployer', ''),
-                    bool(contract.get('hasProxyCalls', False)),
-                    float(pair_info.get('liquidity', 0)),
-                    float(pair_info.get('liquidityToken0', 0)),
-                    float(pair_info.get('liquidityToken1', 0)),
-                    pair_details.get('token0Symbol', ''),
-                    pair_details.get('token1Symbol', ''),
-                    json.dumps(honeypot_data.get('flags', []))
-                ]
-
-                # Use the prepare_goplus_values helper function to get GoPlus values
-                goplus_values = list(prepare_goplus_values(self, goplus_data, token_address))
-
-                # Get existing liquidity values first
-                cursor.execute("""
-                    SELECT liq10, liq20, liq30, liq40, liq50, liq60, liq70, liq80, liq90, liq100,
-                           liq110, liq120, liq130, liq140, liq150, liq160, liq170, liq180, liq190, liq200 
-                    FROM scan_records 
-                    WHERE token_address = ?""", (token_address,))
-                
-                previous_values = cursor.fetchone() or [None] * 20
-
-                # Prepare liquidity tracking values
-                liquidity_values = []
-                current_liquidity = float(pair_info.get('liquidity', 0))
-                multiplier = getattr(self.config, 'liquidity_multiplier', 1)
-
-                # Calculate which liquidity field should be updated (if any)
-                update_field = None
-                if total_scans % multiplier == 0:  # Only update on multiples of multiplier
-                    update_field = total_scans  # This will be the field number to update (e.g., 10, 20, 30, etc.)
-
-                for i, field_num in enumerate(range(10, 201, 10)):
-                    if update_field and field_num == update_field:
-                        # Update this field with current liquidity
-                        liquidity_values.append(current_liquidity)
-                    else:
-                        # Keep previous value if it exists
-                        liquidity_values.append(previous_values[i] if previous_values else None)
-
-                # Add liquidity values to values list
-                values = honeypot_values + goplus_values + [total_scans, honeypot_failures, '', 'active'] + liquidity_values
-
-                # Create token-specific table if it doesn't exist
-                token_name_safe = ''.join(c for c in token_info.get('name', 'Unknown') if c.isalnum())
-                token_table_name = f"{token_name_safe}_{token_address.lower()}"
-                
-                # Create token-specific table
-                cursor.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {token_table_name} (
-                        token_address TEXT,
-                        scan_timestamp TEXT NOT NULL,
-                        pair_address TEXT,
-                        token_name TEXT,
-                        token_symbol TEXT,
-                        token_decimals INTEGER,
-                        token_total_supply TEXT,
-                        token_age_hours REAL,
-                        hp_simulation_success INTEGER,
-                        hp_buy_tax REAL,
-                        hp_sell_tax REAL,
-                        hp_transfer_tax REAL,
-                        hp_liquidity_amount REAL,
-                        hp_pair_reserves0 TEXT,
-                        hp_pair_reserves1 TEXT,
-                        hp_buy_gas_used INTEGER,
-                        hp_sell_gas_used INTEGER,
-                        hp_creation_time TEXT,
-                        hp_holder_count INTEGER,
-                        hp_is_honeypot INTEGER,
-                        hp_honeypot_reason TEXT,
-                        hp_is_open_source INTEGER,
-                        hp_is_proxy INTEGER,
-                        hp_is_mintable INTEGER,
-                        hp_can_be_minted INTEGER,
-                        hp_owner_address TEXT,
-                        hp_creator_address TEXT,
-                        hp_deployer_address TEXT,
-                        hp_has_proxy_calls INTEGER,
-                        hp_pair_liquidity REAL,
-                        hp_pair_liquidity_token0 REAL,
-                        hp_pair_liquidity_token1 REAL,
-                        hp_pair_token0_symbol TEXT,
-                        hp_pair_token1_symbol TEXT,
-                        hp_flags TEXT,
-                        gp_is_open_source INTEGER,
-                        gp_is_proxy INTEGER,
-                        gp_is_mintable INTEGER,
-                        gp_owner_address TEXT,
-                        gp_creator_address TEXT,
-                        gp_can_take_back_ownership INTEGER,
-                        gp_owner_change_balance INTEGER,
-                        gp_hidden_owner INTEGER,
-                        gp_selfdestruct INTEGER,
-                        gp_external_call INTEGER,
-                        gp_buy_tax REAL,
-                        gp_sell_tax REAL,
-                        gp_is_anti_whale INTEGER,
-                        gp_anti_whale_modifiable INTEGER,
-                        gp_cannot_buy INTEGER,
-                        gp_cannot_sell_all INTEGER,
-                        gp_slippage_modifiable INTEGER,
-                        gp_personal_slippage_modifiable INTEGER,
-                        gp_trading_cooldown INTEGER,
-                        gp_is_blacklisted INTEGER,
-                        gp_is_whitelisted INTEGER,
-                        gp_is_in_dex INTEGER,
-                        gp_transfer_pausable INTEGER,
-                        gp_can_be_minted INTEGER,
-                        gp_total_supply TEXT,
-                        gp_holder_count INTEGER,
-                        gp_owner_percent REAL,
-                        gp_owner_balance TEXT,
-                        gp_creator_percent REAL,
-                        gp_creator_balance TEXT,
-                        gp_lp_holder_count INTEGER,
-                        gp_lp_total_supply TEXT,
-                        gp_is_true_token INTEGER,
-                        gp_is_airdrop_scam INTEGER,
-                        gp_trust_list TEXT,
-                        gp_other_potential_risks TEXT,
-                        gp_note TEXT,
-                        gp_honeypot_with_same_creator INTEGER,
-                        gp_fake_token INTEGER,
-                        gp_holders TEXT,
-                        gp_lp_holders TEXT,
-                        gp_dex_info TEXT,
-                        total_scans INTEGER DEFAULT 1,
-                        honeypot_failures INTEGER DEFAULT 0,
-                        last_error TEXT,
-                        status TEXT DEFAULT 'new',
-                        liq10 REAL,
-                        liq20 REAL,
-                        liq30 REAL,
-                        liq40 REAL,
-                        liq50 REAL,
-                        liq60 REAL,
-                        liq70 REAL,
-                        liq80 REAL,
-                        liq90 REAL,
-                        liq100 REAL,
-                        liq110 REAL,
-                        liq120 REAL,
-                        liq130 REAL,
-                        liq140 REAL,
-                        liq150 REAL,
-                        liq160 REAL,
-                        liq170 REAL,
-                        liq180 REAL,
-                        liq190 REAL,
-                        liq200 REAL
+                    return default
+
+            security_data = {
+                "Token Info": {
+                    "passed": True,
+                    "details": f"Name: {token_data.get('token_name')}\nSymbol: {token_data.get('token_symbol')}\nTotal Supply: {token_data.get('total_supply')}"
+                },
+                "Security Status": {
+                    "passed": not any([
+                        bool(int(token_data.get('is_honeypot', '0'))),
+                        bool(int(token_data.get('honeypot_with_same_creator', '0'))),
+                        bool(int(token_data.get('is_blacklisted', '0')))
+                    ]),
+                    "details": "\n".join([
+                        f"Is Honeypot: {'Yes' if bool(int(token_data.get('is_honeypot', '0'))) else 'No'}",
+                        f"Honeypot Same Creator: {'Yes' if bool(int(token_data.get('honeypot_with_same_creator', '0'))) else 'No'}",
+                        f"Blacklisted: {'Yes' if bool(int(token_data.get('is_blacklisted', '0'))) else 'No'}",
+                        f"Whitelisted: {'Yes' if bool(int(token_data.get('is_whitelisted', '0'))) else 'No'}"
+                    ])
+                },
+                "Contract": {
+                    "passed": bool(int(token_data.get('is_open_source', '0'))),
+                    "details": "\n".join([
+                        f"Open Source: {'Yes' if bool(int(token_data.get('is_open_source', '0'))) else 'No'}",
+                        f"Proxy: {'Yes' if bool(int(token_data.get('is_proxy', '0'))) else 'No'}",
+                        f"Mintable: {'Yes' if bool(int(token_data.get('is_mintable', '0'))) else 'No'}",
+                        f"External Calls: {'Yes' if bool(int(token_data.get('external_call', '0'))) else 'No'}",
+                        f"Can Self-Destruct: {'Yes' if bool(int(token_data.get('selfdestruct', '0'))) else 'No'}"
+                    ])
+                },
+                "Taxes": {
+                    "passed": safe_float(token_data.get('buy_tax', '100')) <= 10 and safe_float(token_data.get('sell_tax', '100')) <= 10,
+                    "details": f"Buy Tax: {safe_float(token_data.get('buy_tax', '0')) * 100:.2f}%\nSell Tax: {safe_float(token_data.get('sell_tax', '0')) * 100:.2f}%"
+                },
+                "Ownership": {
+                    "passed": not any([
+                        bool(int(token_data.get('hidden_owner', '0'))),
+                        bool(int(token_data.get('can_take_back_ownership', '0'))),
+                        bool(int(token_data.get('owner_change_balance', '0')))
+                    ]),
+                    "details": "\n".join([
+                        f"Hidden Owner: {'Yes' if bool(int(token_data.get('hidden_owner', '0'))) else 'No'}",
+                        f"Can Take Back Ownership: {'Yes' if bool(int(token_data.get('can_take_back_ownership', '0'))) else 'No'}",
+                        f"Owner Change Balance: {'Yes' if bool(int(token_data.get('owner_change_balance', '0'))) else 'No'}",
+                        f"Owner Address: {token_data.get('owner_address', 'Unknown')}",
+                        f"Owner Balance: {token_data.get('owner_balance', '0')}",
+                        f"Owner Percent: {float(token_data.get('owner_percent', '0')) * 100:.2f}%"
+                    ])
+                },
+                "Trading Restrictions": {
+                    "passed": not any([
+                        bool(int(token_data.get('cannot_buy', '0'))),
+                        bool(int(token_data.get('cannot_sell_all', '0'))),
+                        bool(int(token_data.get('trading_cooldown', '0'))),
+                        bool(int(token_data.get('transfer_pausable', '0')))
+                    ]),
+                    "details": "\n".join([
+                        f"Cannot Buy: {'Yes' if bool(int(token_data.get('cannot_buy', '0'))) else 'No'}",
+                        f"Cannot Sell All: {'Yes' if bool(int(token_data.get('cannot_sell_all', '0'))) else 'No'}",
+                        f"Trading Cooldown: {'Yes' if bool(int(token_data.get('trading_cooldown', '0'))) else 'No'}",
+                        f"Transfer Pausable: {'Yes' if bool(int(token_data.get('transfer_pausable', '0'))) else 'No'}"
+                    ])
+                },
+                "Anti-Whale": {
+                    "passed": True,
+                    "details": "\n".join([
+                        f"Anti-Whale: {'Yes' if bool(int(token_data.get('is_anti_whale', '0'))) else 'No'}",
+                        f"Anti-Whale Modifiable: {'Yes' if bool(int(token_data.get('anti_whale_modifiable', '0'))) else 'No'}",
+                        f"Slippage Modifiable: {'Yes' if bool(int(token_data.get('slippage_modifiable', '0'))) else 'No'}",
+                        f"Personal Slippage Modifiable: {'Yes' if bool(int(token_data.get('personal_slippage_modifiable', '0'))) else 'No'}"
+                    ])
+                },
+                "Holders": {
+                    "passed": True,
+                    "details": "\n".join([
+                        f"Total Holders: {token_data.get('holder_count', '0')}",
+                        f"LP Holders: {token_data.get('lp_holder_count', '0')}",
+                        f"Creator Balance: {token_data.get('creator_balance', '0')}",
+                        f"Creator %: {float(token_data.get('creator_percent', '0')) * 100:.2f}%",
+                        f"LP Total Supply: {token_data.get('lp_total_supply', '0')}"
+                    ])
+                },
+                "Liquidity": {
+                    "passed": True,
+                    "details": "\n".join(
+                        [f"{dex['name']}: ${float(dex.get('liquidity', 0)):,.2f}" for dex in token_data.get('dex', [])]
+                        if token_data.get('dex') else ["No liquidity data available"]
                     )
-                """)
-                
-                # Single INSERT OR REPLACE operation for main table
-                columns = [
-                    "token_address", "scan_timestamp", "pair_address", "token_name", "token_symbol",
-                    "token_decimals", "token_total_supply", "token_age_hours",
-                    "hp_simulation_success", "hp_buy_tax", "hp_sell_tax", "hp_transfer_tax",
-                    "hp_liquidity_amount", "hp_pair_reserves0", "hp_pair_reserves1",
-                    "hp_buy_gas_used", "hp_sell_gas_used", "hp_creation_time",
-                    "hp_holder_count", "hp_is_honeypot", "hp_honeypot_reason",
-                    "hp_is_open_source", "hp_is_proxy", "hp_is_mintable", "hp_can_be_minted",
-                    "hp_owner_address", "hp_creator_address", "hp_deployer_address",
-                    "hp_has_proxy_calls", "hp_pair_liquidity", "hp_pair_liquidity_token0",
-                    "hp_pair_liquidity_token1", "hp_pair_token0_symbol", "hp_pair_token1_symbol",
-                    "hp_flags",
-                    # GoPlus columns
-                    "gp_is_open_source", "gp_is_proxy", "gp_is_mintable",
-                    "gp_owner_address", "gp_creator_address", "gp_can_take_back_ownership",
-                    "gp_owner_change_balance", "gp_hidden_owner", "gp_selfdestruct",
-                    "gp_external_call", "gp_buy_tax", "gp_sell_tax", "gp_is_anti_whale",
-                    "gp_anti_whale_modifiable", "gp_cannot_buy", "gp_cannot_sell_all",
-                    "gp_slippage_modifiable", "gp_personal_slippage_modifiable",
-                    "gp_trading_cooldown", "gp_is_blacklisted", "gp_is_whitelisted",
-                    "gp_is_in_dex", "gp_transfer_pausable", "gp_can_be_minted",
-                    "gp_total_supply", "gp_holder_count", "gp_owner_percent",
-                    "gp_owner_balance", "gp_creator_percent", "gp_creator_balance",
-                    "gp_lp_holder_count", "gp_lp_total_supply", "gp_is_true_token",
-                    "gp_is_airdrop_scam", "gp_trust_list", "gp_other_potential_risks",
-                    "gp_note", "gp_honeypot_with_same_creator", "gp_fake_token",
-                    "gp_holders", "gp_lp_holders", "gp_dex_info",
-                    # Metadata columns
-                    "total_scans", "honeypot_failures", "last_error", "status",
-                    "liq10", "liq20", "liq30", "liq40", "liq50", "liq60", "liq70", "liq80", "liq90", "liq100",
-                    "liq110", "liq120", "liq130", "liq140", "liq150", "liq160", "liq170", "liq180", "liq190", "liq200"
-                ]
-                placeholders = ", ".join(["?" for _ in range(len(columns))])
-                
-                # Insert into main table
+                }
+            }
+
+        # Calculate token age
+        token_age_hours = None
+        creation_time_str = honeypot_data.get('pair', {}).get('createdAtTimestamp')
+        if creation_time_str:
+            try:
+                if str(creation_time_str).isdigit():
+                    creation_time = datetime.fromtimestamp(int(creation_time_str))
+                    token_age_hours = float((clock.now() - creation_time).total_seconds() / 3600)
+                else:
+                    creation_time = datetime.strptime(creation_time_str, '%Y-%m-%d %H:%M:%S')
+                    token_age_hours = float((clock.now() - creation_time).total_seconds() / 3600)
+            except (ValueError, TypeError):
+                token_age_hours = None
+
+        scan['token_age_hours'] = token_age_hours
+        scan['is_honeypot'] = bool(honeypot_result.get('isHoneypot', True))
+        scan['pair_data'] = pair_data
+        scan['security_data'] = security_data
+        return scan
+
+    def changed_columns(self, db: sqlite3.Connection, columns: List[str], values: List) -> List[str]:
+        """
+        Compare a scan with the token's stored scan_records row
+
+        Each value is compared by SQLite with the column's affinity applied,
+        so it matches what storing it would produce.
+
+        Args:
+            db: Writer connection
+            columns: scan_records columns of the scan, starting with token_address
+            values: Values in column order
+
+        Returns:
+            Columns whose value differs, apart from REFRESHED_COLUMNS
+        """
+        compared = [(name, value) for name, value in zip(columns, values)
+                    if name != "token_address" and name not in REFRESHED_COLUMNS]
+        differs = db.execute(f"""
+            SELECT {", ".join(f"{name} IS NOT ?" for name, _ in compared)}
+            FROM scan_records WHERE token_address = ?
+        """, [value for _, value in compared] + [values[0]]).fetchone()
+        return [name for (name, _), different in zip(compared, differs) if different]
+
+    async def persist_token(self, scan: Dict) -> Dict:
+        """
+        Write the scan to scan_records and scan_history (persist stage)
+
+        A token's first scan is written in full. Later scans are diffed
+        against the stored record inside the write: only the changed columns
+        and REFRESHED_COLUMNS are updated, and scan_history gets a change
+        event only when something changed.
+        """
+        token_address = scan['token_address']
+        pair_address = scan['pair_address']
+        honeypot_data = scan['honeypot_data']
+        goplus_data = scan['goplus_data']
+        token_age_hours = scan['token_age_hours']
+        token_info = honeypot_data.get('token', {})
+
+        # Extract all data components
+        simulation = honeypot_data.get('simulationResult', {})
+        contract = honeypot_data.get('contractCode', {})
+        pair_info = honeypot_data.get('pair', {})
+        pair_details = pair_info.get('pair', {})
+        honeypot_result = honeypot_data.get('honeypotResult', {})
+
+        # Prepare Honeypot values
+        honeypot_values = [
+            token_address,
+            clock.now().strftime('%Y-%m-%d %H:%M:%S'),
+            pair_address,
+            token_info.get('name', 'Unknown'),
+            token_info.get('symbol', 'Unknown'),
+            token_info.get('decimals', 18),
+            token_info.get('totalSupply', '0'),
+            token_age_hours,
+            bool(honeypot_data.get('simulationSuccess', False)),
+            float(simulation.get('buyTax', 0)),
+            float(simulation.get('sellTax', 0)),
+            float(simulation.get('transferTax', 0)),
+            float(pair_info.get('liquidity', 0)),
+            str(pair_info.get('reserves0', '')),
+            str(pair_info.get('reserves1', '')),
+            int(simulation.get('buyGas', 0)),
+            int(simulation.get('sellGas', 0)),
+            pair_info.get('createdAtTimestamp', ''),
+            int(token_info.get('totalHolders', 0)),
+            bool(honeypot_result.get('isHoneypot', True)),
+            honeypot_result.get('honeypotReason', ''),
+            bool(contract.get('openSource', False)),
+            bool(contract.get('isProxy', False)),
+            bool(contract.get('isMintable', False)),
+            bool(contract.get('canBeMinted', False)),
+            token_info.get('owner', ''),
+            token_info.get('creator', ''),
+            token_info.get('deployer', ''),
+            bool(contract.get('hasProxyCalls', False)),
+            float(pair_info.get('liquidity', 0)),
+            float(pair_info.get('liquidityToken0', 0)),
+            float(pair_info.get('liquidityToken1', 0)),
+            pair_details.get('token0Symbol', ''),
+            pair_details.get('token1Symbol', ''),
+            json.dumps(honeypot_data.get('flags', []))
+        ]
+
+        # Use the prepare_goplus_values helper function to get GoPlus values
+        goplus_values = list(prepare_goplus_values(self, goplus_data, token_address))
+
+        current_liquidity = float(pair_info.get('liquidity', 0))
+
+        # Columns shared by scan_records and scan_history
+        columns = [
+            "token_address", "scan_timestamp", "pair_address", "token_name", "token_symbol",
+            "token_decimals", "token_total_supply", "token_age_hours",
+            "hp_simulation_success", "hp_buy_tax", "hp_sell_tax", "hp_transfer_tax",
+            "hp_liquidity_amount", "hp_pair_reserves0", "hp_pair_reserves1",
+            "hp_buy_gas_used", "hp_sell_gas_used", "hp_creation_time",
+            "hp_holder_count", "hp_is_honeypot", "hp_honeypot_reason",
+            "hp_is_open_source", "hp_is_proxy", "hp_is_mintable", "hp_can_be_minted",
+            "hp_owner_address", "hp_creator_address", "hp_deployer_address",
+            "hp_has_proxy_calls", "hp_pair_liquidity", "hp_pair_liquidity_token0",
+            "hp_pair_liquidity_token1", "hp_pair_token0_symbol", "hp_pair_token1_symbol",
+            "hp_flags",
+            # GoPlus columns
+            "gp_is_open_source", "gp_is_proxy", "gp_is_mintable",
+            "gp_owner_address", "gp_creator_address", "gp_can_take_back_ownership",
+            "gp_owner_change_balance", "gp_hidden_owner", "gp_selfdestruct",
+            "gp_external_call", "gp_buy_tax", "gp_sell_tax", "gp_is_anti_whale",
+            "gp_anti_whale_modifiable", "gp_cannot_buy", "gp_cannot_sell_all",
+            "gp_slippage_modifiable", "gp_personal_slippage_modifiable",
+            "gp_trading_cooldown", "gp_is_blacklisted", "gp_is_whitelisted",
+            "gp_is_in_dex", "gp_transfer_pausable", "gp_can_be_minted",
+            "gp_total_supply", "gp_holder_count", "gp_owner_percent",
+            "gp_owner_balance", "gp_creator_percent", "gp_creator_balance",
+            "gp_lp_holder_count", "gp_lp_total_supply", "gp_is_true_token",
+            "gp_is_airdrop_scam", "gp_trust_list", "gp_other_potential_risks",
+            "gp_note", "gp_honeypot_with_same_creator", "gp_fake_token",
+            "gp_holders", "gp_lp_holders", "gp_dex_info",
+            # Metadata columns
+            "total_scans", "honeypot_failures", "last_error", "status"
+        ]
+        placeholders = ", ".join(["?" for _ in range(len(columns))])
+
+        def write(db):
+            """Runs on the writer thread, inside its group commit"""
+            cursor = db.cursor()
+
+            # Get current scan count
+            cursor.execute('SELECT total_scans, honeypot_failures FROM scan_records WHERE token_address = ?', 
+                        (token_address,))
+            result = cursor.fetchone()
+            total_scans = (result[0] + 1) if result else 1
+            honeypot_failures = result[1] if result else 0
+
+            values = honeypot_values + goplus_values + [total_scans, honeypot_failures, '', 'active']
+
+            if result is None:
+                # First scan of the token: store it in full
                 cursor.execute(f"""
                     INSERT OR REPLACE INTO scan_records ({", ".join(columns)})
                     VALUES ({placeholders})
                 """, values)
-                
-                # Insert into token-specific table
-                cursor.execute(f"""
-                    INSERT OR REPLACE INTO {token_table_name} ({", ".join(columns)})
-                    VALUES ({placeholders})
-                """, values)
-                
-                db.commit()
+                self.history.append_row(db, columns, values)
+                return "new"
+
+            # Later scans only write what differs from the stored record
+            changed = self.changed_columns(db, columns, values)
+            refreshed = dict(zip(columns, values))
+            updates = list(REFRESHED_COLUMNS) + changed
+            cursor.execute(f"""
+                UPDATE scan_records SET {", ".join(f"{name} = ?" for name in updates)}
+                WHERE token_address = ?
+            """, [refreshed[name] for name in updates] + [token_address])
+            if not changed:
+                return "unchanged"
+            self.history.append_row(db, columns, values, changed)
+            return "changed"
+
+        write_started = time.perf_counter()
+        self.scan_writes[await self.db.write(write)] += 1
+        self.db_write_latency.observe(time.perf_counter() - write_started)
+
+        # Check if token should be moved to HONEYPOTS table
+        if token_age_hours is not None:
+            await self.check_and_move_honeypot(token_address, token_age_hours, scan['is_honeypot'])
+
+        # Scan summary used to adapt the token's rescan cadence
+        scan['summary'] = {
+            'token_age_hours': token_age_hours,
+            'liquidity': current_liquidity,
+            'buy_tax': float(simulation.get('buyTax', 0)),
+            'sell_tax': float(simulation.get('sellTax', 0)),
+            'holders': int(token_info.get('totalHolders', 0)) or goplus_values[25]
+        }
+        return scan
 
-            # Check if token should be moved to HONEYPOTS table
-            is_honeypot = bool(honeypot_result.get('isHoneypot', True))
-            if token_age_hours is not None:
-                await self.check_and_move_honeypot(token_address, token_age_hours, is_honeypot)
+    def render_token(self, scan: Dict) -> Dict:
+        """Print the analysis tables of a scan in one block (render stage)"""
+        goplus_data = scan['goplus_data']
 
-            # Print API stats after processing
-            print("\nAPI Call Statistics:")
-            print("=" * 50)
-            
-            # Create statistics table with empty responses
-            stats_table = Table(title="API Call Statistics", border_style="blue")
-            stats_table.add_column("Endpoint", style="cyan")
-            stats_table.add_column("Total Calls", style="green")
-            stats_table.add_column("Success", style="green")
-            stats_table.add_column("Empty Responses", style="yellow")
-            stats_table.add_column("Errors", style="red")
-            stats_table.add_column("Rate Limits", style="magenta")
-            
-            # Initialize empty response counters
-            empty_responses = {
-                'goplus': 0,
-                'honeypot': 0
-            }
-            
-            # Check for empty responses
-            if not goplus_data or not isinstance(goplus_data, dict) or not goplus_data.get('result'):
-                empty_responses['goplus'] = 1
-            if not honeypot_data or not isinstance(honeypot_data, dict) or not honeypot_data.get('simulationSuccess'):
-                empty_responses['honeypot'] = 1
-            
-            # Get stats from api_tracker
-            for endpoint, stats in api_tracker.calls_by_endpoint.items():
-                # Update empty response count
-                stats["empty_response_count"] = empty_responses.get(endpoint, 0)
-                
-                stats_table.add_row(
-                    endpoint,
-                    str(stats["total_calls"]),
-                    str(stats["success_count"]),
-                    str(stats["empty_response_count"]),
-                    str(stats["error_count"]),
-                    str(stats["rate_limit_count"])
-                )
-            
-            console.print(stats_table)
+        print("\n" + "="*80)
+        log_message(f"Processing Token: {scan['token_address']}", "INFO")
+        log_message(f"Pair Address: {scan['pair_address']}", "INFO")
+        print("="*80 + "\n")
 
-            return True
+        # Display honeypot data in a nice table
+        console.print(create_pair_table(scan['pair_data']))
 
-        except Exception as e:
-            error_message = str(e)
-            if db_path:
-                try:
-                    with sqlite3.connect(db_path) as error_db:
-                        error_cursor = error_db.cursor()
-                        error_cursor.execute('''
-                            UPDATE scan_records 
-                            SET honeypot_failures = honeypot_failures + 1,
-                                last_error = ?
-                            WHERE token_address = ?
-                        ''', (error_message, token_address))
-
-                        # Get honeypot failure limit from config
-                        honeypot_failure_limit = 5  # Default value
-                        if hasattr(self.tracker, 'config') and isinstance(self.tracker.config, dict):
-                            honeypot_failure_limit = self.tracker.config.get('scanning', {}).get('honeypot_failure_limit', 5)
-                        elif hasattr(self.tracker, 'config') and hasattr(self.tracker.config, 'scanning'):
-                            honeypot_failure_limit = getattr(self.tracker.config.scanning, 'honeypot_failure_limit', 5)
-
-                        # Check if token should be moved to xHoneypot_removed
-                        error_cursor.execute('''
-                            SELECT 
-                                token_address,
-                                scan_timestamp,
-                                token_name,
-                                token_symbol,
-                                token_decimals,
-                                token_total_supply,
-                                pair_address,
-                                token_age_hours,
-                                hp_simulation_success,
-                                hp_buy_tax,
-                                hp_sell_tax,
-                                hp_transfer_tax,
-                                hp_liquidity_amount,
-                                hp_pair_reserves0,
-                                hp_pair_reserves1,
-                                hp_buy_gas_used,
-                                hp_sell_gas_used,
-                                hp_creation_time,
-                                hp_holder_count,
-                                hp_is_honeypot,
-                                hp_honeypot_reason,
-                                total_scans,
-                                honeypot_failures,
-                                last_error
-                            FROM scan_records 
-                            WHERE token_address = ? 
-                            AND honeypot_failures >= ?
-                            AND hp_is_honeypot = 1
-                        ''', (token_address, honeypot_failure_limit))
-                        
-                        failed_token = error_cursor.fetchone()
-                        if failed_token:
-                            # Insert into xHoneypot_removed
-                            error_cursor.execute('''
-                                INSERT INTO xHoneypot_removed (
-                                    token_address,
-                                    removal_timestamp,
-                                    original_scan_timestamp,
-                                    token_name,
-                                    token_symbol,
-                                    token_decimals,
-                                    token_total_supply,
-                                    token_pair_address,
-                                    token_age_hours,
-                                    hp_simulation_success,
-                                    hp_buy_tax,
-                                    hp_sell_tax,
-                                    hp_transfer_tax,
-                                    hp_liquidity_amount,
-                                    hp_pair_reserves0,
-                                    hp_pair_reserves1,
-                                    hp_buy_gas_used,
-                                    hp_sell_gas_used,
-                                    hp_creation_time,
-                                    hp_holder_count,
-                                    hp_is_honeypot,
-                                    hp_honeypot_reason,
-                                    total_scans,
-                                    honeypot_failures,
-                                    last_error,
-                                    removal_reason
-                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                failed_token[0],  # token_address
-                                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),  # removal_timestamp
-                                failed_token[1],  # original_scan_timestamp
-                                failed_token[2],  # token_name
-                                failed_token[3],  # token_symbol
-                                failed_token[4],  # token_decimals
-                                failed_token[5],  # token_total_supply
-                                failed_token[6],  # token_pair_address
-                                failed_token[7],  # token_age_hours
-                                failed_token[8],  # hp_simulation_success
-                                failed_token[9],  # hp_buy_tax
-                                failed_token[10], # hp_sell_tax
-                                failed_token[11], # hp_transfer_tax
-                                failed_token[12], # hp_liquidity_amount
-                                failed_token[13], # hp_pair_reserves0
-                                failed_token[14], # hp_pair_reserves1
-                                failed_token[15], # hp_buy_gas_used
-                                failed_token[16], # hp_sell_gas_used
-                                failed_token[17], # hp_creation_time
-                                failed_token[18], # hp_holder_count
-                                failed_token[19], # hp_is_honeypot
-                                failed_token[20], # hp_honeypot_reason
-                                failed_token[21], # total_scans
-                                failed_token[22], # honeypot_failures
-                                failed_token[23], # last_error
-                                f"Exceeded honeypot failure limit ({honeypot_failure_limit})"
-                            ))
-
-                            # Delete from scan_records
-                            error_cursor.execute('DELETE FROM scan_records WHERE token_address = ?', (token_address,))
-
-                        error_db.commit()
-                except sqlite3.Error as db_error:
-                    log_message(f"Failed to update error status in database: {str(db_error)}", "ERROR")
-                except Exception as unexpected_error:
-                    log_message(f"Unexpected error updating error status: {str(unexpected_error)}", "ERROR")
-            
-            log_message(f"Error processing token {token_address}: {error_message}", "ERROR")
-            print("Full traceback:")
-            traceback.print_exc()
-            return False
+        # Display security data in a nice table
+        if scan['security_data']:
+            print("\nGoPlus Security Analysis:")
+            print("=" * 50)
+            console.print(create_security_table(scan['security_data']))
+        else:
+            log_message("Invalid or missing GoPlus data format", "WARNING")
+            print("\nGoPlus Debug Info:")
+            print("=" * 50)
+            print(f"Response is dict: {isinstance(goplus_data, dict)}")
+            print(f"Response has 'result' key: {'result' in goplus_data if isinstance(goplus_data, dict) else False}")
+            print(f"Raw response: {json.dumps(goplus_data, indent=2)}")
+
+        # Print API stats after processing
+        print("\nAPI Call Statistics:")
+        print("=" * 50)
+
+        # Create statistics table with empty responses
+        stats_table = Table(title="API Call Statistics", border_style="blue")
+        stats_table.add_column("Endpoint", style="cyan")
+        stats_table.add_column("Total Calls", style="green")
+        stats_table.add_column("Success", style="green")
+        stats_table.add_column("Empty Responses", style="yellow")
+        stats_table.add_column("Errors", style="red")
+        stats_table.add_column("Rate Limits", style="magenta")
+
+        # Get stats from api_tracker
+        for endpoint, stats in api_tracker.calls_by_endpoint.items():
+            stats_table.add_row(
+                endpoint,
+                str(stats["total_calls"]),
+                str(stats["success_count"]),
+                str(stats["empty_response_count"]),
+                str(stats["error_count"]),
+                str(stats["rate_limit_count"])
+            )
 
-    async def process_rescan_tokens(self):
-        """Process tokens that need rescanning"""
+        console.print(stats_table)
+        return scan
+
+    async def record_scan_failure(self, token_address: str, error_message: str):
+        """Count a failed scan and move the token to xHoneypot_removed past the failure limit"""
         try:
-            db_path = os.path.join(self.folder_name, 'scan_records.db')
-            print("\nChecking for tokens to rescan...")
-            
-            with sqlite3.connect(db_path) as db:
-                cursor = db.cursor()
-                
-                # First check how many tokens are in the database
-                cursor.execute('SELECT COUNT(*) FROM scan_records WHERE status = "active"')
-                total_active = cursor.fetchone()[0]
-                print(f"Total active tokens in database: {total_active}")
-                
-                # Get tokens that need rescanning - reduced to 1 at a time
-                cursor.execute('''
-                    SELECT token_address, pair_address, total_scans, scan_timestamp
+            def write(error_db):
+                error_cursor = error_db.cursor()
+                error_cursor.execute('''
+                    UPDATE scan_records 
+                    SET honeypot_failures = honeypot_failures + 1,
+                        last_error = ?
+                    WHERE token_address = ?
+                ''', (error_message, token_address))
+
+                # Get honeypot failure limit from config
+                honeypot_failure_limit = 5  # Default value
+                if hasattr(self.tracker, 'config') and isinstance(self.tracker.config, dict):
+                    honeypot_failure_limit = self.tracker.config.get('scanning', {}).get('honeypot_failure_limit', 5)
+                elif hasattr(self.tracker, 'config') and hasattr(self.tracker.config, 'scanning'):
+                    honeypot_failure_limit = getattr(self.tracker.config.scanning, 'honeypot_failure_limit', 5)
+
+                # Check if token should be moved to xHoneypot_removed
+                error_cursor.execute('''
+                    SELECT 
+                        token_address,
+                        scan_timestamp,
+                        token_name,
+                        token_symbol,
+                        token_decimals,
+                        token_total_supply,
+                        pair_address,
+                        token_age_hours,
+                        hp_simulation_success,
+                        hp_buy_tax,
+                        hp_sell_tax,
+                        hp_transfer_tax,
+                        hp_liquidity_amount,
+                        hp_pair_reserves0,
+                        hp_pair_reserves1,
+                        hp_buy_gas_used,
+                        hp_sell_gas_used,
+                        hp_creation_time,
+                        hp_holder_count,
+                        hp_is_honeypot,
+                        hp_honeypot_reason,
+                        total_scans,
+                        honeypot_failures,
+                        last_error
                     FROM scan_records 
-                    WHERE status = 'active'
-                    ORDER BY scan_timestamp ASC
-                ''')
-                
-                tokens = cursor.fetchall()
-                print(f"Found {len(tokens)} tokens eligible for rescan")
-                
-                if tokens:
-                    # First process all tokens
-                    for token_address, pair_address, total_scans, scan_timestamp in tokens:
-                        print(f"\nRescanning token {token_address}")
-                        print(f"Current scan count: {total_scans}")
-                        print(f"Last scan time: {scan_timestamp}")
-                        await self.process_token(token_address, pair_address)
-                        await asyncio.sleep(5)  # Increased delay between rescans
-
-                    # After all processing and API stats are shown, display the rescan queue
-                    print("\nRescan Queue:")
-                    print("=" * 50)
-                    rescan_table = Table(title="[bold yellow]RESCAN QUEUE", border_style="yellow")
-                    rescan_table.add_column("Token Address", style="cyan")
-                    rescan_table.add_column("Token Name", style="green")
-                    rescan_table.add_column("Pair Address", style="magenta")
-                    rescan_table.add_column("GoPlus Liquidity", style="blue")
-                    rescan_table.add_column("Honeypot Liquidity", style="red")
-                    rescan_table.add_column("Scan #", style="yellow")
-                    rescan_table.add_column("Last Scan", style="white")
-                    
-                    # Refresh token data after processing
-                    cursor.execute('''
-                        SELECT token_address, pair_address, total_scans, scan_timestamp
-                        FROM scan_records 
-                        WHERE status = 'active'
-                        ORDER BY scan_timestamp ASC
-                    ''')
-                    updated_tokens = cursor.fetchall()
-                    
-                    for token_address, pair_address, total_scans, scan_timestamp in updated_tokens:
-                        # Get token info from database
-                        cursor.execute('''
-                            SELECT token_name, hp_liquidity_amount, gp_dex_info 
-                            FROM scan_records 
-                            WHERE token_address = ?
-                        ''', (token_address,))
-                        db_data = cursor.fetchone()
-                        
-                        token_name = db_data[0] if db_data and db_data[0] else "Unknown"
-                        honeypot_liquidity = f"${float(db_data[1]):,.2f}" if db_data and db_data[1] else "N/A"
-                        
-                        # Parse GoPlus DEX info to get liquidity
-                        goplus_liquidity = "N/A"
-                        if db_data and db_data[2]:
-                            try:
-                                dex_info = json.loads(db_data[2])
-                                if dex_info and isinstance(dex_info, list):
-                                    # Sum up liquidity from all DEXes and multiply by 2
-                                    total_liquidity = sum(float(dex.get('liquidity', 0)) for dex in dex_info) * 2
-                                    goplus_liquidity = f"${total_liquidity:,.2f}"
-                            except (json.JSONDecodeError, ValueError):
-                                goplus_liquidity = "N/A"
-                        
-                        rescan_table.add_row(
+                    WHERE token_address = ? 
+                    AND honeypot_failures >= ?
+                    AND hp_is_honeypot = 1
+                ''', (token_address, honeypot_failure_limit))
+
+                failed_token = error_cursor.fetchone()
+                if failed_token:
+                    # Insert into xHoneypot_removed
+                    error_cursor.execute('''
+                        INSERT INTO xHoneypot_removed (
                             token_address,
+                            removal_timestamp,
+                            original_scan_timestamp,
                             token_name,
-                            pair_address,
-                            goplus_liquidity,
-                            honeypot_liquidity,
-                            str(total_scans + 1),
-                            scan_timestamp
-                        )
-                    
-                    console.print(rescan_table)
-                else:
-                    log_message("No tokens need rescanning at this time", "INFO")
-                
-        except Exception as e:
-            log_message(f"Error in process_rescan_tokens: {str(e)}", "ERROR")
-            print("\nFull traceback:")
-            traceback.print_exc()
+                            token_symbol,
+                            token_decimals,
+                            token_total_supply,
+                            token_pair_address,
+                            token_age_hours,
+                            hp_simulation_success,
+                            hp_buy_tax,
+                            hp_sell_tax,
+                            hp_transfer_tax,
+                            hp_liquidity_amount,
+                            hp_pair_reserves0,
+                            hp_pair_reserves1,
+                            hp_buy_gas_used,
+                            hp_sell_gas_used,
+                            hp_creation_time,
+                            hp_holder_count,
+                            hp_is_honeypot,
+                            hp_honeypot_reason,
+                            total_scans,
+                            honeypot_failures,
+                            last_error,
+                            removal_reason
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        failed_token[0],  # token_address
+                        clock.now().strftime('%Y-%m-%d %H:%M:%S'),  # removal_timestamp
+                        failed_token[1],  # original_scan_timestamp
+                        failed_token[2],  # token_name
+                        failed_token[3],  # token_symbol
+                        failed_token[4],  # token_decimals
+                        failed_token[5],  # token_total_supply
+                        failed_token[6],  # token_pair_address
+                        failed_token[7],  # token_age_hours
+                        failed_token[8],  # hp_simulation_success
+                        failed_token[9],  # hp_buy_tax
+                        failed_token[10], # hp_sell_tax
+                        failed_token[11], # hp_transfer_tax
+                        failed_token[12], # hp_liquidity_amount
+                        failed_token[13], # hp_pair_reserves0
+                        failed_token[14], # hp_pair_reserves1
+                        failed_token[15], # hp_buy_gas_used
+                        failed_token[16], # hp_sell_gas_used
+                        failed_token[17], # hp_creation_time
+                        failed_token[18], # hp_holder_count
+                        failed_token[19], # hp_is_honeypot
+                        failed_token[20], # hp_honeypot_reason
+                        failed_token[21], # total_scans
+                        failed_token[22], # honeypot_failures
+                        failed_token[23], # last_error
+                        f"Exceeded honeypot failure limit ({honeypot_failure_limit})"
+                    ))
+
+                    # Delete from scan_records
+                    error_cursor.execute('DELETE FROM scan_records WHERE token_address = ?', (token_address,))
+
+            await self.db.write(write)
+        except sqlite3.Error as db_error:
+            log_message(f"Failed to update error status in database: {str(db_error)}", "ERROR")
+        except Exception as unexpected_error:
+            log_message(f"Unexpected error updating error status: {str(unexpected_error)}", "ERROR")
 
-    def get_next_spinner(self):
-        """Get next spinner character and rotate index"""
-        char = self.spinner_chars[self.spinner_idx]
-        self.spinner_idx = (self.spinner_idx + 1) % len(self.spinner_chars)
-        return char
+    async def process_token(self, token_address: str, pair_address: str):
+        """Process a token by checking its honeypot status and other data
 
-    def get_rescan_status_table(self, current_time, last_rescan_time, rescan_interval):
-        """Create a table showing rescan status and countdown"""
-        status_table = Table(title="[bold cyan]Rescan Status", border_style="cyan", box=None)
-        status_table.add_column("Active Tokens", style="green")
-        status_table.add_column("Next Rescan In", style="yellow")
-        status_table.add_column("Last Rescan", style="blue")
-        
-        # Calculate time until next rescan
-        time_since_last = (current_time - last_rescan_time).total_seconds()
-        time_until_next = max(0, rescan_interval - time_since_last)
-        minutes = int(time_until_next // 60)
-        seconds = int(time_until_next % 60)
-        
-        # Get active token count
+        Runs the enrich, classify, persist and render stages back to back; the
+        main loop runs the same stages as a pipeline instead.
+        Returns a summary dict (age, liquidity, taxes, holders) on success, False on error.
+        """
         try:
-            db_path = os.path.join(self.folder_name, 'scan_records.db')
-            with sqlite3.connect(db_path) as db:
-                cursor = db.cursor()
-                cursor.execute('SELECT COUNT(*) FROM scan_records WHERE status = "active"')
-                active_count = cursor.fetchone()[0]
-                
-                # Get last scan info
-                cursor.execute('''
-                    SELECT token_address, scan_timestamp, total_scans 
-                    FROM scan_records 
-                    WHERE status = "active"
-                    ORDER BY scan_timestamp DESC
-                    LIMIT 1
-                ''')
-                last_scan = cursor.fetchone()
-                if last_scan:
-                    last_token = f"{last_scan[0][:8]}... (Scan #{last_scan[2]})"
-                    last_time = last_scan[1]
-                else:
-                    last_token = "None"
-                    last_time = "Never"
-                
-        except Exception:
-            active_count = "?"
-            last_token = "Error"
-            last_time = "Error"
-        
-        status_table.add_row(
-            f"{active_count} tokens",
-            f"{minutes:02d}:{seconds:02d}",
-            f"{last_token} at {last_time}"
-        )
-        
-        return status_table
+            scan = await self.enrich_token(token_address, pair_address)
+            self.classify_token(scan)
+            await self.persist_token(scan)
+            self.render_token(scan)
+            return scan['summary']
 
-    async def process_token_safe(self, token_address: str, pair_address: str):
-        """Process a token with semaphore to prevent parallel execution"""
-        async with self.process_semaphore:
-            await self.checker.process_token(token_address, pair_address)
+        except Exception as e:
+            error_message = str(e)
+            await self.record_scan_failure(token_address, error_message)
+            log_message(f"Error processing token {token_address}: {error_message}", "ERROR")
+            print("Full traceback:")
+            traceback.print_exc()
+            return False
 
-    def stop(self):
-        """Gracefully stop the main loop"""
-        self.running = False
+    def get_block_cursor(self, name: str = 'pair_created') -> Optional[int]:
+        """Get the last fully processed block for an ingester, None if never saved"""
+        with self.db.reader() as db:
+            cursor = db.cursor()
+            cursor.execute('SELECT last_block FROM ingest_cursor WHERE name = ?', (name,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def write_block_cursor(self, last_block: int, db, name: str = 'pair_created'):
+        """Persist the last fully processed block for an ingester (a SessionDB write)"""
+        cursor = db.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO ingest_cursor (name, last_block, updated_at)
+            VALUES (?, ?, ?)
+        ''', (name, last_block, clock.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+    def known_tokens(self, token_addresses: List[str]) -> Set[str]:
+        """Get the tokens already analyzed in this session (active, moved to HONEYPOTS or removed)
+
+        Runs on a worker thread, one query per KNOWN_TOKENS_BATCH addresses.
+        """
+        known = set()
+        with self.db.reader() as db:
+            cursor = db.cursor()
+            for i in range(0, len(token_addresses), KNOWN_TOKENS_BATCH):
+                batch = token_addresses[i:i + KNOWN_TOKENS_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                cursor.execute(f'''
+                    SELECT token_address FROM scan_records WHERE token_address IN ({placeholders})
+                    UNION
+                    SELECT token_address FROM HONEYPOTS WHERE token_address IN ({placeholders})
+                    UNION
+                    SELECT token_address FROM xHoneypot_removed WHERE token_address IN ({placeholders})
+                ''', batch * 3)
+                known.update(row[0] for row in cursor.fetchall())
+        return known
+
+    def get_active_tokens(self) -> List[Tuple[str, str]]:
+        """Get (token_address, pair_address) for all active tokens, least recently scanned first"""
+        with self.db.reader() as db:
+            cursor = db.cursor()
+            cursor.execute('''
+                SELECT token_address, pair_address
+                FROM scan_records 
+                WHERE status = 'active'
+                ORDER BY scan_timestamp ASC
+            ''')
+            return cursor.fetchall()
+
+    def get_rescan_state(self, token_address: str) -> Optional[Tuple[str, int]]:
+        """Get (status, total_scans) for a token, None if it left scan_records"""
+        with self.db.reader() as db:
+            cursor = db.cursor()
+            cursor.execute('SELECT status, total_scans FROM scan_records WHERE token_address = ?',
+                         (token_address,))
+            return cursor.fetchone()
 
-    async def main_loop(self):
-        """Main event loop with API tracking"""
-        print("\n=== Initializing Main Loop ===")
-        last_check_time = datetime.now()
-        last_rescan_time = datetime.now()
-        check_interval = 1  # seconds between new pair checks
-        rescan_interval = 60  # 1 minute
-        
-        if not self.event_filter:
-            print("Error: Event filter not initialized")
-            return
-        
-        # Create combined table container
-        combined_table = Table(show_header=False, border_style="bold white")
-        
-        # Create and add config table
-        config_table = Table(show_header=False, border_style="bold white", width=40)
-        config_table.add_column("Setting", style="cyan")
-        config_table.add_column("Value", style="green")
-        config_table.add_row("Check Interval", f"{check_interval} seconds")
-        config_table.add_row("Rescan Interval", f"{rescan_interval} seconds")
-        config_table.add_row("Max Rescans", str(self.config['scanning']['max_rescan_count']))
-        config_table.add_row("Honeypot Failure Limit", str(self.config['scanning']['honeypot_failure_limit']))
-        
-        # Create and add block table
-        block_table = Table(show_header=False, border_style="bold white", width=40)
-        block_table.add_column("Field", style="cyan")
-        block_table.add_column("Value", style="green")
-        
-        current_block = await self.tracker.web3.eth.block_number
-        start_block = max(current_block - 1000, 0)  # Look back 1000 blocks
-        
-        block_table.add_row("Current Block", str(current_block))
-        block_table.add_row("Start Block", str(start_block))
-        
-        # Add both tables to combined container
-        combined_table.add_row(config_table, block_table)
-        console.print(combined_table)
-        
+    def read_rescan_queue(self, liquidity=None) -> Tuple[List[tuple], Dict[str, float]]:
+        """Active tokens and their last hour's liquidity change (runs on a worker thread)"""
+        with self.db.reader() as db:
+            cursor = db.cursor()
+            cursor.execute('''
+                SELECT token_address, pair_address, total_scans, scan_timestamp,
+                       token_name, hp_liquidity_amount, gp_dex_info
+                FROM scan_records 
+                WHERE status = 'active'
+                ORDER BY scan_timestamp ASC
+            ''')
+            tokens = cursor.fetchall()
+        # Change over the last hour from the stored liquidity series, for every token in one read
+        hour_changes = liquidity.changes(3600) if liquidity and tokens else {}
+        return tokens, hour_changes
+
+    async def display_rescan_queue(self, scheduler, liquidity=None):
+        """Display active tokens with their next scheduled rescan and on-chain liquidity"""
         try:
-            # Process last few pairs before starting live monitoring
-            hours = float(input("\nEnter number of hours to scan back (e.g. 1): "))
-            print(f"\nScanning back {hours} hours...")
-            
-            # Calculate blocks to look back based on average block time (13 seconds for Ethereum)
-            blocks_per_hour = int(3600 / 13)  # ~277 blocks per hour
-            blocks_to_scan = int(blocks_per_hour * hours)
+            tokens, hour_changes = await asyncio.to_thread(self.read_rescan_queue, liquidity)
             
-            current_block = await self.tracker.web3.eth.block_number
-            start_block = max(current_block - blocks_to_scan, 0)
+            if not tokens:
+                log_message("No active tokens scheduled for rescan", "INFO")
+                return
             
-            print(f"Current block: {current_block}")
-            print(f"Start block: {start_block}")
-            print(f"Scanning {blocks_to_scan} blocks...")
-            
-            # Setup event filter for historical range
-            self.event_filter = await self.tracker.factory_contract.events.PairCreated.create_filter(
-                fromBlock=start_block,
-                toBlock=current_block
-            )
-            
-            # Get historical events
-            entries = await self.event_filter.get_all_entries()
+            print("\nRescan Queue:")
+            print("=" * 50)
+            rescan_table = Table(title="[bold yellow]RESCAN QUEUE", border_style="yellow")
+            rescan_table.add_column("Token Address", style="cyan")
+            rescan_table.add_column("Token Name", style="green")
+            rescan_table.add_column("Pair Address", style="magenta")
+            rescan_table.add_column("GoPlus Liquidity", style="blue")
+            rescan_table.add_column("Liquidity", style="red")
+            rescan_table.add_column("Liq 1h", style="red")
+            rescan_table.add_column("Scan #", style="yellow")
+            rescan_table.add_column("Last Scan", style="white")
+            rescan_table.add_column("Next Due", style="white")
             
-            # Filter entries to only include WETH pairs
-            weth_pairs = []
-            for entry in entries:
-                token0 = entry['args']['token0']
-                token1 = entry['args']['token1']
-                pair = entry['args']['pair']
+            for token_address, pair_address, total_scans, scan_timestamp, token_name, hp_liquidity, dex_json in tokens:
+                token_name = token_name or "Unknown"
+                # Reserves from Sync logs, the last honeypot.is figure until they are known
+                chain_liquidity = liquidity.liquidity_usd(token_address) if liquidity else None
+                if chain_liquidity is not None:
+                    pool_liquidity = f"${chain_liquidity:,.2f}"
+                else:
+                    pool_liquidity = f"${float(hp_liquidity):,.2f} (hp)" if hp_liquidity else "N/A"
+                change = hour_changes.get(token_address.lower())
+                hour_change = f"{change * 100:+.1f}%" if change is not None else "N/A"
                 
-                # Check if either token is WETH
-                if token0.lower() == self.tracker.weth_address.lower():
-                    weth_pairs.append((token1, pair))  # Store non-WETH token and pair
-                elif token1.lower() == self.tracker.weth_address.lower():
-                    weth_pairs.append((token0, pair))  # Store non-WETH token and pair
-            
-            # Process all WETH pairs found
-            print(f"\nFound {len(weth_pairs)} WETH pairs in the last {hours} hours")
-            
-            for i, (token_address, pair_address) in enumerate(weth_pairs, 1):
-                print(f"\n{'='*80}")
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Processing Historical Pair {i}/{len(weth_pairs)}")
-                print(f"Token: {token_address}")
-                print(f"Pair: {pair_address}")
-                print(f"{'='*80}\n")
+                # Parse GoPlus DEX info to get liquidity
+                goplus_liquidity = "N/A"
+                if dex_json:
+                    try:
+                        dex_info = json.loads(dex_json)
+                        if dex_info and isinstance(dex_info, list):
+                            # Sum up liquidity from all DEXes and multiply by 2
+                            total_liquidity = sum(float(dex.get('liquidity', 0)) for dex in dex_info) * 2
+                            goplus_liquidity = f"${total_liquidity:,.2f}"
+                    except (json.JSONDecodeError, ValueError):
+                        goplus_liquidity = "N/A"
                 
-                try:
-                    await self.process_token_safe(token_address, pair_address)
-                except Exception as e:
-                    print(f"Error processing historical token {token_address}: {str(e)}")
-                    continue
+                due_in = scheduler.due_in(token_address)
+                next_due = f"{max(0, int(due_in))}s" if due_in is not None else "In progress"
                 
-                # Add delay spinner between historical pairs
-                await self.delay_with_spinner(10, "Waiting before next historical pair")
-            
-            print("\nStarting live monitoring...")
-            
-            # Reset event filter for live monitoring
-            self.event_filter = await self.tracker.factory_contract.events.PairCreated.create_filter(fromBlock='latest')
+                rescan_table.add_row(
+                    token_address,
+                    token_name,
+                    pair_address,
+                    goplus_liquidity,
+                    pool_liquidity,
+                    hour_change,
+                    str(total_scans + 1),
+                    scan_timestamp,
+                    next_due
+                )
             
-            while self.running:
-                current_time = datetime.now()
-                
-                # Process rescans on interval
-                if (current_time - last_rescan_time).total_seconds() >= rescan_interval:
-                    print("\n") # Clear line before rescan output
-                    try:
-                        await self.checker.process_rescan_tokens()
-                    except Exception as e:
-                        print(f"Error during rescan: {str(e)}")
-                    last_rescan_time = current_time
-                    print("\nResuming monitoring...")
-                
-                # Check for new pairs on interval
-                if (current_time - last_check_time).total_seconds() >= check_interval:
-                    try:
-                        events = await self.event_filter.get_new_entries()
-                        
-                        if events:
-                            print(f"\nFound {len(events)} new pair(s)")
-                            for event in events:
-                                token0 = event['args']['token0']
-                                token1 = event['args']['token1']
-                                pair = event['args']['pair']
-                                
-                                # Only process the non-WETH token
-                                token_to_process = None
-                                if token0.lower() == self.tracker.weth_address.lower():
-                                    token_to_process = token1
-                                elif token1.lower() == self.tracker.weth_address.lower():
-                                    token_to_process = token0
-                                
-                                if token_to_process:
-                                    try:
-                                        await self.process_token_safe(token_to_process, pair)
-                                    except Exception as e:
-                                        print(f"Error processing new token {token_to_process}: {str(e)}")
-                                        continue
-                                    
-                                    # Add delay spinner between new pairs
-                                    await self.delay_with_spinner(30, "Waiting before next pair")
-                                    
-                        else:
-                            # Calculate time until next rescan
-                            time_since_last_rescan = (current_time - last_rescan_time).total_seconds()
-                            time_until_next_rescan = max(0, rescan_interval - time_since_last_rescan)
-                            minutes = int(time_until_next_rescan // 60)
-                            seconds = int(time_until_next_rescan % 60)
-                            
-                            # Update spinner with both monitoring status and rescan countdown
-                            print(f"\r{self.get_next_spinner()} Monitoring for new pairs... (Next rescan in {minutes:02d}:{seconds:02d}) ", end="", flush=True)
-                            
-                        last_check_time = current_time
-                        
-                    except Exception as e:
-                        print(f"\nError checking for new pairs: {str(e)}")
-                        await self.delay_with_spinner(5, "Waiting before retry")
-                    
-                # Small sleep to prevent CPU overuse
-                await asyncio.sleep(0.05)
+            console.print(rescan_table)
                 
-        except asyncio.CancelledError:
-            print("\n=== Main Loop Cancelled ===")
-            print("Shutting down gracefully...")
         except Exception as e:
-            print("\n=== Main Loop Fatal Error ===")
-            print(f"Error: {str(e)}")
-            print("Full traceback:")
+            log_message(f"Error in display_rescan_queue: {str(e)}", "ERROR")
+            print("\nFull traceback:")
             traceback.print_exc()
-        finally:
-            self.running = False
-            await api_wrapper.close()
-            print("\n=== Main Loop Stopped ===")
-            print(f"Final time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            # Print final stats
-            api_tracker.print_stats()
-
-    async def delay_with_spinner(self, seconds: int, message: str):
-        """Show a countdown spinner while delaying"""
-        start_time = time.time()
-        while time.time() - start_time < seconds:
-            remaining = int(seconds - (time.time() - start_time))
-            spinner = self.get_next_spinner()
-            print(f"\r{spinner} {message} ({remaining}s remaining)... ", end="", flush=True)
-            await asyncio.sleep(0.1)
-        print("\r" + " " * 100 + "\r", end="", flush=True)  # Clear the line
 
     async def check_and_move_honeypot(self, token_address: str, token_age_hours: float, is_honeypot: bool):
         """Check if token meets honeypot criteria and move it if necessary"""
         if token_age_hours > 1.0 and is_honeypot:
-            db_path = os.path.join(self.folder_name, 'scan_records.db')
             try:
-                with sqlite3.connect(db_path) as db:
+                def write(db):
                     cursor = db.cursor()
                     
                     # Get token data
@@ -1974,7 +1593,7 @@ class TokenChecker:
                             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         ''', (
                             token_address,
-                            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                            clock.now().strftime('%Y-%m-%d %H:%M:%S'),
                             token_data[0],  # original_scan_timestamp
                             token_data[1],  # token_name
                             token_data[2],  # token_symbol
@@ -2003,10 +1622,12 @@ class TokenChecker:
                         
                         # Delete from scan_records
                         cursor.execute('DELETE FROM scan_records WHERE token_address = ?', (token_address,))
-                        db.commit()
-                        
-                        print(f"\nMoved token {token_address} to HONEYPOTS table (Age: {token_age_hours:.2f} hours)")
                         return True
+                    return False
+
+                if await self.db.write(write):
+                    print(f"\nMoved token {token_address} to HONEYPOTS table (Age: {token_age_hours:.2f} hours)")
+                    return True
             except sqlite3.Error as e:
                 print(f"Database error moving honeypot: {str(e)}")
             except Exception as e:
@@ -2034,8 +1655,9 @@ def load_config(config_path):
             "max_rescan_count": 1000,
             "remove_after_max_scans": True,
             "honeypot_failure_limit": 5,
-            "liquidity_multiplier": 1
+            "analysis_workers": 4
         }
+        scanning_defaults.update(CADENCE_DEFAULTS)
         
         for key, default_value in scanning_defaults.items():
             if key not in config['scanning']:
@@ -2080,8 +1702,12 @@ class TokenTrackerMain:
         print(f"Selected folder name: {folder_name}")
         self.folder_name = folder_name
         self.config = load_config(config_file)
+        rate_limiter.configure(self.config.get('rate_limits'))
+        api_wrapper.configure_goplus_batching(self.config.get('goplus_batch'))
+        api_wrapper.cache.configure(self.config.get('api_cache'))
+        api_tracker.configure_log(self.config.get('api_log'))
         self.tracker = TokenTracker(config_file)  # Pass config file path instead of config dict
-        self.checker = TokenChecker(self.tracker, self.folder_name)
+        self.checker = TokenChecker(self.tracker, self.folder_name, self.config.get('session_db'))
         
         # Initialize state variables
         self.running = True
@@ -2092,8 +1718,16 @@ class TokenTrackerMain:
         self.spinner_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
         self.spinner_idx = 0
         
-        # Add semaphore to prevent parallel processing
-        self.process_semaphore = asyncio.Semaphore(1)
+        # Scheduler handing new pairs and due rescans to the analysis pipeline
+        self.scheduler = ScanScheduler()
+        self.cadence = RescanCadence(self.config['scanning'])
+        self.pipeline = None
+        
+        # On-chain reserves of active pairs, followed from Sync logs
+        self.liquidity = LiquidityTracker(self.tracker, self.checker.db, self.config.get('liquidity'))
+        
+        # Rescans moved forward by on-chain activity, with a slow time-based fallback
+        self.activity = ActivityWatcher(self.scheduler, self.liquidity, self.config.get('activity'))
         
         # Add last stats print time tracking
         self.last_stats_print = datetime.now()
@@ -2101,22 +1735,26 @@ class TokenTrackerMain:
         # Initialize latest pair
         self.initialize_latest_pair()
         
-        # Initialize event filter as None, will be set up in async init
-        self.event_filter = None
+        # Initialize pair ingester as None, will be set up in async init
+        self.ingester = None
+        self.saved_block = None
+        
+        # Optional Prometheus endpoint, started in main_loop
+        self.metrics_server = None
         
         # Initialize key manager first
         self.key_manager = InfuraKeyManager()
         self.key_manager.initialize(
             infura_keys=self.config['infura_keys'],
             key_rotation_interval=int(self.config['key_rotation_interval']),
-            key_swap_sleep_time=int(self.config['key_swap_sleep_time'])
+            key_swap_sleep_time=int(self.config['key_swap_sleep_time']),
+            settings=self.config.get('key_pool')
         )
 
     def initialize_latest_pair(self):
         """Initialize latest pair from database"""
         try:
-            db_path = os.path.join(self.folder_name, 'scan_records.db')
-            with sqlite3.connect(db_path) as db:
+            with self.checker.db.reader() as db:
                 cursor = db.cursor()
                 # Get the most recent pair
                 cursor.execute('''
@@ -2154,23 +1792,20 @@ class TokenTrackerMain:
 
     async def async_init(self):
         """Async initialization tasks"""
-        await self.setup_event_filter()
+        await self.setup_pair_ingester()
 
-    async def setup_event_filter(self):
-        """Setup event filter for new pairs"""
+    async def setup_pair_ingester(self):
+        """Setup the eth_getLogs ingester for new pairs"""
         try:
-            print("Setting up Uniswap event filter...")
-            # Create filter looking back more blocks to ensure we find pairs
-            current_block = await self.tracker.web3.eth.block_number
-            # Look back 1000 blocks to ensure we find some pairs
+            print("Setting up Uniswap PairCreated ingester...")
+            self.ingester = PairCreatedIngester(self.tracker)
+            current_block = await self.ingester.get_head()
+            # Look back 1000 blocks to verify log queries return pairs
             start_block = max(current_block - 1000, 0)
-            self.event_filter = await self.tracker.factory_contract.events.PairCreated.create_filter(fromBlock=start_block)
-            print("Event filter setup successfully")
             
-            # Verify filter is working by getting entries
             try:
-                entries = await self.event_filter.get_all_entries()
-                print(f"Event filter verified working - found {len(entries)} historical entries")
+                entries = await self.ingester.fetch_range(start_block, current_block)
+                print(f"Pair ingester verified working - found {len(entries)} historical entries")
                 
                 if len(entries) > 0:
                     # Show some info about the entries found
@@ -2178,12 +1813,11 @@ class TokenTrackerMain:
                     print(f"Block range searched: {start_block} to {current_block}")
                 
             except Exception as e:
-                print(f"Warning: Could not verify filter: {str(e)}")
+                print(f"Warning: Could not verify pair ingester: {str(e)}")
                 
         except Exception as e:
-            print(f"Error setting up event filter: {str(e)}")
+            print(f"Error setting up pair ingester: {str(e)}")
             print("Full traceback:")
-            import traceback
             traceback.print_exc()
             raise
 
@@ -2218,8 +1852,7 @@ class TokenTrackerMain:
         
         # Get active token count
         try:
-            db_path = os.path.join(self.folder_name, 'scan_records.db')
-            with sqlite3.connect(db_path) as db:
+            with self.checker.db.reader() as db:
                 cursor = db.cursor()
                 cursor.execute('SELECT COUNT(*) FROM scan_records WHERE status = "active"')
                 active_count = cursor.fetchone()[0]
@@ -2253,10 +1886,194 @@ class TokenTrackerMain:
         
         return status_table
 
-    async def process_token_safe(self, token_address: str, pair_address: str):
-        """Process a token with semaphore to prevent parallel execution"""
-        async with self.process_semaphore:
-            await self.checker.process_token(token_address, pair_address)
+    async def enqueue_pair_events(self, events: List[Dict]) -> int:
+        """Queue the tokens of WETH PairCreated events for analysis ahead of pending rescans.
+
+        Tokens already in this session's database are skipped without any API
+        calls; they are looked up in one query on a worker thread.
+
+        Returns:
+            Number of tokens queued
+        """
+        weth_pairs = []
+        for event in events:
+            weth_pair = self.ingester.extract_weth_pair(event)
+            if weth_pair:
+                weth_pairs.append((weth_pair, event['blockNumber']))
+        if not weth_pairs:
+            return 0
+        known = await asyncio.to_thread(self.checker.known_tokens,
+                                        [token_address for (token_address, _), _ in weth_pairs])
+        queued = 0
+        for (token_address, pair_address), block_number in weth_pairs:
+            if token_address in known:
+                continue
+            if not self.scheduler.add_new(token_address, pair_address, block_number):
+                continue
+            self.ingester.track(block_number)
+            queued += 1
+        return queued
+
+    def save_block_cursor(self):
+        """Persist the last block whose pairs have all been analyzed"""
+        committed_block = self.ingester.committed_block()
+        if committed_block is None or committed_block == self.saved_block:
+            return
+        self.checker.db.submit(partial(self.checker.write_block_cursor, committed_block))
+        self.saved_block = committed_block
+
+    async def load_rescan_schedule(self) -> List[Tuple[str, str]]:
+        """Seed the scheduler with active tokens, spread over one rescan interval
+
+        Returns:
+            The active (token_address, pair_address) pairs, empty on error
+        """
+        tokens = []
+        try:
+            tokens = await asyncio.to_thread(self.checker.get_active_tokens)
+            self.scheduler.seed_rescans(tokens, self.config['scanning']['rescan_interval'])
+            print(f"Scheduled {len(tokens)} active tokens for rescan")
+        except Exception as e:
+            print(f"Error loading rescan schedule: {str(e)}")
+        return tokens
+
+    async def reschedule_token(self, token_address: str, pair_address: str, token_age_hours: Optional[float] = None):
+        """Schedule the next rescan of a token if it is still active"""
+        state = await asyncio.to_thread(self.checker.get_rescan_state, token_address)
+        if not state:
+            self.scheduler.remove(token_address)  # moved to HONEYPOTS or removed
+            self.cadence.forget(token_address)
+            self.activity.forget(token_address)
+            self.liquidity.remove_pair(token_address)
+            return
+        status, total_scans = state
+        if status != 'active' or total_scans >= self.config['scanning']['max_rescan_count']:
+            self.scheduler.remove(token_address)
+            self.cadence.forget(token_address)
+            self.activity.forget(token_address)
+            self.liquidity.remove_pair(token_address)
+            return
+        self.liquidity.add_pair(token_address, pair_address)
+        interval = self.activity.rescan_interval(token_address,
+                                                 self.cadence.next_interval(token_address, token_age_hours),
+                                                 self.cadence.is_quiet(token_address))
+        self.scheduler.schedule_rescan(token_address, pair_address, interval)
+
+    def start_pipeline(self):
+        """Start the discover -> enrich -> classify -> persist -> render pipeline.
+
+        Stages are connected by bounded queues, so a slow stage makes the ones
+        in front of it wait rather than piling up work. Block polling only
+        feeds the scheduler and never waits on the pipeline; the discover stage
+        pulls the next job from the scheduler when there is room for it.
+        """
+        settings = dict(PIPELINE_DEFAULTS)
+        settings.update(self.config.get('pipeline', {}))
+        queue_size = settings['queue_size']
+        enrich_workers = max(1, int(self.config['scanning']['analysis_workers']))
+
+        self.pipeline = Pipeline(self.complete_scan, self.fail_scan)
+        self.pipeline.add_stage("discover", self.discover_stage, 1, queue_size)
+        self.pipeline.add_stage("enrich", self.enrich_stage, enrich_workers, queue_size)
+        self.pipeline.add_stage("classify", self.classify_stage, settings['classify_workers'], queue_size)
+        self.pipeline.add_stage("persist", self.persist_stage, settings['persist_workers'], queue_size)
+        self.pipeline.add_stage("render", self.render_stage, settings['render_workers'], queue_size)
+        self.pipeline.add_source(self.next_scan)
+        self.pipeline.start()
+        print(f"Started analysis pipeline with {enrich_workers} enrich workers")
+
+    async def stop_pipeline(self):
+        """Cancel the pipeline workers and wait for them to exit"""
+        if self.pipeline:
+            await self.pipeline.stop()
+
+    async def next_scan(self) -> Dict:
+        """Wait for the scheduler's next job and wrap it for the pipeline"""
+        job = await self.scheduler.get()
+        return {'job': job, 'token_address': job.token_address, 'pair_address': job.pair_address}
+
+    async def discover_stage(self, scan: Dict) -> Dict:
+        """Announce a job entering analysis"""
+        kind = "new pair" if scan['job'].priority == PRIORITY_NEW else "rescan"
+        print(f"\nScanning {scan['token_address']} ({kind})")
+        return scan
+
+    async def enrich_stage(self, scan: Dict) -> Dict:
+        """Fetch API data for the token; the shared rate limiter paces concurrent workers"""
+        scan.update(await self.checker.enrich_token(scan['token_address'], scan['pair_address']))
+        return scan
+
+    async def classify_stage(self, scan: Dict) -> Dict:
+        """Interpret the API data"""
+        return self.checker.classify_token(scan)
+
+    async def persist_stage(self, scan: Dict) -> Dict:
+        """Write the scan to the session database"""
+        return await self.checker.persist_token(scan)
+
+    async def render_stage(self, scan: Dict) -> Dict:
+        """Print the scan's analysis tables"""
+        return self.checker.render_token(scan)
+
+    async def fail_scan(self, scan: Dict, error: Exception):
+        """Record a scan that failed in any stage"""
+        token_address = scan['token_address']
+        error_message = str(error)
+        await self.checker.record_scan_failure(token_address, error_message)
+        log_message(f"Error processing token {token_address}: {error_message}", "ERROR")
+        print("Full traceback:")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    async def complete_scan(self, scan: Dict, ok: bool):
+        """Release a job that left the pipeline, advance the block cursor and schedule its rescan"""
+        job = scan['job']
+        self.scheduler.done(job.token_address)
+        if job.block_number is not None:
+            self.ingester.complete(job.block_number)
+            self.save_block_cursor()
+
+        self.activity.scanned(job.token_address)
+        summary = scan.get('summary') if ok else None
+        token_age_hours = None
+        if summary:
+            token_age_hours = summary['token_age_hours']
+            liquidity = self.liquidity.liquidity_usd(job.token_address)
+            if liquidity is None:
+                liquidity = summary['liquidity']
+            self.cadence.observe(job.token_address, liquidity, summary['buy_tax'],
+                                 summary['sell_tax'], summary['holders'])
+        try:
+            await self.reschedule_token(job.token_address, job.pair_address, token_age_hours)
+        except Exception as e:
+            print(f"Error rescheduling token {job.token_address}: {str(e)}")
+
+    async def start_liquidity_tracking(self, tokens: List[Tuple[str, str]], head: int):
+        """Seed reserves of the given active pairs and start following their Sync logs"""
+        try:
+            await self.liquidity.start(tokens, head)
+        except Exception as e:
+            print(f"Error starting liquidity tracking: {str(e)}")
+
+    async def poll_activity(self):
+        """Apply pair and token activity up to the block the pair ingester has reached"""
+        try:
+            triggered = await self.activity.poll(self.ingester.last_block)
+            if triggered:
+                print(f"\nOn-chain activity moved {triggered} rescan(s) forward")
+        except Exception as e:
+            print(f"\nError polling on-chain activity: {str(e)}")
+
+    async def start_metrics_server(self):
+        """Start the Prometheus metrics endpoint if enabled in config"""
+        settings = self.config.get('metrics', {})
+        if not settings.get('enabled'):
+            return
+        try:
+            self.metrics_server = MetricsServer(self, settings)
+            await self.metrics_server.start()
+        except Exception as e:
+            print(f"Error starting metrics server: {str(e)}")
+            self.metrics_server = None
 
     def stop(self):
         """Gracefully stop the main loop"""
@@ -2267,11 +2084,12 @@ class TokenTrackerMain:
         print("\n=== Initializing Main Loop ===")
         last_check_time = datetime.now()
         last_rescan_time = datetime.now()
-        check_interval = 1  # seconds between new pair checks
+        check_interval = self.ingester.min_poll_interval if self.ingester else 1  # seconds between head checks
         rescan_interval = self.config['scanning']['rescan_interval']  # Get from config
+        worker_count = max(1, int(self.config['scanning']['analysis_workers']))
         
-        if not self.event_filter:
-            print("Error: Event filter not initialized")
+        if not self.ingester:
+            print("Error: Pair ingester not initialized")
             return
         
         # Create combined table container
@@ -2282,139 +2100,97 @@ class TokenTrackerMain:
         config_table.add_column("Setting", style="cyan")
         config_table.add_column("Value", style="green")
         config_table.add_row("Check Interval", f"{check_interval} seconds")
-        config_table.add_row("Rescan Interval", f"{rescan_interval} seconds")
+        config_table.add_row("Rescan Interval", f"{rescan_interval} seconds "
+                             f"(adaptive {self.cadence.min_interval:g}-{self.cadence.max_interval:g})")
         config_table.add_row("Max Rescans", str(self.config['scanning']['max_rescan_count']))
         config_table.add_row("Honeypot Failure Limit", str(self.config['scanning']['honeypot_failure_limit']))
+        config_table.add_row("Analysis Workers", str(worker_count))
         
         # Create and add block table
         block_table = Table(show_header=False, border_style="bold white", width=40)
         block_table.add_column("Field", style="cyan")
         block_table.add_column("Value", style="green")
         
-        current_block = await self.tracker.web3.eth.block_number
-        start_block = max(current_block - 1000, 0)  # Look back 1000 blocks
+        current_block = await self.ingester.get_head()
+        self.saved_block = self.checker.get_block_cursor()
         
         block_table.add_row("Current Block", str(current_block))
-        block_table.add_row("Start Block", str(start_block))
+        block_table.add_row("Resume Block", str(self.saved_block + 1) if self.saved_block is not None else "New session")
         
         # Add both tables to combined container
         combined_table.add_row(config_table, block_table)
         console.print(combined_table)
         
         try:
-            # Process last few pairs before starting live monitoring
-            hours = float(input("\nEnter number of hours to scan back (e.g. 1): "))
-            print(f"\nScanning back {hours} hours...")
-            
-            # Calculate blocks to look back based on average block time (13 seconds for Ethereum)
-            blocks_per_hour = int(3600 / 13)  # ~277 blocks per hour
-            blocks_to_scan = int(blocks_per_hour * hours)
-            
-            current_block = await self.tracker.web3.eth.block_number
-            start_block = max(current_block - blocks_to_scan, 0)
+            if self.saved_block is not None:
+                # Resume exactly after the last fully processed block
+                start_block = self.saved_block + 1
+                print(f"\nResuming from block {start_block} ({max(0, current_block - self.saved_block)} blocks behind head)")
+            else:
+                # New session: ask how far back to look for pairs
+                hours = float(input("\nEnter number of hours to scan back (e.g. 1): "))
+                print(f"\nScanning back {hours} hours...")
+                blocks_to_scan = int(hours * 3600 / SECONDS_PER_BLOCK)
+                start_block = max(current_block - blocks_to_scan, 0)
             
             print(f"Current block: {current_block}")
             print(f"Start block: {start_block}")
-            print(f"Scanning {blocks_to_scan} blocks...")
             
-            # Setup event filter for historical range
-            self.event_filter = await self.tracker.factory_contract.events.PairCreated.create_filter(
-                fromBlock=start_block,
-                toBlock=current_block
-            )
-            
-            # Get historical events
-            entries = await self.event_filter.get_all_entries()
-            
-            # Filter entries to only include WETH pairs
-            weth_pairs = []
-            for entry in entries:
-                token0 = entry['args']['token0']
-                token1 = entry['args']['token1']
-                pair = entry['args']['pair']
-                
-                # Check if either token is WETH
-                if token0.lower() == self.tracker.weth_address.lower():
-                    weth_pairs.append((token1, pair))  # Store non-WETH token and pair
-                elif token1.lower() == self.tracker.weth_address.lower():
-                    weth_pairs.append((token0, pair))  # Store non-WETH token and pair
+            active_tokens = await self.load_rescan_schedule()
+            await self.start_liquidity_tracking(active_tokens, current_block)
+            self.start_pipeline()
+            await self.start_metrics_server()
             
-            # Process all WETH pairs found
-            print(f"\nFound {len(weth_pairs)} WETH pairs in the last {hours} hours")
+            # Backfill historical events up to the head across all RPC endpoints,
+            # queueing new WETH pairs for analysis as each chunk arrives
+            queued = 0
+            async def queue_events(events):
+                nonlocal queued
+                queued += await self.enqueue_pair_events(events)
+                self.save_block_cursor()
             
-            for i, (token_address, pair_address) in enumerate(weth_pairs, 1):
-                print(f"\n{'='*80}")
-                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Processing Historical Pair {i}/{len(weth_pairs)}")
-                print(f"Token: {token_address}")
-                print(f"Pair: {pair_address}")
-                print(f"{'='*80}\n")
-                
-                try:
-                    await self.process_token_safe(token_address, pair_address)
-                except Exception as e:
-                    print(f"Error processing historical token {token_address}: {str(e)}")
-                    continue
-                
-                # Add delay spinner between historical pairs
-                await self.delay_with_spinner(10, "Waiting before next historical pair")
+            backfill = PairBackfill(self.ingester, self.tracker.pinned_clients(), self.config.get('backfill'))
+            found = await backfill.run(start_block, current_block, queue_events)
+            print(f"Found {found} pairs, queued {queued} new WETH pairs for analysis")
+            self.save_block_cursor()
             
             print("\nStarting live monitoring...")
             
-            # Reset event filter for live monitoring
-            self.event_filter = await self.tracker.factory_contract.events.PairCreated.create_filter(fromBlock='latest')
-            
             while self.running:
                 current_time = datetime.now()
                 
-                # Process rescans on interval
+                # Rescans are handed to the pipeline by the scheduler as they
+                # fall due; just show the queue on interval
                 if (current_time - last_rescan_time).total_seconds() >= rescan_interval:
                     print("\n") # Clear line before rescan output
-                    try:
-                        await self.checker.process_rescan_tokens()
-                    except Exception as e:
-                        print(f"Error during rescan: {str(e)}")
+                    await self.checker.display_rescan_queue(self.scheduler, self.liquidity)
+                    self.pipeline.print_stats()
                     last_rescan_time = current_time
                     print("\nResuming monitoring...")
                 
-                # Check for new pairs on interval
-                if (current_time - last_check_time).total_seconds() >= check_interval:
+                # Check for new blocks; after a new block the ingester waits
+                # most of a block time before checking the head again
+                if (current_time - last_check_time).total_seconds() >= self.ingester.poll_delay:
                     try:
-                        events = await self.event_filter.get_new_entries()
+                        events = await self.ingester.poll()
                         
                         if events:
                             print(f"\nFound {len(events)} new pair(s)")
-                            for event in events:
-                                token0 = event['args']['token0']
-                                token1 = event['args']['token1']
-                                pair = event['args']['pair']
-                                
-                                # Only process the non-WETH token
-                                token_to_process = None
-                                if token0.lower() == self.tracker.weth_address.lower():
-                                    token_to_process = token1
-                                elif token1.lower() == self.tracker.weth_address.lower():
-                                    token_to_process = token0
-                                
-                                if token_to_process:
-                                    try:
-                                        await self.process_token_safe(token_to_process, pair)
-                                    except Exception as e:
-                                        print(f"Error processing new token {token_to_process}: {str(e)}")
-                                        continue
-                                    
-                                    # Add delay spinner between new pairs
-                                    await self.delay_with_spinner(30, "Waiting before next pair")
+                            # Only process the non-WETH token
+                            await self.enqueue_pair_events(events)
                                     
+                            print(f"New pairs queued: {self.scheduler.pending_new}")
                         else:
                             # Calculate time until next rescan
-                            time_since_last_rescan = (current_time - last_rescan_time).total_seconds()
-                            time_until_next_rescan = max(0, rescan_interval - time_since_last_rescan)
+                            time_until_next_rescan = max(0, self.scheduler.next_due_in() or 0)
                             minutes = int(time_until_next_rescan // 60)
                             seconds = int(time_until_next_rescan % 60)
                             
                             # Update spinner with both monitoring status and rescan countdown
                             print(f"\r{self.get_next_spinner()} Monitoring for new pairs... (Next rescan in {minutes:02d}:{seconds:02d}) ", end="", flush=True)
                             
+                        await self.poll_activity()
+                        self.save_block_cursor()
                         last_check_time = current_time
                         
                     except Exception as e:
@@ -2434,11 +2210,28 @@ class TokenTrackerMain:
             traceback.print_exc()
         finally:
             self.running = False
+            await self.stop_pipeline()
+            if self.metrics_server:
+                await self.metrics_server.stop()
             await api_wrapper.close()
+            await api_tracker.close()
+            await self.tracker.router.close()
+            await self.key_manager.close()
+            await self.checker.db.drain()
+            self.checker.db.close()
             print("\n=== Main Loop Stopped ===")
             print(f"Final time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             # Print final stats
             api_tracker.print_stats()
+            rate_limiter.print_stats()
+            self.activity.print_stats()
+            self.tracker.router.print_stats()
+            self.key_manager.print_stats()
+            api_wrapper.print_stats()
+            if self.pipeline:
+                self.pipeline.print_stats()
+            writes = self.checker.scan_writes
+            print(f"Scan writes: {writes['new']} new, {writes['changed']} changed, {writes['unchanged']} unchanged")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
+import asyncio
 import json
-from web3 import AsyncWeb3, AsyncHTTPProvider
-from dataclasses import dataclass
-from typing import List, Optional
+from web3 import AsyncWeb3, Web3
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, List, Optional
 import logging
 import time
 import threading
@@ -9,6 +11,13 @@ from datetime import datetime, timedelta
 import os
 import sqlite3
 from key_manager import InfuraKeyManager
+from rate_limiter import rate_limiter
+from rpc_router import RPCRouter, RPCRouterProvider
+from multicall import Multicall, get_pair_call, get_reserves_call, token_metadata_calls
+
+# Retries of a batched read that keeps hitting rate limits, waiting RATE_LIMIT_BACKOFF * 2**n seconds between them
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 1.0
 
 @dataclass
 class TokenTrackerConfig:
@@ -27,6 +36,8 @@ class TokenTrackerConfig:
     maximum_sell_tax: int
     max_honeypot_failures: int
     buy_amount: float
+    key_pool: Dict = field(default_factory=dict)
+    rpc_router: Dict = field(default_factory=dict)
 
 class TokenTracker:
     def __init__(self, config_path: str):
@@ -35,9 +46,12 @@ class TokenTracker:
         self.key_manager.initialize(
             infura_keys=self.config.infura_keys,
             key_rotation_interval=self.config.key_rotation_interval,
-            key_swap_sleep_time=self.config.key_swap_sleep_time
+            key_swap_sleep_time=self.config.key_swap_sleep_time,
+            settings=self.config.key_pool
         )
-        self.web3 = AsyncWeb3(AsyncHTTPProvider(self.key_manager.get_current_rpc_url()))
+        self.setup_router()
+        self.web3 = AsyncWeb3(RPCRouterProvider(self.router))
+        self.multicall = Multicall(self.web3, self.router)
         self.setup_logging()
         self.load_abis()
         self.setup_contracts()
@@ -65,7 +79,23 @@ class TokenTracker:
                 maximum_buy_tax=int(config_data['maximum_buy_tax']),
                 maximum_sell_tax=int(config_data['maximum_sell_tax']),
                 max_honeypot_failures=int(config_data['max_honeypot_failures']),
-                buy_amount=float(config_data['buy_amount'])
+                buy_amount=float(config_data['buy_amount']),
+                key_pool=config_data.get('key_pool') or {},
+                rpc_router=config_data.get('rpc_router') or {}
+            )
+
+    def setup_router(self):
+        """Route RPC requests across node_rpc and every Infura key"""
+        self.router = RPCRouter(self.config.rpc_router)
+        key_urls = {key.url for key in self.key_manager.keys}
+        if self.config.node_rpc and self.config.node_rpc not in key_urls:
+            self.router.add_endpoint("node_rpc", self.config.node_rpc)
+        for index, key in enumerate(self.key_manager.keys):
+            self.router.add_endpoint(
+                f"infura-{index}", key.url,
+                send=partial(self.key_manager.send, key),
+                available=partial(self.key_manager.is_available, key),
+                send_batch=partial(self.key_manager.send_batch, key)
             )
 
     def setup_logging(self):
@@ -101,70 +131,123 @@ class TokenTracker:
             abi=self.uniswap_router_abi
         )
 
+    def pinned_clients(self) -> List[AsyncWeb3]:
+        """One client per router endpoint, each sending to its endpoint first"""
+        return [AsyncWeb3(RPCRouterProvider(self.router, endpoint)) for endpoint in self.router.endpoints]
+
     def _get_current_rpc_url(self) -> str:
         """Get the current Infura RPC URL with the current key"""
         return self.key_manager.get_current_rpc_url()
 
     def rotate_key(self) -> None:
-        """Rotate to the next Infura API key"""
+        """Put the current Infura key on cooldown so requests move to the others"""
         self.key_manager.rotate_key()
-        self.web3 = AsyncWeb3(AsyncHTTPProvider(self._get_current_rpc_url()))
 
     def check_and_rotate_key(self) -> None:
-        """Check if it's time to rotate the key and do so if needed"""
+        """Roll key quotas over if a new day started"""
         self.key_manager.check_and_rotate_key()
-        self.web3 = AsyncWeb3(AsyncHTTPProvider(self._get_current_rpc_url()))
 
     async def get_pair_info(self, token_address: str) -> Optional[dict]:
         """Get pair information for a token"""
-        try:
-            self.check_and_rotate_key()  # Check if we need to rotate keys
-            pair_address = await self.factory_contract.functions.getPair(
-                token_address,
-                self.weth_address
-            ).call()
-            
-            if pair_address == '0x0000000000000000000000000000000000000000':
-                return None
-                
-            pair_contract = self.web3.eth.contract(
-                address=pair_address,
-                abi=self.liquidity_pool_abi
-            )
-            
-            reserves = await pair_contract.functions.getReserves().call()
-            
-            return {
-                'pair_address': pair_address,
-                'reserves': reserves
-            }
-            
-        except Exception as e:
-            if "429" in str(e):  # If we hit rate limit, force rotate key
-                self.rotate_key()
-                return await self.get_pair_info(token_address)  # Retry with new key
-            self.logger.error(f"Error getting pair info: {str(e)}")
-            return None
+        return (await self.get_pairs_info([token_address]))[token_address]
+
+    async def get_pairs_info(self, token_addresses: List[str],
+                             block_identifier: Optional[int] = None) -> Dict[str, Optional[dict]]:
+        """
+        Get WETH pair address and reserves for many tokens with two multicalls
+
+        Args:
+            token_addresses: Tokens to look up
+            block_identifier: Block to read at, defaults to the current head
+
+        Returns:
+            Mapping of token address to {'pair_address', 'reserves'}, None if
+            the token has no WETH pair or the reads failed
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                return await self.read_pairs_info(token_addresses, block_identifier)
+            except Exception as e:
+                if InfuraKeyManager.is_rate_limited(e) and attempt < RATE_LIMIT_RETRIES:
+                    await asyncio.sleep(RATE_LIMIT_BACKOFF * 2 ** attempt)
+                    continue
+                self.logger.error(f"Error getting pair info: {str(e)}")
+                return {token: None for token in token_addresses}
+
+    async def read_pairs_info(self, token_addresses: List[str],
+                              block_identifier: Optional[int]) -> Dict[str, Optional[dict]]:
+        """One attempt of get_pairs_info"""
+        self.check_and_rotate_key()  # Check if we need to rotate keys
+        if block_identifier is None:
+            await rate_limiter.acquire("infura")
+            block_identifier = await self.web3.eth.block_number
+
+        pairs = await self.multicall.execute(
+            [get_pair_call(self.uniswap_factory_address, token, self.weth_address) for token in token_addresses],
+            block_identifier
+        )
+        pair_addresses = {
+            token: result[0] for token, result in zip(token_addresses, pairs)
+            if result and int(result[0], 16) != 0
+        }
+        reserves = await self.multicall.execute(
+            [get_reserves_call(pair) for pair in pair_addresses.values()], block_identifier
+        )
+        reserves_by_token = dict(zip(pair_addresses, reserves))
+
+        results = {}
+        for token in token_addresses:
+            pair_reserves = reserves_by_token.get(token)
+            results[token] = {
+                'pair_address': Web3.to_checksum_address(pair_addresses[token]),
+                'reserves': list(pair_reserves)
+            } if pair_reserves else None
+        return results
 
     async def check_token_contract(self, token_address: str) -> Optional[dict]:
         """Check token contract information"""
-        try:
-            self.check_and_rotate_key()  # Check if we need to rotate keys
-            token_contract = self.web3.eth.contract(
-                address=token_address,
-                abi=self.token_contract_abi
-            )
-            
-            return {
-                'name': await token_contract.functions.name().call(),
-                'symbol': await token_contract.functions.symbol().call(),
-                'decimals': await token_contract.functions.decimals().call(),
-                'total_supply': await token_contract.functions.totalSupply().call()
+        return (await self.check_token_contracts([token_address]))[token_address]
+
+    async def check_token_contracts(self, token_addresses: List[str],
+                                    block_identifier: Optional[int] = None) -> Dict[str, Optional[dict]]:
+        """
+        Read name, symbol, decimals and total supply of many tokens in one multicall
+
+        Args:
+            token_addresses: Tokens to read
+            block_identifier: Block to read at, defaults to the current head
+
+        Returns:
+            Mapping of token address to its metadata, None if any read failed
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                return await self.read_token_contracts(token_addresses, block_identifier)
+            except Exception as e:
+                if InfuraKeyManager.is_rate_limited(e) and attempt < RATE_LIMIT_RETRIES:
+                    await asyncio.sleep(RATE_LIMIT_BACKOFF * 2 ** attempt)
+                    continue
+                self.logger.error(f"Error checking token contract: {str(e)}")
+                return {token: None for token in token_addresses}
+
+    async def read_token_contracts(self, token_addresses: List[str],
+                                   block_identifier: Optional[int]) -> Dict[str, Optional[dict]]:
+        """One attempt of check_token_contracts"""
+        self.check_and_rotate_key()  # Check if we need to rotate keys
+        calls = [call for token in token_addresses for call in token_metadata_calls(token)]
+        outputs = await self.multicall.execute(calls, block_identifier)
+
+        results = {}
+        for i, token in enumerate(token_addresses):
+            name, symbol, decimals, total_supply = outputs[i * 4:i * 4 + 4]
+            if None in (name, symbol, decimals, total_supply):
+                self.logger.error(f"Error checking token contract: incomplete metadata for {token}")
+                results[token] = None
+                continue
+            results[token] = {
+                'name': name[0],
+                'symbol': symbol[0],
+                'decimals': decimals[0],
+                'total_supply': total_supply[0]
             }
-            
-        except Exception as e:
-            if "429" in str(e):  # If we hit rate limit, force rotate key
-                self.rotate_key()
-                return await self.check_token_contract(token_address)  # Retry with new key
-            self.logger.error(f"Error checking token contract: {str(e)}")
-            return None
\ No newline at end of file
+        return results
@@ -0,0 +1,220 @@
+from collections import Counter
+from typing import Dict, Optional
+from web3 import Web3
+from clock import clock
+from liquidity_tracker import SYNC_TOPIC
+
+# keccak256 of the event signatures watched on tracked pairs and tokens
+SWAP_TOPIC = Web3.to_hex(Web3.keccak(text="Swap(address,uint256,uint256,uint256,uint256,address)"))
+BURN_TOPIC = Web3.to_hex(Web3.keccak(text="Burn(address,uint256,uint256,address)"))
+TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text="Transfer(address,address,uint256)"))
+OWNERSHIP_TOPIC = Web3.to_hex(Web3.keccak(text="OwnershipTransferred(address,address)"))
+
+# topic0 OR filter: one eth_getLogs returns every watched event
+WATCHED_TOPICS = [[SYNC_TOPIC, SWAP_TOPIC, BURN_TOPIC, TRANSFER_TOPIC, OWNERSHIP_TOPIC]]
+
+ZERO_TOPIC_ADDRESS = "0x" + "0" * 64
+
+# Defaults for the "activity" section of config.json
+ACTIVITY_DEFAULTS = {
+    "enabled": True,
+    "fallback_interval": 1800,    # Seconds between time-based rescans while nothing happens
+    "min_gap": 60,                # Seconds between a scan and an activity-triggered rescan
+    "urgent_gap": 5,              # Same for urgent events (LP burn, ownership change, mint, liquidity drop)
+    "swap_threshold": 5,          # Swaps plus wallet transfers since the last scan that trigger a rescan
+    "liquidity_drop": 0.2         # Share of the WETH reserve lost since the last scan that is urgent
+}
+
+class ActivityWatcher:
+    """
+    Triggers rescans from on-chain activity on tracked pairs and tokens
+
+    Every block poll fetches Sync, Swap and Burn logs of the tracked pairs
+    and Transfer and OwnershipTransferred logs of their tokens in one
+    eth_getLogs (topic0 OR filter). The Sync logs are handed to the
+    LiquidityTracker, so reserves and activity share one request. A rescan is
+    moved forward when a token sees:
+      - a Burn on its pair, an OwnershipTransferred or a mint (urgent)
+      - its WETH reserve falling by liquidity_drop since the last scan (urgent)
+      - swap_threshold swaps or wallet transfers since the last scan
+    Triggered rescans never start sooner than urgent_gap / min_gap after the
+    token's previous scan, so a burst of trades costs one rescan. Tokens
+    without activity that the cadence sees as quiet fall back to a slow
+    time-based rescan; the others keep their cadence interval.
+    """
+
+    def __init__(self, scheduler, liquidity, settings: Optional[Dict] = None):
+        """
+        Initialize the watcher
+
+        Args:
+            scheduler: ScanScheduler whose rescans are moved forward
+            liquidity: LiquidityTracker holding the tracked pairs and reserves
+            settings: Overrides for ACTIVITY_DEFAULTS
+        """
+        self.scheduler = scheduler
+        self.liquidity = liquidity
+        self.settings = dict(ACTIVITY_DEFAULTS)
+        self.settings.update(settings or {})
+        self.enabled = bool(self.settings["enabled"]) and liquidity.enabled
+        self.fallback_interval = float(self.settings["fallback_interval"])
+        self.min_gap = float(self.settings["min_gap"])
+        self.urgent_gap = float(self.settings["urgent_gap"])
+        self.swap_threshold = max(1, int(self.settings["swap_threshold"]))
+        self.liquidity_drop = float(self.settings["liquidity_drop"])
+        self.last_scan: Dict[str, float] = {}       # token -> clock.monotonic() of its last scan
+        self.scan_reserve: Dict[str, int] = {}      # token -> WETH reserve at its last scan
+        self.activity = Counter()                   # token -> swaps and transfers since its last scan
+        self.triggers = Counter()                   # reason -> rescans moved forward
+        self.logs_seen = Counter()                  # event -> logs fetched
+
+    def rescan_interval(self, token_address: str, interval: float, quiet: bool) -> float:
+        """
+        Time-based rescan interval of a token given its cadence interval
+
+        Only quiet tokens whose pair is watched are stretched to the fallback,
+        since activity moves their rescan forward; the others keep the
+        cadence interval.
+
+        Args:
+            token_address: Token being rescheduled
+            interval: Interval from the adaptive cadence
+            quiet: Whether the cadence sees the token as slow-changing
+        """
+        if self.enabled and quiet and token_address.lower() in self.liquidity.by_token:
+            return max(interval, self.fallback_interval)
+        return interval
+
+    def scanned(self, token_address: str):
+        """Reset a token's activity after it was scanned"""
+        token = token_address.lower()
+        self.last_scan[token] = clock.monotonic()
+        self.activity.pop(token, None)
+        pair = self.liquidity.by_token.get(token)
+        reserves = self.liquidity.pairs.get(pair) if pair else None
+        if reserves is not None and reserves.reserve_weth is not None:
+            self.scan_reserve[token] = reserves.reserve_weth
+        else:
+            self.scan_reserve.pop(token, None)
+
+    def forget(self, token_address: str):
+        """Drop the state of a token that is no longer rescanned"""
+        token = token_address.lower()
+        self.last_scan.pop(token, None)
+        self.scan_reserve.pop(token, None)
+        self.activity.pop(token, None)
+
+    async def poll(self, head: int) -> int:
+        """
+        Fetch activity of every block after the liquidity cursor up to `head` and trigger rescans
+
+        Returns:
+            Number of rescans moved forward
+        """
+        if not self.enabled:
+            await self.liquidity.poll(head)
+            return 0
+        if not self.liquidity.ready(head):
+            return 0
+        await self.liquidity.seed(self.liquidity.last_block)
+
+        pair_tokens = {pair: reserves.token_address for pair, reserves in self.liquidity.pairs.items()}
+        tokens = set(pair_tokens.values())
+        addresses = self.liquidity.addresses() + sorted(tokens)
+        logs = await self.liquidity.fetch_logs(addresses, WATCHED_TOPICS, self.liquidity.last_block + 1, head)
+
+        syncs = []
+        urgent = set()
+        for log in logs:
+            address = log['address'].lower()
+            topic = Web3.to_hex(log['topics'][0])
+            if topic == SYNC_TOPIC:
+                syncs.append(log)
+                continue
+            if address in pair_tokens:
+                token = pair_tokens[address]
+                if topic == SWAP_TOPIC:
+                    self.record(token, "swap")
+                elif topic == BURN_TOPIC:
+                    self.record(token, "burn", urgent)
+            elif address in tokens:
+                if topic == OWNERSHIP_TOPIC:
+                    self.record(address, "ownership", urgent)
+                elif topic == TRANSFER_TOPIC and len(log['topics']) >= 3:
+                    sender = Web3.to_hex(log['topics'][1])
+                    receiver = Web3.to_hex(log['topics'][2])
+                    if sender == ZERO_TOPIC_ADDRESS:
+                        self.record(address, "mint", urgent)
+                    elif not self.touches_pair(address, sender, receiver):
+                        self.record(address, "transfer")  # Pair transfers are already counted as swaps
+
+        # Pairs seeded after their token's scan measure drops from the seeded reserve
+        for token in tokens:
+            if token in self.last_scan and token not in self.scan_reserve:
+                reserves = self.liquidity.pairs[self.liquidity.by_token[token]]
+                if reserves.reserve_weth is not None:
+                    self.scan_reserve[token] = reserves.reserve_weth
+
+        await self.liquidity.apply_syncs(syncs, head)
+        for token in tokens:
+            if self.reserve_dropped(token):
+                self.logs_seen["liquidity_drop"] += 1
+                urgent.add((token, "liquidity_drop"))
+
+        triggered = 0
+        urgent_tokens = set()
+        for token, reason in urgent:
+            if token not in urgent_tokens and self.trigger(token, reason, self.urgent_gap):
+                triggered += 1
+            urgent_tokens.add(token)
+        for token, count in list(self.activity.items()):
+            if token not in urgent_tokens and count >= self.swap_threshold:
+                if self.trigger(token, "activity", self.min_gap):
+                    triggered += 1
+        return triggered
+
+    def record(self, token: str, event: str, urgent: Optional[set] = None):
+        """Count one watched log"""
+        self.logs_seen[event] += 1
+        if urgent is None:
+            self.activity[token] += 1
+        else:
+            urgent.add((token, event))
+
+    def touches_pair(self, token: str, sender: str, receiver: str) -> bool:
+        """Check if a Transfer topic pair involves the token's WETH pair"""
+        pair = self.liquidity.by_token.get(token)
+        if not pair:
+            return False
+        pair_topic = "0x" + pair[2:].rjust(64, "0")
+        return pair_topic in (sender, receiver)
+
+    def reserve_dropped(self, token: str) -> bool:
+        """Check if a token's WETH reserve fell by liquidity_drop since its last scan"""
+        before = self.scan_reserve.get(token)
+        pair = self.liquidity.by_token.get(token)
+        reserves = self.liquidity.pairs.get(pair) if pair else None
+        if not before or reserves is None or reserves.reserve_weth is None:
+            return False
+        return reserves.reserve_weth <= before * (1 - self.liquidity_drop)
+
+    def trigger(self, token: str, reason: str, gap: float) -> bool:
+        """Move a token's rescan forward to `gap` seconds after its last scan"""
+        last = self.last_scan.get(token)
+        delay = max(0.0, last + gap - clock.monotonic()) if last is not None else 0.0
+        if not self.scheduler.expedite(token, delay):
+            return False
+        self.triggers[reason] += 1
+        # Don't trigger again for the same activity before the rescan ran
+        self.activity.pop(token, None)
+        self.scan_reserve.pop(token, None)
+        return True
+
+    def print_stats(self):
+        """Print watched events and triggered rescans"""
+        if not self.enabled:
+            return
+        events = ", ".join(f"{event} {count}" for event, count in sorted(self.logs_seen.items())) or "none"
+        triggers = ", ".join(f"{reason} {count}" for reason, count in sorted(self.triggers.items())) or "none"
+        print(f"Activity events: {events}")
+        print(f"Activity-triggered rescans: {triggers}")
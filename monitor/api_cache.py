@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from rich.console import Console
+
+console = Console()
+
+# Defaults for the "api_cache" section of config.json
+# ttl: seconds a response stays fresh per endpoint. honeypot.is carries live
+# liquidity and holder counts, so it stays below min_rescan_interval and only
+# absorbs duplicate lookups; GoPlus contract flags change rarely.
+API_CACHE_DEFAULTS = {
+    "max_entries": 5000,
+    "ttl": {
+        "goplus": 300,
+        "honeypot": 20
+    }
+}
+
+class ResponseCache:
+    """
+    TTL + LRU cache of API responses keyed by (endpoint, address)
+
+    Entries expire after their endpoint's TTL and the least recently used
+    entry is evicted once `max_entries` is reached. Endpoints without a TTL
+    are never cached.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache with the default settings"""
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.configure(None)
+        self.hits = {}
+        self.misses = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def configure(self, settings: Optional[Dict]):
+        """
+        Set the size bound and per-endpoint TTLs from config
+
+        Args:
+            settings: {"max_entries": n, "ttl": {endpoint: seconds}}, None for defaults
+        """
+        settings = settings or {}
+        self.max_entries = max(1, int(settings.get("max_entries", API_CACHE_DEFAULTS["max_entries"])))
+        self.ttls = dict(API_CACHE_DEFAULTS["ttl"])
+        self.ttls.update(settings.get("ttl", {}))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, endpoint: str, address: str) -> Optional[Any]:
+        """Return the fresh cached response, None on a miss"""
+        key = (endpoint, address.lower())
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+                return value
+            del self.entries[key]
+            self.expirations += 1
+        self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+        return None
+
+    def put(self, endpoint: str, address: str, value: Any):
+        """Store a response, evicting the least recently used entry when full"""
+        ttl = float(self.ttls.get(endpoint, 0) or 0)
+        if ttl <= 0:
+            return
+        key = (endpoint, address.lower())
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, endpoint: str, address: str):
+        """Drop a cached response"""
+        self.entries.pop((endpoint, address.lower()), None)
+
+    def print_stats(self):
+        """Print hit/miss counts per endpoint and eviction totals"""
+        for endpoint in sorted(set(self.hits) | set(self.misses)):
+            hits = self.hits.get(endpoint, 0)
+            misses = self.misses.get(endpoint, 0)
+            console.print(
+                f"[cyan]{endpoint} cache[/]: {hits} hits, {misses} misses "
+                f"({hits / (hits + misses):.0%} hit rate)"
+            )
+        console.print(
+            f"[cyan]cache[/]: {len(self.entries)}/{self.max_entries} entries, "
+            f"{self.evictions} evicted, {self.expirations} expired"
+        )
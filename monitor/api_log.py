@@ -0,0 +1,230 @@
+import asyncio
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+from rich.console import Console
+
+console = Console()
+
+# Defaults for the "api_log" section of config.json
+API_LOG_DEFAULTS = {
+    "flush_interval": 1.0,        # Seconds between background flushes
+    "flush_batch": 200,           # Flush early once this many records are buffered
+    "max_segment_bytes": 50_000_000,
+    "max_segment_age": 3600,      # Seconds before a segment is rotated
+    "compress": True              # gzip segments once they are closed
+}
+
+class JSONLLogWriter:
+    """
+    Append-only newline-delimited JSON log written from a background task
+
+    `write()` only buffers the record, so logging never blocks the event loop
+    on disk I/O. A background task appends buffered records in batches (in a
+    worker thread), rotates to a new segment when the current one exceeds the
+    size or age limit, and gzips closed segments.
+    Segments are named <prefix>_<session>_<n>.jsonl(.gz).
+    """
+
+    def __init__(self, log_dir: str, prefix: str, session_id: str, settings: Optional[Dict] = None):
+        """
+        Initialize the writer; nothing is written until the first flush
+
+        Args:
+            log_dir: Directory holding the segments
+            prefix: File name prefix, e.g. "api_calls"
+            session_id: Session identifier included in every segment name
+            settings: Overrides for API_LOG_DEFAULTS
+        """
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.session_id = session_id
+        self.configure(settings)
+        self.buffer: List[Dict] = []
+        self.segment_index = 0
+        self.segment_path = None
+        self.segment_bytes = 0
+        self.segment_started = None
+        self.flush_task = None
+        self.flush_event = None
+        self.file_lock = threading.Lock()  # Segment state is touched from worker threads
+        self.written = 0
+        self.write_errors = 0
+
+    def configure(self, settings: Optional[Dict]):
+        """Apply config overrides"""
+        merged = dict(API_LOG_DEFAULTS)
+        merged.update(settings or {})
+        self.flush_interval = max(0.05, float(merged["flush_interval"]))
+        self.flush_batch = max(1, int(merged["flush_batch"]))
+        self.max_segment_bytes = max(1, int(merged["max_segment_bytes"]))
+        self.max_segment_age = max(1.0, float(merged["max_segment_age"]))
+        self.compress = bool(merged["compress"])
+
+    def write(self, record: Dict):
+        """Buffer a record for the next flush"""
+        self.buffer.append(record)
+        self.ensure_flusher()
+        if len(self.buffer) >= self.flush_batch and self.flush_event:
+            self.flush_event.set()
+
+    def ensure_flusher(self):
+        """Start the background flush task if an event loop is running"""
+        if self.flush_task and not self.flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # flushed on close()
+        self.flush_event = asyncio.Event()
+        self.flush_task = loop.create_task(self.flush_loop())
+
+    async def flush_loop(self):
+        """Flush the buffer every flush_interval, or early when it fills up"""
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_event.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered records in a worker thread"""
+        if not self.buffer:
+            return
+        records, self.buffer = self.buffer, []
+        await asyncio.to_thread(self.write_records, records)
+
+    def write_records(self, records: List[Dict]):
+        """Append records to the current segment, rotating first if it is full or old"""
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        data = lines.encode("utf-8")
+        with self.file_lock:
+            self.append(records, data)
+
+    def append(self, records: List[Dict], data: bytes):
+        """Append encoded records, called with the file lock held"""
+        try:
+            if self.segment_path is None:
+                self.open_segment()
+            elif (self.segment_bytes + len(data) > self.max_segment_bytes and self.segment_bytes > 0 or
+                  time.time() - self.segment_started >= self.max_segment_age):
+                self.rotate()
+                self.open_segment()
+            with open(self.segment_path, "ab") as f:
+                f.write(data)
+            self.segment_bytes += len(data)
+            self.written += len(records)
+        except OSError as e:
+            self.write_errors += len(records)
+            console.print(f"[red]Error writing to log file: {str(e)}")
+
+    def open_segment(self):
+        """Start the next segment file"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.segment_index += 1
+        self.segment_path = os.path.join(
+            self.log_dir, f"{self.prefix}_{self.session_id}_{self.segment_index:03d}.jsonl"
+        )
+        self.segment_bytes = os.path.getsize(self.segment_path) if os.path.exists(self.segment_path) else 0
+        self.segment_started = time.time()
+
+    def close_segment(self):
+        """Close the current segment, compressing it if enabled"""
+        with self.file_lock:
+            self.rotate()
+
+    def rotate(self):
+        """Close the current segment, called with the file lock held"""
+        path, self.segment_path = self.segment_path, None
+        if path and self.compress and os.path.exists(path):
+            compress_file(path)
+
+    def segment_paths(self) -> List[str]:
+        """All segments of this session written so far, oldest first"""
+        pattern = os.path.join(self.log_dir, f"{self.prefix}_{self.session_id}_*.jsonl*")
+        return sorted(glob.glob(pattern))
+
+    async def close(self):
+        """Stop the flush task, write what is left and close the last segment"""
+        if self.flush_task:
+            self.flush_task.cancel()
+            await asyncio.gather(self.flush_task, return_exceptions=True)
+            self.flush_task = None
+        await self.flush()
+        await asyncio.to_thread(self.close_segment)
+
+def compress_file(path: str) -> str:
+    """gzip a file next to itself, remove the original and return the new path"""
+    gz_path = path + ".gz"
+    with open(path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(path)
+    return gz_path
+
+def read_log(path: str) -> Iterator[Dict]:
+    """
+    Yield the records of an API call log
+
+    Reads JSONL segments (plain or gzipped) and legacy api_calls_*.json arrays.
+    Malformed lines and a truncated legacy array are skipped rather than
+    failing the whole file.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            yield from read_legacy_array(f.read())
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def read_legacy_array(text: str) -> Iterator[Dict]:
+    """Yield the objects of a JSON array one by one, stopping at the first broken one"""
+    decoder = json.JSONDecoder()
+    pos = text.find("[") + 1
+    while pos > 0:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            return
+        try:
+            record, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return
+        if isinstance(record, dict):
+            yield record
+
+def convert_legacy_log(path: str, compress: bool = True) -> str:
+    """
+    Convert a legacy api_calls_*.json array to a JSONL segment
+
+    Returns:
+        Path of the written .jsonl (or .jsonl.gz) file
+    """
+    out_path = os.path.splitext(path)[0] + ".jsonl"
+    with open(out_path, "w", encoding="utf-8") as out:
+        for record in read_log(path):
+            out.write(json.dumps(record, default=str) + "\n")
+    return compress_file(out_path) if compress else out_path
+
+if __name__ == "__main__":
+    # Convert legacy logs: python api_log.py api_logs/api_calls_*.json
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join("api_logs", "api_calls_*.json")))
+    for legacy_path in paths:
+        try:
+            print(f"{legacy_path} -> {convert_legacy_log(legacy_path)}")
+        except Exception as e:
+            print(f"Error converting {legacy_path}: {str(e)}")
@@ -1,4 +1,3 @@
-import json
 import time
 from datetime import datetime
 import os
@@ -6,6 +5,8 @@ import asyncio
 from typing import Dict, Optional
 from rich.console import Console
 from rich.table import Table
+from api_log import JSONLLogWriter
+from histogram import Histogram, LATENCY_BUCKETS, SIZE_BUCKETS
 
 console = Console()
 
@@ -15,16 +16,21 @@ class APITracker:
         self.log_dir = log_dir
         self.call_counter = 0
         self.calls_by_endpoint = {}
+        self.coalesced_by_endpoint = {}
         self.lock = asyncio.Lock()
         self.ensure_log_dir()
         
-        # Create new log file for this session
+        # Append-only JSONL log for this session, flushed in the background
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = os.path.join(self.log_dir, f"api_calls_{self.session_id}.json")
+        self.log_writer = JSONLLogWriter(self.log_dir, "api_calls", self.session_id)
         
-        # Initialize log file with empty array
-        with open(self.log_file, 'w') as f:
-            json.dump([], f)
+    def configure_log(self, settings: Optional[Dict]):
+        """Apply the "api_log" section of config.json to the log writer"""
+        self.log_writer.configure(settings)
+        
+    async def close(self):
+        """Flush buffered log records and close the current segment"""
+        await self.log_writer.close()
             
     def ensure_log_dir(self):
         """Ensure log directory exists"""
@@ -37,7 +43,8 @@ class APITracker:
                           params: Dict,
                           response_code: int,
                           response_body: str,
-                          error: Optional[str] = None) -> int:
+                          error: Optional[str] = None,
+                          latency: Optional[float] = None) -> int:
         """
         Log an API call with details and return the call ID
         
@@ -48,6 +55,7 @@ class APITracker:
             response_code: HTTP response code
             response_body: Response body received
             error: Error message if any
+            latency: Seconds from sending the request to reading the response
             
         Returns:
             call_id: Unique ID for this API call
@@ -66,6 +74,7 @@ class APITracker:
                 "response_code": response_code,
                 "response_body": response_body,
                 "error": error,
+                "latency": latency,
                 "time_since_last_call": self.get_time_since_last_call(endpoint)
             }
             
@@ -77,15 +86,20 @@ class APITracker:
                     "success_count": 0,
                     "error_count": 0,
                     "rate_limit_count": 0,
-                    "empty_response_count": 0
+                    "empty_response_count": 0,
+                    "last_empty_time": None,
+                    "status_codes": {},
+                    "latency": Histogram(LATENCY_BUCKETS),
+                    "response_size": Histogram(SIZE_BUCKETS)
                 }
             
             stats = self.calls_by_endpoint[endpoint]
             stats["total_calls"] += 1
             stats["last_call_time"] = time.time()
-            
-            # Initialize empty response tracking
-            stats["empty_response_count"] = stats.get("empty_response_count", 0)
+            stats["status_codes"][response_code] = stats["status_codes"].get(response_code, 0) + 1
+            stats["response_size"].observe(len(response_body or ""))
+            if latency is not None:
+                stats["latency"].observe(latency)
             
             if response_code == 200 and not error:
                 # Check for empty or invalid response
@@ -95,6 +109,7 @@ class APITracker:
                     (isinstance(response_body, dict) and not response_body) or
                     (isinstance(response_body, dict) and 'result' not in response_body)):
                     stats["empty_response_count"] += 1
+                    stats["last_empty_time"] = call_details["timestamp"]
                 else:
                     stats["success_count"] += 1
             elif response_code == 429 or "rate limit" in str(response_body).lower():
@@ -102,18 +117,15 @@ class APITracker:
             else:
                 stats["error_count"] += 1
             
-            # Append to log file
-            try:
-                with open(self.log_file, 'r') as f:
-                    logs = json.load(f)
-                logs.append(call_details)
-                with open(self.log_file, 'w') as f:
-                    json.dump(logs, f, indent=2)
-            except Exception as e:
-                console.print(f"[red]Error writing to log file: {str(e)}")
+            # Queue for the background log writer
+            self.log_writer.write(call_details)
             
             return call_id
             
+    def record_coalesced(self, endpoint: str):
+        """Count a request that joined an identical in-flight request instead of being sent"""
+        self.coalesced_by_endpoint[endpoint] = self.coalesced_by_endpoint.get(endpoint, 0) + 1
+        
     def get_time_since_last_call(self, endpoint: str) -> Optional[float]:
         """Get time in seconds since last call to this endpoint"""
         if endpoint in self.calls_by_endpoint:
@@ -123,7 +135,7 @@ class APITracker:
         return None
         
     def print_stats(self):
-        """Print current API call statistics"""
+        """Print current API call statistics from the in-memory counters"""
         # Create main statistics table
         main_table = Table(title="API Call Statistics", border_style="blue")
         main_table.add_column("Endpoint", style="cyan")
@@ -132,48 +144,60 @@ class APITracker:
         main_table.add_column("Empty Responses", style="yellow")
         main_table.add_column("Errors", style="red")
         main_table.add_column("Rate Limits", style="magenta")
+        main_table.add_column("Coalesced", style="blue")
         
         # Create detailed tables
+        latency_table = Table(title="API Latency and Response Size", border_style="blue")
+        latency_table.add_column("Endpoint", style="cyan")
+        latency_table.add_column("p50", style="green")
+        latency_table.add_column("p90", style="yellow")
+        latency_table.add_column("p99", style="red")
+        latency_table.add_column("Max", style="red")
+        latency_table.add_column("Avg Size", style="white")
+        latency_table.add_column("Max Size", style="white")
+        latency_table.add_column("Status Codes", style="magenta")
+        
         empty_table = Table(title="[bold yellow]Empty Responses", border_style="yellow")
         empty_table.add_column("Endpoint", style="cyan")
         empty_table.add_column("Count", style="yellow")
         empty_table.add_column("Last Call", style="white")
         
-        # Track empty responses
         for endpoint, stats in self.calls_by_endpoint.items():
-            # Get empty response count from logs
-            empty_count = 0
-            last_empty_time = None
-            try:
-                with open(self.log_file, 'r') as f:
-                    logs = json.load(f)
-                    for log in logs:
-                        if log['endpoint'] == endpoint and log['response_code'] == 200 and not log['error'] and not log['response_body']:
-                            empty_count += 1
-                            last_empty_time = log['timestamp']
-            except Exception as e:
-                console.print(f"[red]Error reading logs: {str(e)}")
-            
-            # Add to main table
             main_table.add_row(
                 endpoint,
                 str(stats["total_calls"]),
                 str(stats["success_count"]),
-                str(empty_count),
+                str(stats["empty_response_count"]),
                 str(stats["error_count"]),
-                str(stats["rate_limit_count"])
+                str(stats["rate_limit_count"]),
+                str(self.coalesced_by_endpoint.get(endpoint, 0))
+            )
+            
+            latency = stats["latency"]
+            size = stats["response_size"]
+            latency_table.add_row(
+                endpoint,
+                f"{latency.percentile(50):.3f}s",
+                f"{latency.percentile(90):.3f}s",
+                f"{latency.percentile(99):.3f}s",
+                f"{latency.max or 0:.3f}s",
+                f"{size.mean:,.0f} B",
+                f"{size.max or 0:,.0f} B",
+                ", ".join(f"{code}: {count}" for code, count in sorted(stats["status_codes"].items()))
             )
             
             # Add to empty responses table if applicable
-            if empty_count > 0:
+            if stats["empty_response_count"] > 0:
                 empty_table.add_row(
                     endpoint,
-                    str(empty_count),
-                    last_empty_time or "Unknown"
+                    str(stats["empty_response_count"]),
+                    stats["last_empty_time"] or "Unknown"
                 )
         
         # Print tables
         console.print(main_table)
+        if latency_table.row_count > 0:
+            console.print(latency_table)
         if empty_table.row_count > 0:
             console.print(empty_table)
         
@@ -1,16 +1,50 @@
 import aiohttp
 import json
-from typing import Dict, Optional
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import asyncio
 from api_tracker import api_tracker
+from api_cache import ResponseCache
+from rate_limiter import rate_limiter
 from rich.console import Console
 
 console = Console()
 
+# Defaults for the "goplus_batch" section of config.json
+GOPLUS_BATCH_DEFAULTS = {
+    "window": 0.25,     # Seconds to collect lookups before sending a batch
+    "max_size": 20      # Addresses per token_security request
+}
+
 class APIWrapper:
     def __init__(self):
         """Initialize API wrapper with default settings"""
         self.session = None
+        self.cache = ResponseCache()
+        
+        # Requests in flight by (endpoint, address), shared by concurrent callers
+        self.in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        
+        # GoPlus lookups waiting for the next batch: address -> future of the lookup
+        self.goplus_pending: Dict[str, asyncio.Future] = {}
+        self.goplus_flush_handle = None
+        self.goplus_batch_tasks: Set[asyncio.Task] = set()  # Batches in flight, kept until done
+        self.goplus_batch_window = GOPLUS_BATCH_DEFAULTS["window"]
+        self.goplus_batch_size = GOPLUS_BATCH_DEFAULTS["max_size"]
+        self.goplus_lookups = 0
+        self.goplus_requests = 0
+        
+    def configure_goplus_batching(self, settings: Optional[Dict]):
+        """
+        Set the GoPlus batching window and size from config
+        
+        Args:
+            settings: {"window": seconds, "max_size": addresses}, None for defaults
+        """
+        merged = dict(GOPLUS_BATCH_DEFAULTS)
+        merged.update(settings or {})
+        self.goplus_batch_window = max(0.0, float(merged["window"]))
+        self.goplus_batch_size = max(1, int(merged["max_size"]))
         
     async def ensure_session(self):
         """Ensure aiohttp session exists"""
@@ -19,32 +53,140 @@ class APIWrapper:
             
     async def close(self):
         """Close the session if it exists"""
+        if self.goplus_flush_handle:
+            self.goplus_flush_handle.cancel()
+            self.goplus_flush_handle = None
+        for future in self.goplus_pending.values():
+            if not future.done():
+                future.set_result({})
+        self.goplus_pending = {}
+        # Cancelled batches still resolve their callers with {} on the way out
+        for task in self.goplus_batch_tasks:
+            task.cancel()
+        await asyncio.gather(*self.goplus_batch_tasks, return_exceptions=True)
+        self.goplus_batch_tasks.clear()
         if self.session:
             await self.session.close()
             self.session = None
             
-    async def call_goplus_api(self, address: str, delay: float = 30.0) -> Dict:
+    async def single_flight(self, endpoint: str, address: str,
+                            fetch: Callable[[], Awaitable[Dict]]) -> Dict:
         """
-        Call GoPlus API with tracking and proper error handling
+        Run `fetch` once per (endpoint, address) however many callers ask concurrently
+        
+        Callers arriving while a request for the same key is in flight await
+        that request instead of sending their own. The request runs as its own
+        task, so a cancelled caller does not cancel it for the others.
+        
+        Args:
+            endpoint: Endpoint name used for tracking
+            address: Token address the request is for
+            fetch: Coroutine function performing the request
+            
+        Returns:
+            The shared response
+        """
+        key = (endpoint, address.lower())
+        task = self.in_flight.get(key)
+        if task is not None:
+            api_tracker.record_coalesced(endpoint)
+        else:
+            task = asyncio.ensure_future(fetch())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def call_goplus_api(self, address: str, force_refresh: bool = False) -> Dict:
+        """
+        Look up a token on GoPlus, batched with other pending lookups
+        
+        Lookups are collected for up to `goplus_batch_window` seconds (or until
+        `goplus_batch_size` addresses are waiting) and sent as one
+        token_security request; each caller gets the response trimmed to
+        its own address. Fresh cached responses are returned without a request,
+        and concurrent lookups of the same address share one.
         
         Args:
             address: Token address to check
-            delay: Delay before making the call
+            force_refresh: Skip the cache and always query GoPlus
+            
+        Returns:
+            API response data with only this address under 'result'
+        """
+        if not force_refresh:
+            cached = self.cache.get("goplus", address)
+            if cached is not None:
+                return cached
+        return await self.single_flight("goplus", address, lambda: self.queue_goplus_lookup(address))
+    
+    async def queue_goplus_lookup(self, address: str) -> Dict:
+        """Add an address to the pending GoPlus batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.goplus_lookups += 1
+        self.goplus_pending[address.lower()] = future
+        
+        if len(self.goplus_pending) >= self.goplus_batch_size:
+            self.flush_goplus_batch()
+        elif not self.goplus_flush_handle:
+            self.goplus_flush_handle = loop.call_later(self.goplus_batch_window, self.flush_goplus_batch)
+        
+        return await future
+    
+    def flush_goplus_batch(self):
+        """Send all pending GoPlus lookups as one request"""
+        if self.goplus_flush_handle:
+            self.goplus_flush_handle.cancel()
+            self.goplus_flush_handle = None
+        if not self.goplus_pending:
+            return
+        batch, self.goplus_pending = self.goplus_pending, {}
+        task = asyncio.create_task(self.fetch_goplus_batch(batch))
+        self.goplus_batch_tasks.add(task)
+        task.add_done_callback(self.goplus_batch_tasks.discard)
+    
+    async def fetch_goplus_batch(self, batch: Dict[str, asyncio.Future]):
+        """Request a batch and fan the per-token results out to the waiting callers"""
+        data = {}
+        try:
+            data = await self.request_goplus(list(batch))
+        finally:
+            results = data.get('result') or {}
+            for address, future in batch.items():
+                response = {}
+                if data:
+                    response = {key: value for key, value in data.items() if key != 'result'}
+                    response['result'] = {address: results[address]} if address in results else {}
+                    if address in results:
+                        self.cache.put("goplus", address, response)
+                if not future.done():
+                    future.set_result(response)
+    
+    async def request_goplus(self, addresses: List[str]) -> Dict:
+        """
+        Call GoPlus API with tracking and proper error handling
+        
+        The call goes out as soon as the goplus rate limiter has budget.
+        
+        Args:
+            addresses: Token addresses to check in one request
             
         Returns:
             API response data
         """
         await self.ensure_session()
         
-        # Add initial delay
-        await asyncio.sleep(delay)
+        await rate_limiter.acquire("goplus")
         
         endpoint = "https://api.gopluslabs.io/api/v1/token_security/1"
-        params = {"contract_addresses": address}
+        params = {"contract_addresses": ",".join(addresses)}
+        self.goplus_requests += 1
         
+        started = time.monotonic()
         try:
             async with self.session.get(endpoint, params=params) as response:
                 response_text = await response.text()
+                latency = time.monotonic() - started
                 
                 # Log the API call
                 call_id = await api_tracker.log_api_call(
@@ -52,10 +194,11 @@ class APIWrapper:
                     method="GET",
                     params=params,
                     response_code=response.status,
-                    response_body=response_text
+                    response_body=response_text,
+                    latency=latency
                 )
                 
-                console.print(f"[cyan]GoPlus API Call ID: {call_id}")
+                console.print(f"[cyan]GoPlus API Call ID: {call_id} ({len(addresses)} tokens)")
                 
                 if response.status == 200:
                     data = json.loads(response_text)
@@ -76,33 +219,56 @@ class APIWrapper:
                 params=params,
                 response_code=500,
                 response_body="",
-                error=str(e)
+                error=str(e),
+                latency=time.monotonic() - started
             )
             console.print(f"[red]Error during GoPlus API call: {str(e)} (Call ID: {call_id})")
             return {}
             
-    async def call_honeypot_api(self, address: str, delay: float = 10.0) -> Dict:
+    async def call_honeypot_api(self, address: str, force_refresh: bool = False) -> Dict:
+        """
+        Look up a token on honeypot.is
+        
+        Fresh cached responses are returned without a request, and concurrent
+        lookups of the same address share one.
+        
+        Args:
+            address: Token address to check
+            force_refresh: Skip the cache and always query honeypot.is
+            
+        Returns:
+            API response data
+        """
+        if not force_refresh:
+            cached = self.cache.get("honeypot", address)
+            if cached is not None:
+                return cached
+        return await self.single_flight("honeypot", address, lambda: self.request_honeypot(address))
+    
+    async def request_honeypot(self, address: str) -> Dict:
         """
         Call Honeypot API with tracking and proper error handling
         
+        The call goes out as soon as the honeypot rate limiter has budget.
+        
         Args:
             address: Token address to check
-            delay: Delay before making the call
             
         Returns:
             API response data
         """
         await self.ensure_session()
         
-        # Add initial delay
-        await asyncio.sleep(delay)
+        await rate_limiter.acquire("honeypot")
         
         endpoint = "https://api.honeypot.is/v2/IsHoneypot"
         params = {"address": address}
         
+        started = time.monotonic()
         try:
             async with self.session.get(endpoint, params=params) as response:
                 response_text = await response.text()
+                latency = time.monotonic() - started
                 
                 # Log the API call
                 call_id = await api_tracker.log_api_call(
@@ -110,13 +276,16 @@ class APIWrapper:
                     method="GET",
                     params=params,
                     response_code=response.status,
-                    response_body=response_text
+                    response_body=response_text,
+                    latency=latency
                 )
                 
                 console.print(f"[cyan]Honeypot API Call ID: {call_id}")
                 
                 if response.status == 200:
                     data = json.loads(response_text)
+                    if data:
+                        self.cache.put("honeypot", address, data)
                     return data
                 else:
                     console.print(f"[red]Honeypot API HTTP error {response.status} (Call ID: {call_id})")
@@ -130,10 +299,21 @@ class APIWrapper:
                 params=params,
                 response_code=500,
                 response_body="",
-                error=str(e)
+                error=str(e),
+                latency=time.monotonic() - started
             )
             console.print(f"[red]Error during Honeypot API call: {str(e)} (Call ID: {call_id})")
             return {}
+    
+    def print_stats(self):
+        """Print response cache and GoPlus batching statistics"""
+        self.cache.print_stats()
+        if not self.goplus_requests:
+            return
+        console.print(
+            f"[cyan]goplus batching[/]: {self.goplus_lookups} lookups in {self.goplus_requests} requests "
+            f"({self.goplus_lookups / self.goplus_requests:.1f} per request)"
+        )
 
 # Global instance
 api_wrapper = APIWrapper() 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+class Clock:
+    """
+    Source of wall and monotonic time for the scan path
+
+    Uses the real clock unless frozen. A frozen clock only moves when
+    `advance()` is called, which lets the replay harness run a recorded
+    session deterministically and as fast as the CPU allows.
+    """
+
+    def __init__(self):
+        """Initialize on the real clock"""
+        self.fake_time: Optional[float] = None
+
+    def time(self) -> float:
+        """Seconds since the epoch"""
+        return self.fake_time if self.fake_time is not None else time.time()
+
+    def monotonic(self) -> float:
+        """Monotonic seconds; follows the fake time while frozen"""
+        return self.fake_time if self.fake_time is not None else time.monotonic()
+
+    def now(self) -> datetime:
+        """Current local datetime"""
+        return datetime.fromtimestamp(self.time())
+
+    def freeze(self, timestamp: float):
+        """Stop the clock at `timestamp` (epoch seconds)"""
+        self.fake_time = float(timestamp)
+
+    def advance(self, seconds: float):
+        """Move a frozen clock forward"""
+        if self.fake_time is None:
+            raise RuntimeError("clock is not frozen")
+        self.fake_time += max(0.0, seconds)
+
+    def unfreeze(self):
+        """Return to the real clock"""
+        self.fake_time = None
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the clock is frozen"""
+        return self.fake_time is not None
+
+# Global instance
+clock = Clock()
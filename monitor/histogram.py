@@ -0,0 +1,67 @@
+import bisect
+from typing import Dict, List, Sequence
+
+# Bucket upper bounds for request latency in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bucket upper bounds for short local operations in seconds (sqlite writes, event loop lag)
+LOCAL_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Bucket upper bounds for response sizes in bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+class Histogram:
+    """
+    Fixed-bucket histogram with O(buckets) memory and percentile estimates
+
+    Observations are counted into the first bucket whose upper bound they do
+    not exceed; values above the last bound land in an overflow bucket.
+    Percentiles interpolate linearly inside the bucket holding the rank.
+    """
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        """Initialize empty buckets with the given ascending upper bounds"""
+        self.bounds: List[float] = sorted(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        """Record one observation"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100), 0 if nothing was observed"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else min(self.min, self.bounds[0])
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * max(0.0, rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        """Average of all observations"""
+        return self.total / self.count if self.count else 0.0
+
+    def cumulative(self) -> Dict[float, int]:
+        """Cumulative counts per upper bound (Prometheus `le` buckets, without +Inf)"""
+        result = {}
+        running = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            running += bucket_count
+            result[bound] = running
+        return result
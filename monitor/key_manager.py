@@ -1,63 +1,283 @@
+import asyncio
 import time
-from datetime import datetime, timedelta
-from typing import List
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, date
+from typing import Any, Dict, List, Optional
 import logging
+import aiohttp
+from rich.console import Console
+from rich.table import Table
+from web3 import AsyncHTTPProvider
+from rpc_router import post_batch
+
+console = Console()
+
+INFURA_BASE_URL = "https://mainnet.infura.io/v3/"
+
+# JSON-RPC error codes and message fragments providers use for rate limits
+RATE_LIMIT_CODES = (-32005, 429)
+RATE_LIMIT_MESSAGES = ("rate limit", "too many requests", "daily request count exceeded")
+# Infura also answers oversized eth_getLogs queries with -32005; those are not rate limits
+RESULT_SIZE_MESSAGES = ("query returned more than", "more than 10000 results", "response size exceeded")
+
+# Defaults for the "key_pool" section of config.json
+KEY_POOL_DEFAULTS = {
+    "daily_quota": 100_000,       # Requests per key per UTC day (Infura resets quotas at 00:00 UTC)
+    "cooldown": 30,               # Seconds a key rests after its first 429
+    "max_cooldown": None,         # Cap for repeated 429 backoff, defaults to key_swap_sleep_time
+    "connections_per_key": 10     # Size of each key's HTTP connection pool
+}
+
+@dataclass
+class InfuraKey:
+    """One Infura key with its long-lived provider and usage accounting"""
+    key: str
+    url: str
+    provider: AsyncHTTPProvider
+    session: Optional[aiohttp.ClientSession] = None
+    in_flight: int = 0
+    requests_today: int = 0
+    quota_day: date = field(default_factory=lambda: datetime.now(timezone.utc).date())
+    total_requests: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    strikes: int = 0              # Consecutive 429s, drives the cooldown backoff
+    cooldown_until: float = 0.0   # time.monotonic() before which the key is not used
 
 class InfuraKeyManager:
+    """
+    Pool of Infura keys shared by every RPC client of the scanner
+
+    Each key keeps one provider and connection pool for the whole session
+    and counts its requests against a daily quota. A key answering 429 is
+    put on a cooldown that doubles on repeated 429s. Keys are RPCRouter
+    endpoints (see TokenTracker.setup_router): the router sends through
+    send() / send_batch(), skips keys that are not is_available() and
+    retries a rate-limited request on another endpoint, so a rate limit
+    never stalls the event loop.
+    """
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(InfuraKeyManager, cls).__new__(cls)
             cls._instance.initialized = False
         return cls._instance
-    
+
     def __init__(self):
         if not self.initialized:
             self.current_key_index = 0
             self.last_key_rotation = datetime.now()
             self.infura_keys = []
+            self.keys: List[InfuraKey] = []
             self.key_rotation_interval = 0
             self.key_swap_sleep_time = 0
+            self.settings = dict(KEY_POOL_DEFAULTS)
             self.logger = logging.getLogger('InfuraKeyManager')
             self.initialized = True
-    
-    def initialize(self, *, infura_keys: List[str], key_rotation_interval: int, key_swap_sleep_time: int):
+
+    def initialize(self, *, infura_keys: List[str], key_rotation_interval: int, key_swap_sleep_time: int,
+                   settings: Optional[Dict] = None):
         """Initialize the key manager with configuration"""
         if isinstance(infura_keys, (list, tuple)):
-            self.infura_keys = list(infura_keys)
+            infura_keys = list(infura_keys)
         else:
             raise ValueError("infura_keys must be a list or tuple")
-            
+
         self.key_rotation_interval = int(key_rotation_interval)
         self.key_swap_sleep_time = int(key_swap_sleep_time)
+        self.configure(settings)
+        if infura_keys != self.infura_keys:
+            # Keys (and their connection pools) survive repeated initialize() calls
+            self.infura_keys = infura_keys
+            self.keys = [InfuraKey(key, INFURA_BASE_URL + key, AsyncHTTPProvider(INFURA_BASE_URL + key))
+                         for key in infura_keys]
+            self.current_key_index = 0
         self.logger.info("InfuraKeyManager initialized with %d keys", len(self.infura_keys))
-    
+
+    def configure(self, settings: Optional[Dict]):
+        """Apply "key_pool" config overrides"""
+        self.settings.update(settings or {})
+        self.daily_quota = max(1, int(self.settings["daily_quota"]))
+        self.cooldown = max(1.0, float(self.settings["cooldown"]))
+        max_cooldown = self.settings["max_cooldown"]
+        if max_cooldown is None:
+            max_cooldown = self.key_swap_sleep_time or self.cooldown
+        self.max_cooldown = max(self.cooldown, float(max_cooldown))
+        self.connections_per_key = max(1, int(self.settings["connections_per_key"]))
+
+    def reset_quotas(self):
+        """Start a new quota day for keys whose day has passed"""
+        today = datetime.now(timezone.utc).date()
+        for key in self.keys:
+            if key.quota_day != today:
+                key.quota_day = today
+                key.requests_today = 0
+
+    def is_available(self, key: InfuraKey) -> bool:
+        """Check if a key is off cooldown and under its daily quota"""
+        return key.cooldown_until <= time.monotonic() and key.requests_today < self.daily_quota
+
+    def pick(self) -> Optional[InfuraKey]:
+        """Return the least-loaded key that is off cooldown and under quota, None if there is none"""
+        self.reset_quotas()
+        healthy = [key for key in self.keys if self.is_available(key)]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda key: (key.in_flight, key.requests_today))
+
+    def reserve(self, key: InfuraKey, credits: int = 1):
+        """Count a request against a key"""
+        key.in_flight += 1
+        key.requests_today += credits
+        key.total_requests += credits
+        self.current_key_index = self.keys.index(key)
+
+    def release(self, key: InfuraKey, rate_limited: bool = False, failed: bool = False):
+        """Hand a key back, cooling it down if the request was rate limited"""
+        key.in_flight = max(0, key.in_flight - 1)
+        if rate_limited:
+            self.cool_down(key)
+        elif failed:
+            key.errors += 1
+        else:
+            key.strikes = 0
+
+    def cool_down(self, key: InfuraKey):
+        """Rest a key after a 429, doubling the rest on consecutive 429s"""
+        key.rate_limited += 1
+        if key.cooldown_until > time.monotonic():
+            return  # Requests sent before the cooldown started don't extend it
+        key.strikes += 1
+        duration = min(self.max_cooldown, self.cooldown * 2 ** (key.strikes - 1))
+        key.cooldown_until = max(key.cooldown_until, time.monotonic() + duration)
+        self.logger.info("Infura key %d rate limited, cooling down for %.0fs",
+                         self.keys.index(key), duration)
+
+    @staticmethod
+    def is_rate_limited(error: Exception) -> bool:
+        """
+        Check if a provider error is a rate limit
+
+        Either an HTTP 429, or a JSON-RPC error object (web3 raises it as
+        ValueError({"code": ..., "message": ...})) with Infura's -32005 code
+        or a rate limit message.
+        """
+        if getattr(error, "status", None) == 429:
+            return True
+        rpc_error = error.args[0] if error.args else None
+        if not isinstance(rpc_error, dict):
+            return False
+        message = str(rpc_error.get("message", "")).lower()
+        if any(hint in message for hint in RESULT_SIZE_MESSAGES):
+            return False
+        return (rpc_error.get("code") in RATE_LIMIT_CODES
+                or any(hint in message for hint in RATE_LIMIT_MESSAGES))
+
+    async def ensure_session(self, key: InfuraKey):
+        """Give a key its own connection pool on first use"""
+        if key.session is None or key.session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections_per_key),
+                raise_for_status=True
+            )
+            key.session = await key.provider.cache_async_session(session)
+            if key.session is not session:
+                await session.close()  # web3 already had a live session for this URL
+
+    async def send(self, key: InfuraKey, method, params: Any):
+        """Send one JSON-RPC request on a specific key, cooling it down if it answers 429"""
+        self.reserve(key)
+        try:
+            await self.ensure_session(key)
+            response = await key.provider.make_request(method, params)
+        except asyncio.CancelledError:
+            self.release(key)
+            raise
+        except Exception as e:
+            rate_limited = self.is_rate_limited(e)
+            self.release(key, rate_limited=rate_limited, failed=not rate_limited)
+            raise
+        self.release(key)
+        return response
+
+    async def send_batch(self, key: InfuraKey, requests: List[Dict]) -> Any:
+        """Send a JSON-RPC batch on a specific key, counting every request against its quota"""
+        self.reserve(key, credits=len(requests))
+        try:
+            await self.ensure_session(key)
+            replies = await post_batch(key.session, key.url, requests)
+        except asyncio.CancelledError:
+            self.release(key)
+            raise
+        except Exception as e:
+            rate_limited = self.is_rate_limited(e)
+            self.release(key, rate_limited=rate_limited, failed=not rate_limited)
+            raise
+        self.release(key)
+        return replies
+
     def get_current_key(self) -> str:
-        """Get the current Infura key"""
+        """Get the Infura key the next request would use"""
         if not self.infura_keys:
             raise RuntimeError("No Infura keys available. Did you call initialize()?")
-        return self.infura_keys[self.current_key_index]
-    
+        key = self.pick()
+        return key.key if key else self.infura_keys[self.current_key_index]
+
     def get_current_rpc_url(self) -> str:
-        """Get the current Infura RPC URL with the current key"""
-        base_url = "https://mainnet.infura.io/v3/"
-        return base_url + self.get_current_key()
-    
+        """Get the Infura RPC URL of the key the next request would use"""
+        return INFURA_BASE_URL + self.get_current_key()
+
+    def get_rpc_urls(self) -> List[str]:
+        """Get the Infura RPC URL for every configured key"""
+        return [INFURA_BASE_URL + key for key in self.infura_keys]
+
     def rotate_key(self) -> None:
-        """Rotate to the next Infura API key"""
+        """Move off the current key by putting it on cooldown; never sleeps"""
         if not self.infura_keys:
             raise RuntimeError("No Infura keys available. Did you call initialize()?")
+        self.cool_down(self.keys[self.current_key_index])
         self.current_key_index = (self.current_key_index + 1) % len(self.infura_keys)
         self.last_key_rotation = datetime.now()
         self.logger.info("Rotated to new Infura key index: %d", self.current_key_index)
-        time.sleep(self.key_swap_sleep_time)
-    
+
     def check_and_rotate_key(self) -> None:
-        """Check if it's time to rotate the key and do so if needed"""
-        if datetime.now() - self.last_key_rotation > timedelta(seconds=self.key_rotation_interval):
-            self.rotate_key()
-    
+        """Roll quotas over at the UTC day boundary; keys are otherwise picked per request"""
+        self.reset_quotas()
+
     def force_rotate_key(self) -> None:
         """Force key rotation, typically used after hitting rate limits"""
         self.rotate_key()
+
+    def print_stats(self):
+        """Print per-key usage"""
+        if not self.keys:
+            return
+        now = time.monotonic()
+        table = Table(title="Infura Key Usage", border_style="blue")
+        table.add_column("Key", style="cyan")
+        table.add_column("Today", style="green")
+        table.add_column("Quota Used", style="yellow")
+        table.add_column("Total", style="green")
+        table.add_column("429s", style="red")
+        table.add_column("Errors", style="red")
+        table.add_column("Cooldown", style="yellow")
+        for key in self.keys:
+            remaining = max(0.0, key.cooldown_until - now)
+            table.add_row(
+                f"{key.key[:6]}…",
+                str(key.requests_today),
+                f"{key.requests_today / self.daily_quota * 100:.1f}%",
+                str(key.total_requests),
+                str(key.rate_limited),
+                str(key.errors),
+                f"{remaining:.0f}s" if remaining else "-"
+            )
+        console.print(table)
+
+    async def close(self):
+        """Close every key's connection pool"""
+        for key in self.keys:
+            if key.session and not key.session.closed:
+                await key.session.close()
+            key.session = None
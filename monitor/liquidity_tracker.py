@@ -0,0 +1,416 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from eth_abi import decode
+from web3 import Web3
+from clock import clock
+from multicall import get_reserves_call
+from pair_ingester import SECONDS_PER_BLOCK
+from rate_limiter import rate_limiter
+
+# keccak256 of the Uniswap V2 pair Sync event signature, emitted on every reserve change
+SYNC_TOPIC = Web3.to_hex(Web3.keccak(text="Sync(uint112,uint112)"))
+
+# Uniswap V2 USDC/WETH pair: token0 is USDC (6 decimals), token1 is WETH
+USDC_WETH_PAIR = "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+USDC_DECIMALS = 6
+WETH_DECIMALS = 18
+
+# Defaults for the "liquidity" section of config.json
+LIQUIDITY_DEFAULTS = {
+    "enabled": True,
+    "max_block_range": 100,     # Largest block range requested in one eth_getLogs call
+    "max_addresses": 500,       # Pairs per eth_getLogs address filter
+    "raw_retention": 21600,     # Seconds per-block points are kept
+    "minute_retention": 604800, # Seconds 1-minute points are kept
+    "ten_minute_retention": 0,  # Seconds 10-minute points are kept, 0 keeps them
+    "compact_interval": 300     # Seconds between downsampling passes
+}
+
+# liquidity_series resolutions in seconds: per-block points, then 1 and 10 minute buckets
+RAW = 0
+MINUTE = 60
+TEN_MINUTES = 600
+
+def create_liquidity_series(db: sqlite3.Connection):
+    """
+    Create liquidity_series
+
+    One row per (token, resolution, ts): ts is Unix seconds (the bucket start
+    for downsampled rows) and reserves are stored as REAL, which is exact
+    enough for charts; the exact current reserves live in memory. The old
+    liq10..liq200 columns of scan_records are not carried over: they were
+    keyed by scan count, not time.
+    """
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS liquidity_series (
+        token_address TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        block_number INTEGER,
+        liquidity_usd REAL,
+        reserve_token REAL,
+        reserve_weth REAL,
+        PRIMARY KEY (token_address, resolution, ts)
+    ) WITHOUT ROWID''')
+    db.execute('''
+    CREATE INDEX IF NOT EXISTS idx_liquidity_series_age
+    ON liquidity_series (resolution, ts)
+    ''')
+
+@dataclass
+class PairReserves:
+    """Latest known reserves of a tracked WETH pair"""
+    token_address: str
+    pair_address: str
+    weth_is_token0: bool
+    reserve_token: Optional[int] = None
+    reserve_weth: Optional[int] = None
+    block_number: Optional[int] = None
+
+    def update(self, reserve0: int, reserve1: int, block_number: int):
+        """Apply a Sync event or getReserves result"""
+        if self.weth_is_token0:
+            self.reserve_weth, self.reserve_token = reserve0, reserve1
+        else:
+            self.reserve_token, self.reserve_weth = reserve0, reserve1
+        self.block_number = block_number
+
+class LiquidityTracker:
+    """
+    Follows reserves of all active WETH pairs from their Sync logs
+
+    New pairs are seeded with one multicall of getReserves; after that every
+    reserve change arrives as a Sync log fetched with the same stateless
+    eth_getLogs polling as pair discovery (one call per block range, all
+    pairs in one address filter). The WETH price comes from the Sync logs of
+    the Uniswap V2 USDC/WETH pair, so liquidity in USD needs no third-party
+    API. Each block that changed a pair's reserves adds one raw
+    liquidity_series point. Reserve changes while the scanner is not running
+    are not backfilled: pairs are re-seeded from the current reserves on
+    start.
+
+    Every compact_interval the raw points are rolled up into 1-minute buckets
+    and those into 10-minute buckets (the last point of each bucket), and
+    points past their level's retention are deleted, so a long session keeps
+    a bounded number of rows per pair.
+    """
+
+    def __init__(self, tracker, db, settings: Optional[Dict] = None):
+        """
+        Initialize the tracker
+
+        Args:
+            tracker: TokenTracker providing web3, multicall and the WETH address
+            db: SessionDB of the session's scan_records.db
+            settings: Overrides for LIQUIDITY_DEFAULTS
+        """
+        self.tracker = tracker
+        self.db = db
+        self.settings = dict(LIQUIDITY_DEFAULTS)
+        self.settings.update(settings or {})
+        self.enabled = bool(self.settings["enabled"])
+        self.max_block_range = max(1, int(self.settings["max_block_range"]))
+        self.max_addresses = max(1, int(self.settings["max_addresses"]))
+        self.weth_address = tracker.weth_address.lower()
+        self.price_pair = PairReserves("usdc", USDC_WETH_PAIR.lower(), weth_is_token0=False)
+        self.pairs: Dict[str, PairReserves] = {}   # pair address -> reserves
+        self.by_token: Dict[str, str] = {}          # token address -> pair address
+        self.unseeded = set()                       # pairs waiting for their getReserves seed
+        self.last_block = None
+        self.sync_logs = 0
+        self.rows_written = 0
+        self.retention = {
+            RAW: float(self.settings["raw_retention"]),
+            MINUTE: float(self.settings["minute_retention"]),
+            TEN_MINUTES: float(self.settings["ten_minute_retention"])
+        }
+        self.compact_interval = float(self.settings["compact_interval"])
+        self.next_compact = clock.time() + self.compact_interval
+        self.dirty_since = 0   # Oldest point written since the last compaction; 0 rebuilds every bucket
+
+    @property
+    def weth_usd(self) -> Optional[float]:
+        """WETH price in USD from the USDC/WETH pair, None until it is known"""
+        if not self.price_pair.reserve_weth:
+            return None
+        usdc = self.price_pair.reserve_token / 10 ** USDC_DECIMALS
+        weth = self.price_pair.reserve_weth / 10 ** WETH_DECIMALS
+        return usdc / weth
+
+    def add_pair(self, token_address: str, pair_address: str):
+        """Start tracking a token's WETH pair; its reserves are seeded on the next poll"""
+        if not self.enabled or not pair_address:
+            return
+        pair = pair_address.lower()
+        if pair in self.pairs:
+            return
+        # Uniswap V2 orders pair tokens by address
+        weth_is_token0 = self.weth_address < token_address.lower()
+        self.pairs[pair] = PairReserves(token_address.lower(), pair, weth_is_token0)
+        self.by_token[token_address.lower()] = pair
+        self.unseeded.add(pair)
+
+    def remove_pair(self, token_address: str):
+        """Stop tracking a token that is no longer active"""
+        pair = self.by_token.pop(token_address.lower(), None)
+        if pair:
+            self.pairs.pop(pair, None)
+            self.unseeded.discard(pair)
+
+    def liquidity_usd(self, token_address: str) -> Optional[float]:
+        """Current pool liquidity of a token in USD (both sides), None if unknown"""
+        pair = self.by_token.get(token_address.lower())
+        reserves = self.pairs.get(pair) if pair else None
+        price = self.weth_usd
+        if reserves is None or reserves.reserve_weth is None or price is None:
+            return None
+        return 2 * reserves.reserve_weth / 10 ** WETH_DECIMALS * price
+
+    async def start(self, tokens: List[Tuple[str, str]], head: int):
+        """Track the given (token, pair) list and seed all reserves at `head`"""
+        if not self.enabled:
+            return
+        for token_address, pair_address in tokens:
+            self.add_pair(token_address, pair_address)
+        self.unseeded.add(self.price_pair.pair_address)
+        await self.seed(head)
+        self.last_block = head
+        price = self.weth_usd
+        print(f"Tracking liquidity of {len(self.pairs)} pairs from Sync logs"
+              + (f" (WETH ${price:,.2f})" if price else ""))
+
+    async def seed(self, block_number: int):
+        """Read getReserves of every unseeded pair in one multicall"""
+        if not self.unseeded:
+            return
+        # The price pair goes first so the rows of the other pairs get a WETH price
+        pairs = sorted(self.unseeded, key=lambda pair: pair != self.price_pair.pair_address)
+        self.unseeded.clear()
+        results = await self.tracker.multicall.execute([get_reserves_call(pair) for pair in pairs], block_number)
+        rows = []
+        for pair, result in zip(pairs, results):
+            if result is None:
+                continue
+            reserves = self.price_pair if pair == self.price_pair.pair_address else self.pairs.get(pair)
+            if reserves is None:
+                continue
+            reserves.update(result[0], result[1], block_number)
+            if reserves is not self.price_pair:
+                rows.append(self.series_row(reserves, block_number, block_number))
+        await self.write_rows(rows)
+
+    def ready(self, head: int) -> bool:
+        """Check if there are new blocks to follow"""
+        return self.enabled and self.last_block is not None and head > self.last_block
+
+    def addresses(self) -> List[str]:
+        """Pairs whose Sync logs are followed, the price pair first"""
+        return [self.price_pair.pair_address] + list(self.pairs)
+
+    async def poll(self, head: int) -> int:
+        """
+        Apply Sync logs of every block after the cursor up to `head`
+
+        Returns:
+            Number of liquidity_series rows written
+        """
+        if not self.ready(head):
+            return 0
+        await self.seed(self.last_block)
+        logs = await self.fetch_logs(self.addresses(), [SYNC_TOPIC], self.last_block + 1, head)
+        return await self.apply_syncs(logs, head)
+
+    async def apply_syncs(self, logs: List[Dict], head: int) -> int:
+        """
+        Update reserves from Sync logs covering every block up to `head`
+
+        Returns:
+            Number of liquidity_series rows written
+        """
+        latest: Dict[Tuple[str, int], Tuple[int, int]] = {}  # last Sync per (pair, block)
+        for log in logs:
+            reserve0, reserve1 = decode(["uint112", "uint112"], bytes(log['data']))
+            latest[(log['address'].lower(), log['blockNumber'])] = (reserve0, reserve1)
+
+        rows = []
+        for (pair, block_number), (reserve0, reserve1) in sorted(latest.items(), key=lambda item: item[0][1]):
+            if pair == self.price_pair.pair_address:
+                self.price_pair.update(reserve0, reserve1, block_number)
+                continue
+            reserves = self.pairs.get(pair)
+            if reserves is None:
+                continue
+            reserves.update(reserve0, reserve1, block_number)
+            rows.append(self.series_row(reserves, block_number, head))
+        self.last_block = head
+        await self.write_rows(rows)
+        if clock.time() >= self.next_compact:
+            await self.compact()
+        return len(rows)
+
+    async def fetch_logs(self, addresses: List[str], topics: List, from_block: int, to_block: int) -> List[Dict]:
+        """
+        Fetch raw logs of the given contracts in [from_block, to_block]
+
+        The range is split into max_block_range blocks and the addresses
+        into max_addresses per request.
+
+        Args:
+            addresses: Contracts to filter on
+            topics: eth_getLogs topic filter
+            from_block: First block of the range
+            to_block: Last block of the range (inclusive)
+
+        Returns:
+            Logs, oldest block first
+        """
+        logs = []
+        while from_block <= to_block:
+            end = min(to_block, from_block + self.max_block_range - 1)
+            for start in range(0, len(addresses), self.max_addresses):
+                await rate_limiter.acquire("infura")
+                logs.extend(await self.tracker.web3.eth.get_logs({
+                    'address': [Web3.to_checksum_address(address)
+                                for address in addresses[start:start + self.max_addresses]],
+                    'topics': topics,
+                    'fromBlock': from_block,
+                    'toBlock': end
+                }))
+            from_block = end + 1
+        self.sync_logs += sum(1 for log in logs if Web3.to_hex(log['topics'][0]) == SYNC_TOPIC)
+        return logs
+
+    def series_row(self, reserves: PairReserves, block_number: int, head: int) -> Tuple:
+        """Raw liquidity_series point for a pair's reserves at `block_number`"""
+        # Block timestamps would cost a call per block; blocks behind the head are ~12s apart
+        timestamp = int(clock.time() - (head - block_number) * SECONDS_PER_BLOCK)
+        price = self.weth_usd
+        liquidity = 2 * reserves.reserve_weth / 10 ** WETH_DECIMALS * price if price else None
+        return (
+            reserves.token_address,
+            RAW,
+            timestamp,
+            block_number,
+            liquidity,
+            float(reserves.reserve_token),
+            float(reserves.reserve_weth)
+        )
+
+    async def write_rows(self, rows: List[Tuple]):
+        """Append raw points to the session database"""
+        if not rows:
+            return
+        await self.db.write(lambda db: db.executemany('''
+            INSERT OR REPLACE INTO liquidity_series
+            (token_address, resolution, ts, block_number, liquidity_usd, reserve_token, reserve_weth)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows))
+        self.rows_written += len(rows)
+        oldest = min(row[2] for row in rows)
+        self.dirty_since = oldest if self.dirty_since is None else min(self.dirty_since, oldest)
+
+    async def compact(self):
+        """Roll raw points up into 1 and 10 minute buckets and apply the retention of each level"""
+        now = int(clock.time())
+        self.next_compact = now + self.compact_interval
+        # Rebuild every bucket a point was written to since the last pass
+        since = self.dirty_since // TEN_MINUTES * TEN_MINUTES if self.dirty_since is not None else now
+        self.dirty_since = None
+
+        def write(db):
+            for source, target in ((RAW, MINUTE), (MINUTE, TEN_MINUTES)):
+                # Bare columns next to MAX(ts) come from the bucket's last point
+                db.execute('''
+                    INSERT OR REPLACE INTO liquidity_series
+                    (token_address, resolution, ts, block_number, liquidity_usd, reserve_token, reserve_weth)
+                    SELECT token_address, ?, bucket, block_number, liquidity_usd, reserve_token, reserve_weth
+                    FROM (
+                        SELECT token_address, ts / ? * ? AS bucket, MAX(ts), block_number,
+                               liquidity_usd, reserve_token, reserve_weth
+                        FROM liquidity_series
+                        WHERE resolution = ? AND ts >= ?
+                        GROUP BY token_address, bucket
+                    )
+                ''', (target, target, target, source, since))
+            for resolution, retention in self.retention.items():
+                if retention > 0:
+                    db.execute('DELETE FROM liquidity_series WHERE resolution = ? AND ts < ?',
+                               (resolution, now - retention))
+
+        try:
+            await self.db.write(write)
+        except Exception:
+            self.dirty_since = since if self.dirty_since is None else min(self.dirty_since, since)
+            raise
+
+    def range(self, token_address: str, start_ts: int, end_ts: Optional[int] = None) -> List[Tuple]:
+        """
+        Read a token's liquidity between two Unix times at the finest resolution still covering the start
+
+        Args:
+            token_address: Token to read
+            start_ts: First second of the range
+            end_ts: Last second of the range, None for now
+
+        Returns:
+            (ts, block_number, liquidity_usd, reserve_token, reserve_weth) rows, oldest first
+        """
+        token = token_address.lower()
+        levels = self.db.query('''
+            SELECT resolution, MIN(ts) FROM liquidity_series
+            WHERE token_address = ? GROUP BY resolution ORDER BY resolution
+        ''', (token,))
+        if not levels:
+            return []
+        covering = [resolution for resolution, first in levels if first <= start_ts]
+        resolution = covering[0] if covering else min(levels, key=lambda level: level[1])[0]
+        return self.db.query('''
+            SELECT ts, block_number, liquidity_usd, reserve_token, reserve_weth
+            FROM liquidity_series
+            WHERE token_address = ? AND resolution = ? AND ts BETWEEN ? AND ?
+            ORDER BY ts ASC
+        ''', (token, resolution, start_ts, end_ts if end_ts is not None else int(clock.time())))
+
+    def change(self, token_address: str, seconds: float) -> Optional[float]:
+        """Relative liquidity change of a token over the last `seconds`, None without two points"""
+        return self.changes(seconds, [token_address]).get(token_address.lower())
+
+    def changes(self, seconds: float, token_addresses: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Relative liquidity change over the last `seconds` of many tokens in one read
+
+        Each token's change is measured at the finest resolution holding two
+        nonzero points in the window. Safe to call from a worker thread.
+
+        Args:
+            seconds: Length of the window ending now
+            token_addresses: Tokens to measure, None for every token with points in the window
+
+        Returns:
+            Token (lowercase) -> change, for tokens with two points
+        """
+        if token_addresses is not None and not token_addresses:
+            return {}
+        tokens = [token.lower() for token in token_addresses or []]
+        token_filter = f"AND token_address IN ({', '.join('?' for _ in tokens)})" if tokens else ""
+        params = [int(clock.time() - seconds)] + tokens
+        # SQLite returns the liquidity of the row holding MIN(ts) / MAX(ts) as a bare column
+        with self.db.reader() as db:
+            first = db.execute(f'''
+                SELECT token_address, resolution, MIN(ts), liquidity_usd FROM liquidity_series
+                WHERE ts >= ? AND liquidity_usd > 0 {token_filter}
+                GROUP BY token_address, resolution
+            ''', params).fetchall()
+            last = db.execute(f'''
+                SELECT token_address, resolution, MAX(ts), liquidity_usd FROM liquidity_series
+                WHERE ts >= ? AND liquidity_usd > 0 {token_filter}
+                GROUP BY token_address, resolution
+            ''', params).fetchall()
+        latest = {(token, resolution): (ts, value) for token, resolution, ts, value in last}
+        changes = {}
+        for token, resolution, first_ts, first_value in sorted(first, key=lambda row: row[1], reverse=True):
+            last_ts, last_value = latest[(token, resolution)]
+            if last_ts > first_ts:
+                changes[token] = last_value / first_value - 1  # Finer resolutions come last and win
+        return changes
@@ -0,0 +1,270 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from aiohttp import web
+from api_tracker import api_tracker
+from api_wrapper import api_wrapper
+from histogram import Histogram, LOCAL_LATENCY_BUCKETS
+from rate_limiter import rate_limiter
+
+# Defaults for the "metrics" section of config.json
+METRICS_DEFAULTS = {
+    "enabled": False,
+    "host": "127.0.0.1",
+    "port": 9108,
+    "loop_lag_interval": 0.5    # Seconds between event loop lag probes
+}
+
+def format_labels(labels: Optional[Dict]) -> str:
+    """Render a Prometheus label set"""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{key}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+class MetricsWriter:
+    """Builds a Prometheus text exposition, keeping each metric family's samples together"""
+
+    def __init__(self):
+        """Initialize an empty exposition"""
+        self.families: Dict[str, List[str]] = {}
+
+    def family(self, name: str, metric_type: str, help_text: str) -> List[str]:
+        """Return the sample lines of a metric family, creating its HELP/TYPE header once"""
+        if name not in self.families:
+            self.families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        return self.families[name]
+
+    def sample(self, name: str, metric_type: str, help_text: str, value: float,
+               labels: Optional[Dict] = None):
+        """Write one counter or gauge sample"""
+        self.family(name, metric_type, help_text).append(f"{name}{format_labels(labels)} {float(value):g}")
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram,
+                  labels: Optional[Dict] = None):
+        """Write a histogram as cumulative buckets, sum and count"""
+        lines = self.family(name, "histogram", help_text)
+        labels = labels or {}
+        for bound, count in histogram.cumulative().items():
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': f'{bound:g}'})} {count}")
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {histogram.total:g}")
+        lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        """Return the exposition text"""
+        return "\n".join(line for lines in self.families.values() for line in lines) + "\n"
+
+class MetricsServer:
+    """
+    Optional HTTP listener serving scanner telemetry in Prometheus text format
+
+    Everything is read from in-memory counters when /metrics is scraped, so a
+    scrape costs O(endpoints + stages). The server also runs an event loop lag
+    probe: a task that sleeps for a fixed interval and records how late it
+    wakes up.
+    """
+
+    def __init__(self, main, settings: Optional[Dict] = None):
+        """
+        Initialize the server
+
+        Args:
+            main: TokenTrackerMain whose scheduler, pipeline and checker are exported
+            settings: Overrides for METRICS_DEFAULTS
+        """
+        self.main = main
+        self.settings = dict(METRICS_DEFAULTS)
+        self.settings.update(settings or {})
+        self.loop_lag = Histogram(LOCAL_LATENCY_BUCKETS)
+        self.last_loop_lag = 0.0
+        self.runner = None
+        self.lag_task = None
+
+    async def start(self):
+        """Start listening and probing event loop lag"""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.settings["host"], int(self.settings["port"]))
+        await site.start()
+        self.lag_task = asyncio.create_task(self.probe_loop_lag())
+        print(f"Metrics available at http://{self.settings['host']}:{self.settings['port']}/metrics")
+
+    async def stop(self):
+        """Stop the lag probe and the listener"""
+        if self.lag_task:
+            self.lag_task.cancel()
+            await asyncio.gather(self.lag_task, return_exceptions=True)
+            self.lag_task = None
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def probe_loop_lag(self):
+        """Measure how late a fixed sleep wakes up, i.e. how long the loop was blocked"""
+        interval = max(0.05, float(self.settings["loop_lag_interval"]))
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            self.last_loop_lag = max(0.0, time.monotonic() - started - interval)
+            self.loop_lag.observe(self.last_loop_lag)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the current metrics"""
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    def render(self) -> str:
+        """Collect all metrics into Prometheus text format"""
+        out = MetricsWriter()
+        self.write_api_metrics(out)
+        self.write_pipeline_metrics(out)
+        self.write_scanner_metrics(out)
+        return out.render()
+
+    def write_api_metrics(self, out: MetricsWriter):
+        """API call counters, latency/size histograms, limiter and cache counters"""
+        for endpoint, stats in api_tracker.calls_by_endpoint.items():
+            labels = {"endpoint": endpoint}
+            out.sample("gx_api_calls_total", "counter", "API calls made", stats["total_calls"], labels)
+            out.sample("gx_api_success_total", "counter", "API calls with a usable response",
+                       stats["success_count"], labels)
+            out.sample("gx_api_empty_responses_total", "counter", "API calls with an empty response",
+                       stats["empty_response_count"], labels)
+            out.sample("gx_api_errors_total", "counter", "API calls that failed", stats["error_count"], labels)
+            out.sample("gx_api_rate_limited_total", "counter", "API calls rejected by upstream rate limits",
+                       stats["rate_limit_count"], labels)
+            for code, count in sorted(stats["status_codes"].items()):
+                out.sample("gx_api_responses_total", "counter", "API responses by status code", count,
+                           {**labels, "code": code})
+            out.histogram("gx_api_latency_seconds", "API request latency", stats["latency"], labels)
+            out.histogram("gx_api_response_bytes", "API response body size", stats["response_size"], labels)
+
+        for endpoint, count in api_tracker.coalesced_by_endpoint.items():
+            out.sample("gx_api_coalesced_total", "counter", "Requests that joined an identical in-flight request",
+                       count, {"endpoint": endpoint})
+
+        for endpoint in sorted(set(api_wrapper.cache.hits) | set(api_wrapper.cache.misses)):
+            labels = {"endpoint": endpoint}
+            out.sample("gx_cache_hits_total", "counter", "Response cache hits",
+                       api_wrapper.cache.hits.get(endpoint, 0), labels)
+            out.sample("gx_cache_misses_total", "counter", "Response cache misses",
+                       api_wrapper.cache.misses.get(endpoint, 0), labels)
+        out.sample("gx_cache_entries", "gauge", "Responses currently cached", len(api_wrapper.cache.entries))
+        out.sample("gx_cache_evictions_total", "counter", "Responses evicted from the cache",
+                   api_wrapper.cache.evictions)
+
+        for upstream, bucket in rate_limiter.buckets.items():
+            labels = {"upstream": upstream}
+            out.sample("gx_rate_limiter_acquired_total", "counter", "Rate limiter acquisitions",
+                       bucket.acquired_count, labels)
+            out.sample("gx_rate_limiter_throttled_total", "counter", "Acquisitions that had to wait",
+                       bucket.throttled_count, labels)
+            out.sample("gx_rate_limiter_wait_seconds_total", "counter", "Seconds spent waiting for budget",
+                       bucket.total_wait, labels)
+
+        router = self.main.tracker.router
+        for endpoint in router.endpoints:
+            labels = {"endpoint": endpoint.name}
+            out.sample("gx_rpc_requests_total", "counter", "RPC requests sent to the endpoint",
+                       endpoint.requests, labels)
+            out.sample("gx_rpc_failures_total", "counter", "RPC requests that failed on the endpoint",
+                       endpoint.failures, labels)
+            out.sample("gx_rpc_error_rate", "gauge", "Error rate over the endpoint's rolling window",
+                       endpoint.error_rate, labels)
+            out.sample("gx_rpc_in_flight", "gauge", "RPC requests currently on the endpoint",
+                       endpoint.in_flight, labels)
+            out.histogram("gx_rpc_latency_seconds", "RPC request latency", endpoint.latency, labels)
+        out.sample("gx_rpc_failovers_total", "counter", "RPC requests retried on another endpoint", router.failovers)
+        out.sample("gx_rpc_hedged_total", "counter", "RPC reads also sent to a second endpoint",
+                   router.hedged_requests)
+
+        now = time.monotonic()
+        for index, key in enumerate(self.main.key_manager.keys):
+            labels = {"key": str(index)}
+            out.sample("gx_infura_key_requests_today", "gauge", "Requests counted against the key's daily quota",
+                       key.requests_today, labels)
+            out.sample("gx_infura_key_in_flight", "gauge", "Requests currently using the key", key.in_flight, labels)
+            out.sample("gx_infura_key_rate_limited_total", "counter", "429 responses received on the key",
+                       key.rate_limited, labels)
+            out.sample("gx_infura_key_cooldown_seconds", "gauge", "Seconds until the key is used again",
+                       max(0.0, key.cooldown_until - now), labels)
+
+    def write_pipeline_metrics(self, out: MetricsWriter):
+        """Per-stage queue depth, concurrency and throughput"""
+        pipeline = self.main.pipeline
+        if not pipeline:
+            return
+        for stage in pipeline.stages:
+            metrics = stage.metrics
+            labels = {"stage": metrics.name}
+            out.sample("gx_pipeline_queue_depth", "gauge", "Items waiting in front of the stage",
+                       stage.queue.qsize(), labels)
+            out.sample("gx_pipeline_queue_capacity", "gauge", "Capacity of the stage queue",
+                       metrics.queue_capacity, labels)
+            out.sample("gx_pipeline_workers", "gauge", "Workers of the stage", metrics.concurrency, labels)
+            out.sample("gx_pipeline_busy_workers", "gauge", "Workers currently handling an item",
+                       metrics.busy, labels)
+            out.sample("gx_pipeline_processed_total", "counter", "Items handled by the stage",
+                       metrics.processed, labels)
+            out.sample("gx_pipeline_failed_total", "counter", "Items that failed in the stage",
+                       metrics.failed, labels)
+            out.sample("gx_pipeline_busy_seconds_total", "counter", "Seconds spent in the stage handler",
+                       metrics.busy_time, labels)
+            out.sample("gx_pipeline_blocked_seconds_total", "counter",
+                       "Seconds spent waiting for room in the next stage", metrics.blocked_time, labels)
+
+    def write_scanner_metrics(self, out: MetricsWriter):
+        """Scheduler, block cursor, sqlite and event loop health"""
+        scheduler = self.main.scheduler
+        out.sample("gx_active_tokens", "gauge", "Tokens scheduled for rescan", scheduler.scheduled_rescans)
+        out.sample("gx_scans_in_progress", "gauge", "Tokens currently being scanned", len(scheduler.in_progress))
+        out.sample("gx_new_pairs_pending", "gauge", "New pairs waiting for their first scan", scheduler.pending_new)
+        out.sample("gx_rescan_lag_seconds", "gauge", "How long the most overdue rescan has been waiting",
+                   scheduler.rescan_lag())
+
+        ingester = self.main.ingester
+        if ingester and ingester.last_block is not None:
+            out.sample("gx_ingest_block", "gauge", "Last block whose PairCreated logs were fetched",
+                       ingester.last_block)
+            committed = ingester.committed_block()
+            if committed is not None:
+                out.sample("gx_committed_block", "gauge", "Last block whose pairs were all analyzed", committed)
+
+        liquidity = self.main.liquidity
+        out.sample("gx_liquidity_tracked_pairs", "gauge", "Pairs whose reserves are followed from Sync logs",
+                   len(liquidity.pairs))
+        out.sample("gx_liquidity_sync_logs_total", "counter", "Sync logs fetched", liquidity.sync_logs)
+        out.sample("gx_liquidity_rows_total", "counter", "Raw liquidity_series points written", liquidity.rows_written)
+        if liquidity.weth_usd is not None:
+            out.sample("gx_weth_usd", "gauge", "WETH price from the USDC/WETH pair", liquidity.weth_usd)
+
+        for reason, count in sorted(self.main.activity.triggers.items()):
+            out.sample("gx_activity_rescans_total", "counter", "Rescans moved forward by on-chain activity",
+                       count, {"reason": reason})
+        for event, count in sorted(self.main.activity.logs_seen.items()):
+            out.sample("gx_activity_events_total", "counter", "Watched on-chain events seen",
+                       count, {"event": event})
+
+        out.histogram("gx_sqlite_write_seconds", "Time to write one scan to sqlite",
+                      self.main.checker.db_write_latency)
+        for outcome, count in sorted(self.main.checker.scan_writes.items()):
+            out.sample("gx_scan_writes_total", "counter", "Scans persisted by whether they changed the stored record",
+                       count, {"outcome": outcome})
+        db = self.main.checker.db
+        out.histogram("gx_sqlite_commit_seconds", "Time to commit one writer-thread transaction",
+                      db.commit_latency)
+        out.histogram("gx_sqlite_batch_writes", "Writes committed per writer-thread transaction",
+                      db.batch_sizes)
+        out.sample("gx_sqlite_write_queue", "gauge", "Writes waiting for the writer thread", db.queue_depth)
+        out.sample("gx_sqlite_writes_total", "counter", "Writes committed by the writer thread", db.writes)
+        out.sample("gx_sqlite_failed_writes_total", "counter", "Writes rolled back by the writer thread",
+                   db.failed_writes)
+        out.histogram("gx_event_loop_lag_seconds", "Event loop scheduling delay", self.loop_lag)
+        out.sample("gx_event_loop_lag_last_seconds", "gauge", "Most recent event loop lag probe",
+                   self.last_loop_lag)
@@ -0,0 +1,173 @@
+import itertools
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+from eth_abi import decode, encode
+from eth_abi.exceptions import DecodingError
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+from rate_limiter import rate_limiter
+
+# Multicall3 is deployed at the same address on mainnet and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# aggregate3((address target, bool allowFailure, bytes callData)[]) returns ((bool success, bytes returnData)[])
+AGGREGATE3_SELECTOR = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+@dataclass
+class Call:
+    """One contract read: `signature` like "getReserves()" with ABI output types"""
+    target: str
+    signature: str
+    args: Sequence[Any] = ()
+    output_types: Sequence[str] = ()
+
+    def encode(self) -> bytes:
+        """ABI-encode the call data"""
+        selector = Web3.keccak(text=self.signature)[:4]
+        arg_types = self.signature[self.signature.index("(") + 1:-1]
+        arg_types = [t for t in arg_types.split(",") if t] if arg_types else []
+        return bytes(selector) + (encode(arg_types, list(self.args)) if arg_types else b"")
+
+def decode_output(output_types: Sequence[str], data: bytes) -> Optional[Tuple]:
+    """
+    Decode return data, None if the call returned nothing usable
+
+    Some older tokens (MKR, SAI) return bytes32 instead of string from
+    name()/symbol(); those are decoded as a null-stripped string.
+    """
+    if not data:
+        return None
+    try:
+        return tuple(decode(list(output_types), data))
+    except (DecodingError, OverflowError, ValueError):
+        if list(output_types) == ["string"] and len(data) == 32:
+            return (data.rstrip(b"\x00").decode("utf-8", errors="replace"),)
+        return None
+
+class Multicall:
+    """
+    Packs many contract reads into single eth_calls through Multicall3
+
+    Calls are chunked into `batch_size` and every chunk is executed at the
+    same block, so results across tokens and pairs are consistent. Failed
+    inner calls yield None rather than failing the batch. If Multicall3 is
+    missing (no code at the address, or aggregate3 reverts) the chunk and
+    every later one are sent as JSON-RPC batches of plain eth_calls through
+    the router instead. Transport errors (timeouts, resets, 429s) are raised
+    to the caller and leave Multicall3 in use.
+    """
+
+    def __init__(self, web3, router, address: str = MULTICALL3_ADDRESS, batch_size: int = 200):
+        """
+        Initialize the aggregator
+
+        Args:
+            web3: AsyncWeb3 client to call through
+            router: RPCRouter sending the JSON-RPC batches of the fallback
+            address: Multicall3 contract address
+            batch_size: Maximum inner calls per eth_call
+        """
+        self.web3 = web3
+        self.router = router
+        self.address = Web3.to_checksum_address(address)
+        self.batch_size = max(1, int(batch_size))
+        self.multicall_available = True
+        self.request_ids = itertools.count(1)
+
+    async def execute(self, calls: List[Call], block_identifier: Optional[int] = None) -> List[Optional[Tuple]]:
+        """
+        Execute reads and return their decoded outputs in call order
+
+        Args:
+            calls: Reads to perform
+            block_identifier: Block to read at, defaults to the current head
+
+        Returns:
+            Decoded output tuple per call, None where the call failed
+        """
+        if not calls:
+            return []
+        if block_identifier is None:
+            await rate_limiter.acquire("infura")
+            block_identifier = await self.web3.eth.block_number
+
+        results = []
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            raw = None
+            if self.multicall_available:
+                raw = await self.aggregate(chunk, block_identifier)
+            if raw is None:
+                raw = await self.batch_calls(chunk, block_identifier)
+            results.extend(decode_output(call.output_types, data) if ok else None
+                           for call, (ok, data) in zip(chunk, raw))
+        return results
+
+    async def aggregate(self, calls: List[Call], block_identifier: int) -> Optional[List[Tuple[bool, bytes]]]:
+        """Run calls through aggregate3, None if Multicall3 cannot be used"""
+        payload = [(Web3.to_checksum_address(call.target), True, call.encode()) for call in calls]
+        data = bytes(AGGREGATE3_SELECTOR) + encode(["(address,bool,bytes)[]"], [payload])
+        await rate_limiter.acquire("infura")
+        try:
+            response = await self.web3.eth.call({"to": self.address, "data": Web3.to_hex(data)}, block_identifier)
+        except Exception as e:
+            if not self.is_revert(e):
+                raise
+            self.multicall_available = False
+            print(f"Multicall3 unavailable, using JSON-RPC batches: {str(e)}")
+            return None
+        if not response:
+            # No contract code at the address: eth_call returns empty data
+            self.multicall_available = False
+            print("Multicall3 not deployed, using JSON-RPC batches")
+            return None
+        return [(bool(ok), bytes(ret)) for ok, ret in decode(["(bool,bytes)[]"], bytes(response))[0]]
+
+    @staticmethod
+    def is_revert(error: Exception) -> bool:
+        """Check if an eth_call error is the contract reverting rather than a transport failure"""
+        return isinstance(error, ContractLogicError) or "execution reverted" in str(error).lower()
+
+    async def batch_calls(self, calls: List[Call], block_identifier: int) -> List[Tuple[bool, bytes]]:
+        """Send calls as one JSON-RPC batch of eth_calls"""
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        requests = []
+        for call in calls:
+            requests.append({
+                "jsonrpc": "2.0",
+                "id": next(self.request_ids),
+                "method": "eth_call",
+                "params": [{"to": Web3.to_checksum_address(call.target), "data": Web3.to_hex(call.encode())}, block]
+            })
+        await rate_limiter.acquire("infura", len(requests))
+        replies = await self.router.request_batch(requests)
+
+        if isinstance(replies, dict):
+            raise RuntimeError(f"JSON-RPC batch rejected: {replies.get('error', replies)}")
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for request in requests:
+            reply = by_id.get(request["id"], {})
+            if "result" in reply and reply["result"] not in (None, "0x"):
+                results.append((True, bytes(Web3.to_bytes(hexstr=reply["result"]))))
+            else:
+                results.append((False, b""))
+        return results
+
+def token_metadata_calls(token_address: str) -> List[Call]:
+    """name, symbol, decimals and totalSupply reads for a token"""
+    return [
+        Call(token_address, "name()", (), ["string"]),
+        Call(token_address, "symbol()", (), ["string"]),
+        Call(token_address, "decimals()", (), ["uint8"]),
+        Call(token_address, "totalSupply()", (), ["uint256"])
+    ]
+
+def get_pair_call(factory_address: str, token_address: str, weth_address: str) -> Call:
+    """Uniswap V2 factory getPair(token, WETH) read"""
+    return Call(factory_address, "getPair(address,address)",
+                (Web3.to_checksum_address(token_address), Web3.to_checksum_address(weth_address)), ["address"])
+
+def get_reserves_call(pair_address: str) -> Call:
+    """Uniswap V2 pair getReserves() read"""
+    return Call(pair_address, "getReserves()", (), ["uint112", "uint112", "uint32"])
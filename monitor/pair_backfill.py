@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List
+from pair_ingester import is_too_many_results
+
+# Defaults for the "backfill" section of config.json
+BACKFILL_DEFAULTS = {
+    "chunk_size": 2000,      # Blocks per eth_getLogs request to start with
+    "min_chunk_size": 1,     # Never split a range below this many blocks
+    "max_retries": 3,        # Attempts per range for other errors (rate limits, timeouts), and retry rounds
+    "retry_delay": 2.0,      # Seconds to back off before retrying a failed range
+    "grow_after": 10         # Successful chunks in a row before the chunk size doubles again
+}
+
+class PairBackfill:
+    """
+    Fetches historical PairCreated events over a block range in parallel
+
+    The range is cut into chunks that are handed to one fetcher per client.
+    Each client is pinned to one RPC endpoint (an Infura key or node_rpc) and
+    only fails over to the others on errors. A chunk failing with a "too many results"
+    error is halved and both halves are requeued, and the chunk size used for
+    new chunks is halved with it. After grow_after successful chunks in a row
+    it doubles again, up to the configured chunk_size. Other errors (rate
+    limits, timeouts) are retried with backoff. A range that still fails is
+    retried again in rounds once the rest of the range is done, so it does
+    not hold the cursor back for the live poller. Events are passed to
+    `on_events` as soon as their chunk arrives, so analysis starts before the
+    backfill ends.
+    """
+
+    def __init__(self, ingester, web3_clients: List, settings: Dict = None):
+        """
+        Initialize the backfill
+
+        Args:
+            ingester: PairCreatedIngester used to decode logs and hold the block cursor
+            web3_clients: AsyncWeb3 clients, one concurrent fetcher each (see TokenTracker.pinned_clients)
+            settings: Overrides for BACKFILL_DEFAULTS
+        """
+        self.ingester = ingester
+        self.settings = dict(BACKFILL_DEFAULTS)
+        self.settings.update(settings or {})
+        self.web3_clients = list(web3_clients) or [ingester.tracker.web3]
+        self.max_chunk_size = max(1, int(self.settings["chunk_size"]))
+        self.chunk_size = self.max_chunk_size
+        self.min_chunk_size = max(1, int(self.settings["min_chunk_size"]))
+        self.grow_after = max(1, int(self.settings["grow_after"]))
+
+    @staticmethod
+    def is_too_many_results(error: Exception) -> bool:
+        """Check if a provider error means the block range must be split"""
+        return is_too_many_results(error)
+
+    async def run(self, from_block: int, to_block: int,
+                  on_events: Callable[[List[Dict]], Awaitable[None]]) -> int:
+        """
+        Backfill [from_block, to_block] and advance the ingester cursor
+
+        The ingester's `last_block` only moves over contiguous finished chunks,
+        so a crash mid-backfill never persists a cursor past unfetched blocks.
+
+        Returns:
+            Number of PairCreated events found
+        """
+        if to_block < from_block:
+            return 0
+
+        self.ingester.last_block = from_block - 1
+        pending = deque()          # Ranges to (re)fetch before cutting new chunks
+        finished = {}              # start block -> end block of fetched chunks
+        failed = []                # Ranges out of retries, fetched again after the rest
+        state = {"next_block": from_block, "events": 0, "fetched_blocks": 0, "successes": 0}
+        total_blocks = to_block - from_block + 1
+        start_time = time.time()
+
+        def next_range():
+            if pending:
+                return pending.popleft()
+            if state["next_block"] > to_block:
+                return None
+            start = state["next_block"]
+            end = min(to_block, start + self.chunk_size - 1)
+            state["next_block"] = end + 1
+            return start, end, 0
+
+        def advance_cursor():
+            while self.ingester.last_block + 1 in finished:
+                self.ingester.last_block = finished.pop(self.ingester.last_block + 1)
+
+        def print_progress():
+            done = state["fetched_blocks"]
+            elapsed = time.time() - start_time
+            eta = elapsed / done * (total_blocks - done) if done else 0
+            print(f"\rBackfill: {done}/{total_blocks} blocks ({done / total_blocks:.0%}), "
+                  f"{state['events']} pairs, chunk {self.chunk_size}, ETA {int(eta)}s ", end="", flush=True)
+
+        async def fetcher(web3):
+            while True:
+                block_range = next_range()
+                if block_range is None:
+                    if state["next_block"] > to_block and not pending:
+                        return
+                    await asyncio.sleep(0.1)  # Another fetcher may still requeue a split range
+                    continue
+                start, end, attempts = block_range
+                try:
+                    events = await self.ingester.fetch_range(start, end, web3=web3)
+                except Exception as e:
+                    state["successes"] = 0
+                    if self.is_too_many_results(e) and end - start + 1 > self.min_chunk_size:
+                        middle = (start + end) // 2
+                        pending.appendleft((middle + 1, end, 0))
+                        pending.appendleft((start, middle, 0))
+                        self.chunk_size = max(self.min_chunk_size, min(self.chunk_size, end - start + 1) // 2)
+                    elif attempts + 1 < self.settings["max_retries"]:
+                        await asyncio.sleep(self.settings["retry_delay"] * (attempts + 1))
+                        pending.append((start, end, attempts + 1))
+                    else:
+                        failed.append((start, end, str(e)))
+                    continue
+
+                state["successes"] += 1
+                if state["successes"] >= self.grow_after and self.chunk_size < self.max_chunk_size:
+                    self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+                    state["successes"] = 0
+                state["events"] += len(events)
+                state["fetched_blocks"] += end - start + 1
+                if events:
+                    await on_events(events)
+                finished[start] = end
+                advance_cursor()
+                print_progress()
+
+        await asyncio.gather(*(fetcher(web3) for web3 in self.web3_clients))
+        # Ranges out of retries get further rounds with a growing backoff, still in parallel
+        for round_number in range(int(self.settings["max_retries"])):
+            if not failed:
+                break
+            delay = self.settings["retry_delay"] * 2 ** (round_number + 1)
+            print(f"\nBackfill retrying {len(failed)} failed ranges in {delay:g}s")
+            await asyncio.sleep(delay)
+            pending.extend((start, end, 0) for start, end, _ in failed)
+            failed.clear()
+            await asyncio.gather(*(fetcher(web3) for web3 in self.web3_clients))
+
+        for start, end, error in failed:
+            # The cursor stays behind the first of these, so live polling fetches them again
+            print(f"\nBackfill giving up on blocks {start}-{end}: {error}")
+        print(f"\nBackfill complete: {state['fetched_blocks']}/{total_blocks} blocks, {state['events']} pairs "
+              f"in {time.time() - start_time:.1f}s ({len(failed)} ranges left for live polling)")
+        return state["events"]
@@ -0,0 +1,147 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from web3 import Web3
+from rate_limiter import rate_limiter
+
+# keccak256 of the Uniswap V2 factory PairCreated event signature
+PAIR_CREATED_TOPIC = Web3.to_hex(Web3.keccak(text="PairCreated(address,address,address,uint256)"))
+
+# Post-merge Ethereum produces a block every 12 seconds
+SECONDS_PER_BLOCK = 12
+
+# Provider error fragments meaning the range returned too many logs and must be split. Rate limit
+# errors (Infura also answers those with -32005 / "limit exceeded") must not match: they are retried.
+TOO_MANY_RESULTS_HINTS = (
+    "query returned more than",
+    "more than 10000 results",
+    "too many results",
+    "response size exceeded"
+)
+
+def is_too_many_results(error: Exception) -> bool:
+    """Check if a provider error means the block range must be split"""
+    message = str(error).lower()
+    return any(hint in message for hint in TOO_MANY_RESULTS_HINTS)
+
+class PairCreatedIngester:
+    """
+    Block-cursor ingestion of PairCreated events with stateless eth_getLogs
+
+    Unlike eth_newFilter there is no server-side state: any RPC endpoint or
+    Infura key can answer the next query, so key rotation or an expired
+    filter cannot make us miss pairs. The cursor (`last_block`) is the last
+    block whose logs have been fetched; `committed_block()` is the last block
+    whose pairs have all finished analysis, which is what gets persisted.
+    """
+
+    def __init__(self, tracker, last_block: Optional[int] = None,
+                 min_poll_interval: float = 1.0, max_block_range: int = 2000):
+        """
+        Initialize the ingester
+
+        Args:
+            tracker: TokenTracker providing web3, factory contract and WETH address
+            last_block: Last block already ingested, None to start at the chain head
+            min_poll_interval: Seconds between head checks while waiting for a block
+            max_block_range: Largest block range requested in one eth_getLogs call
+        """
+        self.tracker = tracker
+        self.last_block = last_block
+        self.min_poll_interval = min_poll_interval
+        self.max_block_range = max_block_range
+        self.poll_delay = min_poll_interval
+        self.logs_calls = 0
+        # Block number -> pairs from that block still waiting for analysis
+        self.pending_blocks = Counter()
+
+    async def get_head(self) -> int:
+        """Get the current chain head block number"""
+        await rate_limiter.acquire("infura")
+        return await self.tracker.web3.eth.block_number
+
+    async def fetch_range(self, from_block: int, to_block: int, web3=None) -> List[Dict]:
+        """
+        Fetch and decode PairCreated events in [from_block, to_block]
+
+        Args:
+            from_block: First block of the range
+            to_block: Last block of the range (inclusive)
+            web3: Client to query, defaults to the tracker's current client
+
+        Returns:
+            Decoded events (with 'args' and 'blockNumber'), oldest first
+        """
+        await rate_limiter.acquire("infura")
+        self.logs_calls += 1
+        logs = await (web3 or self.tracker.web3).eth.get_logs({
+            'address': self.tracker.uniswap_factory_address,
+            'topics': [PAIR_CREATED_TOPIC],
+            'fromBlock': from_block,
+            'toBlock': to_block
+        })
+        pair_created = self.tracker.factory_contract.events.PairCreated()
+        return [pair_created.process_log(log) for log in logs]
+
+    async def poll(self) -> List[Dict]:
+        """
+        Fetch PairCreated events for every block after the cursor up to the head
+
+        eth_getLogs is only called when the head has moved, so idle polling
+        costs a single eth_blockNumber. A range with too many results is
+        halved until it fits. If a later range fails, the events fetched so
+        far are returned and the cursor stays behind the failed range.
+        """
+        head = await self.get_head()
+        if self.last_block is None:
+            self.last_block = head
+            return []
+        if head <= self.last_block:
+            self.poll_delay = self.min_poll_interval
+            return []
+
+        events = []
+        block_range = self.max_block_range
+        while self.last_block < head:
+            to_block = min(head, self.last_block + block_range)
+            try:
+                events.extend(await self.fetch_range(self.last_block + 1, to_block))
+            except Exception as e:
+                if is_too_many_results(e) and to_block > self.last_block + 1:
+                    block_range = max(1, (to_block - self.last_block) // 2)
+                    continue
+                if events:
+                    return events
+                raise
+            self.last_block = to_block
+
+        # A new block just arrived; the next one is roughly a block time away
+        self.poll_delay = max(self.min_poll_interval, SECONDS_PER_BLOCK - self.min_poll_interval)
+        return events
+
+    def extract_weth_pair(self, event: Dict) -> Optional[Tuple[str, str]]:
+        """Return (non-WETH token, pair) for WETH pairs, None for any other pair"""
+        token0 = event['args']['token0']
+        token1 = event['args']['token1']
+        pair = event['args']['pair']
+        weth = self.tracker.weth_address.lower()
+        if token0.lower() == weth:
+            return token1, pair
+        if token1.lower() == weth:
+            return token0, pair
+        return None
+
+    def track(self, block_number: int):
+        """Record that a pair from `block_number` was queued for analysis"""
+        self.pending_blocks[block_number] += 1
+
+    def complete(self, block_number: int):
+        """Record that a queued pair from `block_number` finished analysis"""
+        self.pending_blocks[block_number] -= 1
+        if self.pending_blocks[block_number] <= 0:
+            del self.pending_blocks[block_number]
+
+    def committed_block(self) -> Optional[int]:
+        """Last block whose pairs have all been analyzed, safe to resume after"""
+        if self.pending_blocks:
+            return min(min(self.pending_blocks) - 1, self.last_block)
+        return self.last_block
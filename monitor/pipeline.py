@@ -0,0 +1,200 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Defaults for the "pipeline" section of config.json
+PIPELINE_DEFAULTS = {
+    "queue_size": 16,          # Max items waiting in front of each stage
+    "classify_workers": 1,     # Concurrent classify tasks (CPU only, no I/O)
+    "persist_workers": 1,      # Concurrent sqlite writers
+    "render_workers": 1        # Concurrent display tasks, 1 keeps tables from interleaving
+}
+
+@dataclass
+class StageMetrics:
+    name: str
+    concurrency: int
+    queue_capacity: int
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    busy: int = 0
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0       # Seconds spent inside the stage handler
+    blocked_time: float = 0.0    # Seconds waiting for room in the next stage's queue
+
+    @property
+    def avg_time(self) -> float:
+        """Average handler time per item in seconds"""
+        handled = self.processed + self.failed
+        return self.busy_time / handled if handled else 0.0
+
+class PipelineStage:
+    """
+    One stage of the pipeline: a bounded input queue drained by N workers
+
+    Each worker runs the stage handler on an item and puts the result on the
+    next stage's queue. When that queue is full the put waits, so a slow stage
+    holds back the stages in front of it instead of letting work pile up.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]],
+                 concurrency: int = 1, queue_size: int = 16):
+        """
+        Initialize the stage
+
+        Args:
+            name: Stage name used in metrics
+            handler: Coroutine function taking an item and returning the item for the next stage
+            concurrency: Number of workers running the handler
+            queue_size: Capacity of the input queue
+        """
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, int(concurrency))
+        self.queue = asyncio.Queue(maxsize=max(1, int(queue_size)))
+        self.metrics = StageMetrics(name, self.concurrency, self.queue.maxsize)
+        self.next_stage: Optional["PipelineStage"] = None
+
+    async def put(self, item: Any):
+        """Queue an item, waiting while the stage is full"""
+        await self.queue.put(item)
+        self.metrics.queue_depth = self.queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded asyncio queues
+
+    Items enter the first stage with `submit()` and leave after the last stage
+    through `await on_complete(item, ok)`. An item whose handler raises is passed
+    to `await on_error(item, error)` and then completed with ok=False.
+    """
+
+    def __init__(self, on_complete: Callable[[Any, bool], Awaitable[None]],
+                 on_error: Optional[Callable[[Any, Exception], Awaitable[None]]] = None):
+        """Initialize an empty pipeline"""
+        self.stages: List[PipelineStage] = []
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.tasks: List[asyncio.Task] = []
+
+    def add_stage(self, name: str, handler: Callable[[Any], Awaitable[Any]],
+                  concurrency: int = 1, queue_size: int = 16) -> PipelineStage:
+        """Append a stage fed by the previous one"""
+        stage = PipelineStage(name, handler, concurrency, queue_size)
+        if self.stages:
+            self.stages[-1].next_stage = stage
+        self.stages.append(stage)
+        return stage
+
+    async def submit(self, item: Any):
+        """Feed an item into the first stage, waiting while it is full"""
+        await self.stages[0].put(item)
+
+    def add_source(self, source: Callable[[], Awaitable[Any]]):
+        """
+        Run a producer task that keeps feeding the first stage
+
+        Args:
+            source: Coroutine function returning the next item, awaited in a loop
+        """
+        async def feed():
+            while True:
+                await self.submit(await source())
+        self.tasks.append(asyncio.create_task(feed()))
+
+    def start(self):
+        """Start the workers of every stage"""
+        for stage in self.stages:
+            for _ in range(stage.concurrency):
+                self.tasks.append(asyncio.create_task(self.run_stage(stage)))
+
+    async def stop(self):
+        """Cancel all workers and producers and wait for them to exit"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def run_stage(self, stage: PipelineStage):
+        """Worker loop of a stage"""
+        metrics = stage.metrics
+        while True:
+            item = await stage.queue.get()
+            metrics.queue_depth = stage.queue.qsize()
+            metrics.busy += 1
+            started = time.monotonic()
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                metrics.busy_time += time.monotonic() - started
+                metrics.failed += 1
+                metrics.busy -= 1
+                await self.fail(item, e)
+                continue
+            metrics.busy_time += time.monotonic() - started
+            metrics.processed += 1
+
+            try:
+                if stage.next_stage:
+                    blocked = time.monotonic()
+                    await stage.next_stage.put(result)
+                    metrics.blocked_time += time.monotonic() - blocked
+                else:
+                    await self.finish(result, True)
+            finally:
+                metrics.busy -= 1
+
+    async def fail(self, item: Any, error: Exception):
+        """Report a failed item and complete it"""
+        if self.on_error:
+            try:
+                await self.on_error(item, error)
+            except Exception as e:
+                print(f"Pipeline error handler failed: {str(e)}")
+        await self.finish(item, False)
+
+    async def finish(self, item: Any, ok: bool):
+        """Hand an item that left the pipeline to the completion callback"""
+        try:
+            await self.on_complete(item, ok)
+        except Exception as e:
+            print(f"Pipeline completion handler failed: {str(e)}")
+
+    def in_flight(self) -> int:
+        """Items queued or being handled in any stage"""
+        return sum(stage.queue.qsize() + stage.metrics.busy for stage in self.stages)
+
+    def print_stats(self):
+        """Print per-stage concurrency, queue depth and throughput"""
+        table = Table(title="Pipeline Stages", border_style="blue")
+        table.add_column("Stage", style="cyan")
+        table.add_column("Workers", style="green")
+        table.add_column("Busy", style="green")
+        table.add_column("Queue", style="yellow")
+        table.add_column("Max Queue", style="yellow")
+        table.add_column("Processed", style="green")
+        table.add_column("Failed", style="red")
+        table.add_column("Avg Time", style="magenta")
+        table.add_column("Blocked", style="magenta")
+
+        for stage in self.stages:
+            metrics = stage.metrics
+            table.add_row(
+                metrics.name,
+                str(metrics.concurrency),
+                str(metrics.busy),
+                f"{stage.queue.qsize()}/{metrics.queue_capacity}",
+                str(metrics.max_queue_depth),
+                str(metrics.processed),
+                str(metrics.failed),
+                f"{metrics.avg_time:.2f}s",
+                f"{metrics.blocked_time:.1f}s"
+            )
+        console.print(table)
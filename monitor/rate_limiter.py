@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from rich.console import Console
+
+console = Console()
+
+# Default limits per upstream, overridden by the "rate_limits" section of config.json
+# rate: sustained requests per second, burst: requests allowed back to back
+DEFAULT_RATE_LIMITS = {
+    "goplus": {"rate": 0.5, "burst": 5},
+    "honeypot": {"rate": 0.5, "burst": 5},
+    "infura": {"rate": 10.0, "burst": 20}
+}
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        """Initialize a full bucket refilling at `rate` tokens per second"""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.acquired_count = 0
+        self.throttled_count = 0
+        self.total_wait = 0.0
+
+    def refill(self):
+        """Add the tokens earned since the last refill, capped at capacity"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket, waiting only if the budget is exhausted
+
+        Waiters queue on the lock, so they are served in arrival order.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting for budget
+        """
+        async with self.lock:
+            self.refill()
+            wait = 0.0
+            if self.tokens < tokens:
+                wait = (tokens - self.tokens) / self.rate
+                self.throttled_count += 1
+                self.total_wait += wait
+                await asyncio.sleep(wait)
+                self.refill()
+            self.tokens -= tokens
+            self.acquired_count += 1
+            return wait
+
+class RateLimiter:
+    def __init__(self):
+        """Initialize limiter with one bucket per default upstream"""
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.configure({})
+
+    def configure(self, limits: Optional[Dict]):
+        """
+        (Re)build the buckets from config, falling back to the defaults
+
+        Args:
+            limits: Mapping of upstream name to {"rate": ..., "burst": ...}
+        """
+        merged = {name: dict(settings) for name, settings in DEFAULT_RATE_LIMITS.items()}
+        for name, settings in (limits or {}).items():
+            merged.setdefault(name, {}).update(settings)
+
+        self.buckets = {}
+        for name, settings in merged.items():
+            rate = float(settings.get("rate", 1.0))
+            self.buckets[name] = TokenBucket(rate, float(settings.get("burst", rate)))
+
+    async def acquire(self, upstream: str, tokens: float = 1.0) -> float:
+        """Acquire budget for one call to `upstream`; unknown upstreams are unlimited"""
+        bucket = self.buckets.get(upstream)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire(tokens)
+
+    def print_stats(self):
+        """Print per-upstream limiter statistics"""
+        for name, bucket in self.buckets.items():
+            console.print(
+                f"[cyan]{name}[/]: {bucket.rate:g}/s burst {bucket.capacity:g} - "
+                f"{bucket.acquired_count} calls, {bucket.throttled_count} throttled, "
+                f"{bucket.total_wait:.1f}s waited"
+            )
+
+# Global instance
+rate_limiter = RateLimiter()
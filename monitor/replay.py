@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import bisect
+import glob
+import json
+import os
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+from api_log import read_log
+from api_wrapper import api_wrapper
+from clock import clock
+from histogram import Histogram, LOCAL_LATENCY_BUCKETS
+from rescan_cadence import RescanCadence
+from scan_scheduler import ScanScheduler
+from GX_Scan import TokenChecker, TokenTracker, load_config
+
+console = Console()
+
+class RecordedResponses:
+    """
+    API responses from recorded api_logs indexed by (endpoint, address)
+
+    A lookup returns the last response recorded at or before the requested
+    time, i.e. what the API answered at that moment of the original session
+    (or the first response if the session had not seen the token yet).
+    """
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self.timestamps: Dict[Tuple[str, str], List[float]] = {}
+        self.bodies: Dict[Tuple[str, str], List[Dict]] = {}
+        self.arrivals: Dict[str, Tuple[float, str, str]] = {}  # token -> (first seen, token, pair)
+        self.records = 0
+        self.skipped = 0
+
+    def load(self, paths: Iterable[str]):
+        """Index every record of the given log files"""
+        for path in paths:
+            for record in read_log(path):
+                try:
+                    self.add(record)
+                except (KeyError, TypeError, ValueError):
+                    self.skipped += 1
+        for key, timestamps in self.timestamps.items():
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            self.timestamps[key] = [timestamps[i] for i in order]
+            self.bodies[key] = [self.bodies[key][i] for i in order]
+
+    def add(self, record: Dict):
+        """Index one logged API call"""
+        endpoint = record["endpoint"]
+        timestamp = datetime.fromisoformat(record["timestamp"]).timestamp()
+        body = {}
+        if record.get("response_code") == 200 and not record.get("error") and record.get("response_body"):
+            body = json.loads(record["response_body"])
+
+        if endpoint == "goplus":
+            results = body.get("result") or {}
+            meta = {key: value for key, value in body.items() if key != "result"}
+            for address in record["params"]["contract_addresses"].split(","):
+                address = address.strip().lower()
+                response = {}
+                if body:
+                    response = dict(meta)
+                    response["result"] = {address: results[address]} if address in results else {}
+                self.store("goplus", address, timestamp, response)
+        elif endpoint == "honeypot":
+            address = record["params"]["address"].lower()
+            self.store("honeypot", address, timestamp, body)
+            if body and address not in self.arrivals:
+                pair = (body.get("pair") or {}).get("pair", {}).get("address") or body.get("pairAddress") or ""
+                self.arrivals[address] = (timestamp, record["params"]["address"], pair)
+        else:
+            self.skipped += 1
+            return
+        self.records += 1
+
+    def store(self, endpoint: str, address: str, timestamp: float, body: Dict):
+        """Append a response to an address's history"""
+        key = (endpoint, address)
+        self.timestamps.setdefault(key, []).append(timestamp)
+        self.bodies.setdefault(key, []).append(body)
+
+    def at(self, endpoint: str, address: str, timestamp: float) -> Dict:
+        """Response the API gave for an address at `timestamp`, {} if never recorded"""
+        key = (endpoint, address.lower())
+        timestamps = self.timestamps.get(key)
+        if not timestamps:
+            return {}
+        index = max(0, bisect.bisect_right(timestamps, timestamp) - 1)
+        return self.bodies[key][index]
+
+    def last_seen(self, address: str) -> Optional[float]:
+        """Time of the last recorded honeypot.is response for an address"""
+        timestamps = self.timestamps.get(("honeypot", address.lower()))
+        return timestamps[-1] if timestamps else None
+
+    def first_seen(self) -> List[Tuple[float, str, str]]:
+        """(timestamp, token, pair) of every token in order of first appearance"""
+        return sorted(self.arrivals.values())
+
+class ReplaySession:
+    """
+    Runs the scan stages and rescan scheduling against recorded responses
+
+    The clock is frozen at the first recorded call and only advances to the
+    next token arrival or rescan due time, so a replay is deterministic and
+    never waits. Each scan runs enrich, classify, persist (and optionally
+    render) with per-stage timings, writing to a fresh session database.
+    """
+
+    def __init__(self, responses: RecordedResponses, folder_name: str,
+                 config_file: str = "config.json", render: bool = False,
+                 max_scans: Optional[int] = None):
+        """
+        Initialize the replay
+
+        Args:
+            responses: Indexed recordings to serve
+            folder_name: Session folder for the replay database
+            config_file: Config providing scanning settings
+            render: Also run the render stage (prints every table)
+            max_scans: Stop after this many scans
+        """
+        self.responses = responses
+        self.folder_name = folder_name
+        self.config = load_config(config_file)
+        self.render = render
+        self.max_scans = max_scans
+        os.makedirs(folder_name, exist_ok=True)
+        # Scans run one at a time, so waiting for other writes to share a commit only adds latency
+        db_settings = dict(self.config.get('session_db') or {}, flush_interval=0)
+        self.checker = TokenChecker(TokenTracker(config_file), folder_name, db_settings)
+        self.scheduler = ScanScheduler()
+        self.cadence = RescanCadence(self.config["scanning"])
+        self.stage_times = {name: Histogram(LOCAL_LATENCY_BUCKETS)
+                            for name in ("enrich", "classify", "persist", "render")}
+        self.scans = 0
+        self.failures = 0
+        self.last_time = None
+
+    def install(self):
+        """Serve API calls from the recordings: no network, cache or batching delay"""
+        api_wrapper.cache.configure({"ttl": {"goplus": 0, "honeypot": 0}})
+        api_wrapper.configure_goplus_batching({"window": 0})
+
+        async def request_goplus(addresses: List[str]) -> Dict:
+            merged = {}
+            for address in addresses:
+                response = self.responses.at("goplus", address, clock.time())
+                if response:
+                    results = merged.setdefault("result", {})
+                    merged.update({key: value for key, value in response.items() if key != "result"})
+                    results.update(response.get("result") or {})
+            return merged
+
+        async def request_honeypot(address: str) -> Dict:
+            return self.responses.at("honeypot", address, clock.time())
+
+        api_wrapper.request_goplus = request_goplus
+        api_wrapper.request_honeypot = request_honeypot
+
+    async def run(self):
+        """Replay the whole recording (or until max_scans)"""
+        arrivals = self.responses.first_seen()
+        if not arrivals:
+            print("No recorded honeypot.is responses to replay")
+            return
+        self.install()
+        clock.freeze(arrivals[0][0])
+        started_at = self.last_time = clock.time()
+        wall_started = time.perf_counter()
+        next_arrival = 0
+
+        while self.max_scans is None or self.scans < self.max_scans:
+            # Release the tokens whose pair was first seen by now
+            while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= clock.time():
+                _, token_address, pair_address = arrivals[next_arrival]
+                self.scheduler.add_new(token_address, pair_address)
+                next_arrival += 1
+
+            job = self.scheduler.pop_ready()
+            if job is None:
+                waits = []
+                if next_arrival < len(arrivals):
+                    waits.append(arrivals[next_arrival][0] - clock.time())
+                next_due = self.scheduler.next_due_in()
+                if next_due is not None:
+                    waits.append(next_due)
+                if not waits:
+                    break
+                clock.advance(min(waits))
+                continue
+
+            await self.scan(job.token_address, job.pair_address)
+            self.scheduler.done(job.token_address)
+
+        wall_time = time.perf_counter() - wall_started
+        clock.unfreeze()
+        self.checker.db.close()
+        self.print_report(wall_time, clock_span=self.last_time - started_at)
+
+    async def scan(self, token_address: str, pair_address: str):
+        """Run one scan stage by stage and schedule the token's next rescan"""
+        self.scans += 1
+        summary = None
+        try:
+            started = time.perf_counter()
+            scan = await self.checker.enrich_token(token_address, pair_address)
+            self.stage_times["enrich"].observe(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            self.checker.classify_token(scan)
+            self.stage_times["classify"].observe(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await self.checker.persist_token(scan)
+            self.stage_times["persist"].observe(time.perf_counter() - started)
+
+            if self.render:
+                started = time.perf_counter()
+                self.checker.render_token(scan)
+                self.stage_times["render"].observe(time.perf_counter() - started)
+            summary = scan["summary"]
+        except Exception as e:
+            self.failures += 1
+            await self.checker.record_scan_failure(token_address, str(e))
+            print(f"Replay error processing token {token_address}: {str(e)}")
+            traceback.print_exc()
+
+        self.last_time = clock.time()
+        if summary:
+            self.cadence.observe(token_address, summary["liquidity"], summary["buy_tax"],
+                                 summary["sell_tax"], summary["holders"])
+        self.reschedule(token_address, pair_address, summary["token_age_hours"] if summary else None)
+
+    def reschedule(self, token_address: str, pair_address: str, token_age_hours: Optional[float]):
+        """Schedule the next rescan while the token is active and the recording still covers it"""
+        state = self.checker.get_rescan_state(token_address)
+        last_seen = self.responses.last_seen(token_address)
+        if (not state or state[0] != "active" or
+                state[1] >= self.config["scanning"]["max_rescan_count"] or
+                last_seen is None or clock.time() >= last_seen):
+            self.scheduler.remove(token_address)
+            self.cadence.forget(token_address)
+            return
+        interval = self.cadence.next_interval(token_address, token_age_hours)
+        self.scheduler.schedule_rescan(token_address, pair_address, interval)
+
+    def print_report(self, wall_time: float, clock_span: float):
+        """Print throughput and per-stage timings"""
+        table = Table(title="Replay Stage Timings", border_style="blue")
+        table.add_column("Stage", style="cyan")
+        table.add_column("Calls", style="green")
+        table.add_column("Total", style="green")
+        table.add_column("Mean", style="yellow")
+        table.add_column("p50", style="yellow")
+        table.add_column("p99", style="red")
+        table.add_column("Max", style="red")
+        for name, histogram in self.stage_times.items():
+            if not histogram.count:
+                continue
+            table.add_row(
+                name,
+                str(histogram.count),
+                f"{histogram.total:.3f}s",
+                f"{histogram.mean * 1000:.2f}ms",
+                f"{histogram.percentile(50) * 1000:.2f}ms",
+                f"{histogram.percentile(99) * 1000:.2f}ms",
+                f"{histogram.max * 1000:.2f}ms"
+            )
+        console.print(table)
+        print(f"Replayed {self.scans} scans ({self.failures} failed) of {len(self.responses.arrivals)} tokens "
+              f"covering {clock_span / 3600:.2f}h of session time in {wall_time:.2f}s "
+              f"({self.scans / wall_time if wall_time else 0:.1f} scans/s)")
+        writes = self.checker.scan_writes
+        print(f"Scan writes: {writes['new']} new, {writes['changed']} changed, {writes['unchanged']} unchanged")
+        print(f"Replay database: {os.path.join(self.folder_name, 'scan_records.db')}")
+
+def unique_folder(base: str) -> str:
+    """Return `base`, or `base (n)` if it already exists, so a replay never reuses a database"""
+    folder, n = base, 1
+    while os.path.exists(folder):
+        n += 1
+        folder = f"{base} ({n})"
+    return folder
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded API logs through the scanner without network access")
+    parser.add_argument("logs", nargs="*", help="api_calls_* log files (default: every file in api_logs)")
+    parser.add_argument("--out", default="Replay Session", help="Session folder for the replay database")
+    parser.add_argument("--config", default="config.json", help="Config file with scanning settings")
+    parser.add_argument("--render", action="store_true", help="Also print the analysis tables of every scan")
+    parser.add_argument("--max-scans", type=int, default=None, help="Stop after this many scans")
+    args = parser.parse_args()
+
+    log_paths = args.logs or sorted(glob.glob(os.path.join("api_logs", "api_calls_*.json*")))
+    recorded = RecordedResponses()
+    recorded.load(log_paths)
+    print(f"Loaded {recorded.records} recorded calls for {len(recorded.arrivals)} tokens "
+          f"from {len(log_paths)} files ({recorded.skipped} skipped)")
+
+    session = ReplaySession(recorded, unique_folder(args.out), args.config, args.render, args.max_scans)
+    asyncio.run(session.run())
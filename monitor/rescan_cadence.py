@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Dict, Optional
+
+# Defaults for the adaptive rescan settings in the "scanning" section of config.json
+CADENCE_DEFAULTS = {
+    "min_rescan_interval": 30,       # Never rescan a token more often than this (seconds)
+    "max_rescan_interval": 1800,     # Never leave a token longer than this (seconds)
+    "rescan_change_target": 0.05,    # Change score we aim to observe per rescan
+    "rescan_age_decay_hours": 6.0,   # Interval doubles once a token is this old
+    "rescan_history_size": 4         # Number of recent scans used to measure change
+}
+
+class RescanCadence:
+    """
+    Computes each token's next rescan interval from how much it has been changing
+
+    Every successful scan records liquidity, taxes and holder count. The change
+    score of a token is the average, over its recent scans, of the relative
+    liquidity change + relative holder change + tax change (in 10 percentage
+    point units). Tokens changing faster than `rescan_change_target` per scan
+    are pulled towards `min_rescan_interval`, flat ones drift towards
+    `max_rescan_interval`, and intervals stretch further as tokens age.
+    """
+
+    def __init__(self, scanning_config: Dict):
+        """Initialize from the scanning section of the config"""
+        settings = dict(CADENCE_DEFAULTS)
+        settings.update({k: v for k, v in scanning_config.items() if k in CADENCE_DEFAULTS})
+        self.base_interval = float(scanning_config.get("rescan_interval", 300))
+        self.min_interval = float(settings["min_rescan_interval"])
+        self.max_interval = max(self.min_interval, float(settings["max_rescan_interval"]))
+        self.change_target = float(settings["rescan_change_target"])
+        self.age_decay_hours = float(settings["rescan_age_decay_hours"])
+        self.history_size = max(2, int(settings["rescan_history_size"]))
+        self.observations: Dict[str, deque] = {}
+
+    def observe(self, token_address: str, liquidity: float, buy_tax: float,
+                sell_tax: float, holders: int):
+        """Record the metrics of a completed scan"""
+        key = token_address.lower()
+        if key not in self.observations:
+            self.observations[key] = deque(maxlen=self.history_size)
+        self.observations[key].append((
+            float(liquidity or 0),
+            float(buy_tax or 0),
+            float(sell_tax or 0),
+            int(holders or 0)
+        ))
+
+    def forget(self, token_address: str):
+        """Drop the history of a token that is no longer rescanned"""
+        self.observations.pop(token_address.lower(), None)
+
+    def change_score(self, token_address: str) -> Optional[float]:
+        """Average per-scan change of a token, None until it has two scans"""
+        history = self.observations.get(token_address.lower())
+        if not history or len(history) < 2:
+            return None
+
+        def relative(old, new):
+            return abs(new - old) / max(abs(old), 1.0)
+
+        scores = []
+        previous = None
+        for current in history:
+            if previous:
+                liquidity_delta = relative(previous[0], current[0])
+                tax_delta = (abs(current[1] - previous[1]) + abs(current[2] - previous[2])) / 10.0
+                holder_delta = relative(previous[3], current[3])
+                scores.append(liquidity_delta + tax_delta + holder_delta)
+            previous = current
+        return sum(scores) / len(scores)
+
+    def is_quiet(self, token_address: str) -> bool:
+        """Check if a token changes slower than rescan_change_target, False until it has two scans"""
+        score = self.change_score(token_address)
+        return score is not None and score < self.change_target
+
+    def next_interval(self, token_address: str, token_age_hours: Optional[float] = None) -> float:
+        """
+        Seconds until the token should be rescanned
+
+        Args:
+            token_address: Token contract address
+            token_age_hours: Age of the token's pair, if known
+
+        Returns:
+            Interval clamped to [min_rescan_interval, max_rescan_interval]
+        """
+        interval = self.base_interval
+        score = self.change_score(token_address)
+        if score is not None:
+            interval = self.base_interval * self.change_target / max(score, 1e-6)
+
+        if token_age_hours and token_age_hours > 0 and self.age_decay_hours > 0:
+            interval *= 1.0 + token_age_hours / self.age_decay_hours
+
+        return min(self.max_interval, max(self.min_interval, interval))
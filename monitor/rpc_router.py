@@ -0,0 +1,374 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import aiohttp
+from rich.console import Console
+from rich.table import Table
+from web3 import AsyncHTTPProvider
+from web3.providers.async_base import AsyncBaseProvider
+from histogram import Histogram, LATENCY_BUCKETS
+
+console = Console()
+
+# Defaults for the "rpc_router" section of config.json
+RPC_ROUTER_DEFAULTS = {
+    "window": 50,             # Recent requests per endpoint kept for latency and error rate
+    "min_samples": 5,         # Requests needed before an endpoint's error rate can mark it unhealthy
+    "max_error_rate": 0.5,    # Error rate above which an endpoint is taken out of rotation
+    "probation": 30,          # Seconds an unhealthy endpoint is skipped before it is tried again
+    "timeout": 10,            # Seconds before a request attempt is abandoned
+    "max_attempts": 3,        # Endpoints tried per request before giving up
+    "hedge": False,           # Send slow reads to a second endpoint as well
+    "hedge_delay": 0.5,       # Seconds to wait on the first endpoint before hedging
+    "connections": 10         # Connection pool size of URL endpoints
+}
+
+# Idempotent reads that are safe (and cheap enough) to send twice
+HEDGE_METHODS = frozenset({
+    "eth_blockNumber",
+    "eth_chainId",
+    "eth_call",
+    "eth_getBalance",
+    "eth_getCode",
+    "eth_getBlockByNumber",
+    "eth_getTransactionByHash",
+    "eth_getTransactionReceipt"
+})
+
+async def post_batch(session: aiohttp.ClientSession, url: str, requests: List[Dict]) -> Any:
+    """POST a JSON-RPC batch and return the decoded reply (a list, or an error object)"""
+    async with session.post(url, json=requests) as response:
+        return await response.json(content_type=None)
+
+class RPCEndpoint:
+    """One JSON-RPC endpoint with its rolling latency and error rate"""
+
+    def __init__(self, name: str, url: str, send: Callable[[str, Any], Awaitable[Dict]],
+                 available: Optional[Callable[[], bool]] = None, window: int = 50,
+                 send_batch: Optional[Callable[[List[Dict]], Awaitable[Any]]] = None):
+        """
+        Initialize the endpoint
+
+        Args:
+            name: Label used in stats and metrics
+            url: Endpoint URL
+            send: Coroutine function sending one request and returning the JSON-RPC response
+            available: Extra check (e.g. key cooldown or quota), the endpoint is skipped while it is False
+            window: Recent requests kept for the rolling stats
+            send_batch: Coroutine function sending a JSON-RPC batch, None if the endpoint takes no batches
+        """
+        self.name = name
+        self.url = url
+        self.send = send
+        self.send_batch = send_batch
+        self.available = available or (lambda: True)
+        self.samples = deque(maxlen=window)  # (latency, ok) of recent requests
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self.unhealthy_until = 0.0
+
+    def record(self, latency: float, ok: bool):
+        """Record the outcome of one request"""
+        self.samples.append((latency, ok))
+        self.requests += 1
+        if ok:
+            self.latency.observe(latency)
+        else:
+            self.failures += 1
+
+    @property
+    def error_rate(self) -> float:
+        """Share of failed requests in the window"""
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean latency of successful requests in the window, 0 before the first one"""
+        latencies = [latency for latency, ok in self.samples if ok]
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    def score(self) -> float:
+        """Expected wait on this endpoint, lower is better"""
+        return self.mean_latency * (1 + self.in_flight)
+
+class RPCRouter:
+    """
+    Routes JSON-RPC requests across several endpoints by measured latency
+
+    Each request goes to the healthy endpoint with the lowest expected wait
+    (rolling mean latency scaled by requests already in flight); endpoints
+    without samples score 0 so they get measured. An endpoint whose error
+    rate over the window exceeds max_error_rate is skipped for `probation`
+    seconds, then tried again. A request that fails with a transport error,
+    HTTP error or timeout is retried on the next endpoint. JSON-RPC error
+    responses (reverts, "too many results") are returned as-is since another
+    endpoint would answer the same. With hedging enabled, a read in
+    HEDGE_METHODS that has not answered within hedge_delay is also sent to the
+    second-best endpoint and the first answer wins. JSON-RPC batches
+    (request_batch) are routed and failed over the same way but never hedged.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        """
+        Initialize the router
+
+        Args:
+            settings: Overrides for RPC_ROUTER_DEFAULTS
+        """
+        self.settings = dict(RPC_ROUTER_DEFAULTS)
+        self.settings.update(settings or {})
+        self.endpoints: List[RPCEndpoint] = []
+        self.sessions: List[aiohttp.ClientSession] = []
+        self.hedged_requests = 0
+        self.failovers = 0
+
+    def add_endpoint(self, name: str, url: str, send: Optional[Callable[[str, Any], Awaitable[Dict]]] = None,
+                     available: Optional[Callable[[], bool]] = None,
+                     send_batch: Optional[Callable[[List[Dict]], Awaitable[Any]]] = None) -> RPCEndpoint:
+        """
+        Add an endpoint
+
+        Args:
+            name: Label used in stats and metrics
+            url: Endpoint URL
+            send: Custom request function, defaults to a long-lived HTTP provider for `url`
+            available: Extra availability check
+            send_batch: Custom batch function, defaults to posting on the provider's connection pool
+                when `send` is not given
+
+        Returns:
+            The new endpoint
+        """
+        if send is None:
+            send, send_batch = self.http_senders(url)
+        endpoint = RPCEndpoint(name, url, send, available, int(self.settings["window"]), send_batch)
+        self.endpoints.append(endpoint)
+        return endpoint
+
+    def http_senders(self, url: str) -> Tuple[Callable[[str, Any], Awaitable[Dict]],
+                                              Callable[[List[Dict]], Awaitable[Any]]]:
+        """Request and batch functions over one provider and connection pool kept for the session"""
+        provider = AsyncHTTPProvider(url)
+        session = None
+
+        async def ensure_session() -> aiohttp.ClientSession:
+            nonlocal session
+            if session is None or session.closed:
+                own = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=int(self.settings["connections"])),
+                    raise_for_status=True
+                )
+                session = await provider.cache_async_session(own)
+                if session is not own:
+                    await own.close()  # web3 already had a live session for this URL
+                self.sessions.append(session)
+            return session
+
+        async def send(method: str, params: Any) -> Dict:
+            await ensure_session()
+            return await provider.make_request(method, params)
+
+        async def send_batch(requests: List[Dict]) -> Any:
+            return await post_batch(await ensure_session(), url, requests)
+
+        return send, send_batch
+
+    def healthy(self, endpoint: RPCEndpoint, now: float) -> bool:
+        """Check if an endpoint is in rotation"""
+        return endpoint.unhealthy_until <= now and endpoint.available()
+
+    def ranked(self, exclude: Optional[set] = None, batch: bool = False) -> List[RPCEndpoint]:
+        """Endpoints to try in order: healthy ones by score, then unhealthy ones by probation end"""
+        exclude = exclude or set()
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.name not in exclude and
+                      (not batch or endpoint.send_batch is not None)]
+        healthy = sorted((endpoint for endpoint in candidates if self.healthy(endpoint, now)),
+                         key=RPCEndpoint.score)
+        if healthy:
+            return healthy
+        return sorted(candidates, key=lambda endpoint: endpoint.unhealthy_until)
+
+    def best_url(self) -> Optional[str]:
+        """URL of the endpoint the next request would go to"""
+        ranked = self.ranked()
+        return ranked[0].url if ranked else None
+
+    async def request(self, method: str, params: Any, preferred: Optional[RPCEndpoint] = None) -> Dict:
+        """
+        Send one JSON-RPC request, failing over to other endpoints on errors
+
+        Args:
+            method: JSON-RPC method
+            params: Method parameters
+            preferred: Endpoint to try first while it is healthy, instead of the best ranked one
+
+        Returns:
+            The JSON-RPC response
+        """
+        hedge = bool(self.settings["hedge"]) and method in HEDGE_METHODS
+        return await self.route(lambda endpoint: endpoint.send(method, params), preferred, hedge)
+
+    async def request_batch(self, requests: List[Dict]) -> Any:
+        """
+        Send a JSON-RPC batch to one endpoint, failing over to other endpoints on errors
+
+        Args:
+            requests: JSON-RPC request objects with distinct ids
+
+        Returns:
+            The decoded reply: a list of responses, or an error object if the batch was rejected
+        """
+        return await self.route(lambda endpoint: endpoint.send_batch(requests), batch=True)
+
+    async def route(self, send: Callable[[RPCEndpoint], Awaitable[Any]], preferred: Optional[RPCEndpoint] = None,
+                    hedge: bool = False, batch: bool = False) -> Any:
+        """Run `send` on the best endpoint, moving to the next one when it fails"""
+        if not self.endpoints:
+            raise RuntimeError("No RPC endpoints configured")
+        tried = set()
+        last_error = None
+        for attempt in range(max(1, int(self.settings["max_attempts"]))):
+            ranked = self.ranked(tried, batch)
+            if not ranked:
+                break
+            if preferred is not None and preferred in ranked and self.healthy(preferred, time.monotonic()):
+                ranked.remove(preferred)
+                ranked.insert(0, preferred)
+            if attempt:
+                self.failovers += 1
+            try:
+                if hedge and len(ranked) > 1:
+                    return await self.hedged(ranked[0], ranked[1], send, tried)
+                tried.add(ranked[0].name)
+                return await self.attempt(ranked[0], send)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = e
+        raise last_error or RuntimeError("No RPC endpoint available")
+
+    async def attempt(self, endpoint: RPCEndpoint, send: Callable[[RPCEndpoint], Awaitable[Any]]) -> Any:
+        """Send a request to one endpoint and record the outcome"""
+        endpoint.in_flight += 1
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(send(endpoint), float(self.settings["timeout"]))
+        except asyncio.CancelledError:
+            raise  # Lost a hedge race: says nothing about the endpoint
+        except Exception:
+            endpoint.record(time.monotonic() - started, ok=False)
+            self.check_health(endpoint)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+        endpoint.record(time.monotonic() - started, ok=True)
+        return response
+
+    async def hedged(self, primary: RPCEndpoint, secondary: RPCEndpoint,
+                     send: Callable[[RPCEndpoint], Awaitable[Any]], tried: set) -> Any:
+        """Send to `primary`, and to `secondary` too if primary is slower than hedge_delay"""
+        tried.add(primary.name)
+        first = asyncio.create_task(self.attempt(primary, send))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=float(self.settings["hedge_delay"]))
+            if done:
+                return first.result()
+
+            tried.add(secondary.name)
+            self.hedged_requests += 1
+            second = asyncio.create_task(self.attempt(secondary, send))
+            pending.add(second)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            secondary.hedges_won += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # Also reached when the caller is cancelled, during either wait
+            for task in pending:
+                task.cancel()
+
+    def check_health(self, endpoint: RPCEndpoint):
+        """Take an endpoint out of rotation if its error rate is too high"""
+        if (len(endpoint.samples) >= int(self.settings["min_samples"]) and
+                endpoint.error_rate > float(self.settings["max_error_rate"])):
+            endpoint.unhealthy_until = time.monotonic() + float(self.settings["probation"])
+            # Start the probation with a clean window so one good answer brings it back
+            endpoint.samples.clear()
+            print(f"RPC endpoint {endpoint.name} unhealthy, skipping it for {self.settings['probation']}s")
+
+    def print_stats(self):
+        """Print per-endpoint latency and errors"""
+        if not self.endpoints:
+            return
+        now = time.monotonic()
+        table = Table(title="RPC Endpoints", border_style="blue")
+        table.add_column("Endpoint", style="cyan")
+        table.add_column("Requests", style="green")
+        table.add_column("Errors", style="red")
+        table.add_column("Error Rate", style="red")
+        table.add_column("Mean", style="yellow")
+        table.add_column("p50", style="yellow")
+        table.add_column("p99", style="red")
+        table.add_column("Hedges Won", style="green")
+        table.add_column("Status", style="cyan")
+        for endpoint in self.endpoints:
+            table.add_row(
+                endpoint.name,
+                str(endpoint.requests),
+                str(endpoint.failures),
+                f"{endpoint.error_rate * 100:.1f}%",
+                f"{endpoint.mean_latency * 1000:.0f}ms",
+                f"{endpoint.latency.percentile(50) * 1000:.0f}ms",
+                f"{endpoint.latency.percentile(99) * 1000:.0f}ms",
+                str(endpoint.hedges_won),
+                "healthy" if self.healthy(endpoint, now) else "skipped"
+            )
+        console.print(table)
+        print(f"Failovers: {self.failovers}, hedged requests: {self.hedged_requests}")
+
+    async def close(self):
+        """Close the connection pools of URL endpoints"""
+        for session in self.sessions:
+            if not session.closed:
+                await session.close()
+        self.sessions = []
+
+class RPCRouterProvider(AsyncBaseProvider):
+    """
+    web3 provider that sends every request through an RPCRouter
+
+    With an `endpoint` the provider is pinned: requests go to that endpoint
+    while it is healthy and only fail over to the others on errors.
+    """
+
+    def __init__(self, router: RPCRouter, endpoint: Optional[RPCEndpoint] = None):
+        super().__init__()
+        self.router = router
+        self.endpoint = endpoint
+
+    @property
+    def endpoint_uri(self) -> Optional[str]:
+        """URL of the endpoint the next request would go to, for raw JSON-RPC posts"""
+        if self.endpoint is not None:
+            return self.endpoint.url
+        return self.router.best_url()
+
+    async def make_request(self, method, params: Any):
+        return await self.router.request(method, params, self.endpoint)
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        return bool(self.router.ranked())
@@ -0,0 +1,209 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+# Columns a history range read returns by default; all of them are in the covering index
+CHART_COLUMNS = ("scan_ts", "hp_liquidity_amount", "gp_liquidity", "gp_holder_count", "gp_lp_holder_count")
+
+# scan_records columns that move on every scan; they are written even when nothing else changed
+REFRESHED_COLUMNS = ("scan_timestamp", "token_age_hours", "total_scans")
+
+# Columns every change event carries besides the changed ones, so chart reads need no lookback
+EVENT_COLUMNS = ("token_address",) + REFRESHED_COLUMNS + ("hp_liquidity_amount", "gp_holder_count", "gp_lp_holder_count")
+
+def scan_ts(scan_timestamp: Optional[str]) -> Optional[int]:
+    """Unix seconds of a scan_timestamp ('%Y-%m-%d %H:%M:%S', local time)"""
+    if not scan_timestamp:
+        return None
+    try:
+        return int(datetime.strptime(scan_timestamp, '%Y-%m-%d %H:%M:%S').timestamp())
+    except ValueError:
+        return None
+
+def dex_liquidity(gp_dex_info: Optional[str]) -> Optional[float]:
+    """Liquidity of the first DEX in a GoPlus dex JSON list"""
+    if not gp_dex_info:
+        return None
+    try:
+        dex_info = json.loads(gp_dex_info)
+        return float(dex_info[0]['liquidity'])
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
+
+class ScanHistory:
+    """
+    Every scan of every token in one scan_history table
+
+    Rows are keyed by (token_address, scan_ts) with scan_ts in Unix seconds,
+    and hold the columns of scan_records plus gp_liquidity (parsed from
+    gp_dex_info). A covering index on the key and CHART_COLUMNS answers chart
+    reads for a token and time range from the index alone. This replaces the
+    per-token "<name>_<address>" tables and their token_tables registry, which
+    are migrated once by migrate().
+
+    A token's first scan is stored in full (changed_columns is NULL, as in
+    migrated rows). Later scans are change events: scans that changed
+    nothing are not stored, and the others hold EVENT_COLUMNS and the
+    changed columns, listed in changed_columns, leaving the rest NULL.
+    snapshot() folds them back into a token's full state. Scans landing in
+    the same second are merged into one row.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize the history
+
+        Args:
+            db: SessionDB of the session's scan_records.db
+        """
+        self.db = db
+
+    def create(self, db: sqlite3.Connection):
+        """Create scan_history with the columns of scan_records (which must exist) and its index"""
+        columns = [(name, column_type) for _, name, column_type, *_ in db.execute("PRAGMA table_info(scan_records)")
+                   if name != "token_address"]
+        definitions = ",\n            ".join(f"{name} {column_type}" for name, column_type in columns)
+        db.execute(f'''
+        CREATE TABLE IF NOT EXISTS scan_history (
+            token_address TEXT NOT NULL,
+            scan_ts INTEGER NOT NULL,
+            gp_liquidity REAL,
+            changed_columns TEXT,
+            {definitions},
+            PRIMARY KEY (token_address, scan_ts)
+        )''')
+        history_columns = {name for _, name, *_ in db.execute("PRAGMA table_info(scan_history)")}
+        if "changed_columns" not in history_columns:
+            db.execute("ALTER TABLE scan_history ADD COLUMN changed_columns TEXT")
+        db.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_scan_history_chart
+        ON scan_history (token_address, {", ".join(CHART_COLUMNS)})
+        ''')
+
+    def append_row(self, db: sqlite3.Connection, columns: Sequence[str], values: Sequence,
+                   changed: Optional[Sequence[str]] = None):
+        """
+        Add one scan to the history (a SessionDB write)
+
+        Args:
+            db: Writer connection
+            columns: scan_records columns of the scan, including token_address and scan_timestamp
+            values: Values in column order
+            changed: Columns that differ from the previous scan, None to store the full scan
+        """
+        row = dict(zip(columns, values))
+        if changed is None:
+            names = list(columns)
+            changed_columns = None
+        else:
+            names = [name for name in EVENT_COLUMNS if name in row]
+            names += [name for name in changed if name not in names]
+            changed_columns = ",".join(changed)
+        # A second scan within the same second is merged into the stored row rather than
+        # replacing it: its columns overwrite, and the row stays full if either scan was full
+        updates = ", ".join(f"{name} = excluded.{name}" for name in ["gp_liquidity"] + names
+                            if name != "token_address")
+        db.execute(f'''
+            INSERT INTO scan_history (scan_ts, gp_liquidity, changed_columns, {", ".join(names)})
+            VALUES ({", ".join("?" for _ in range(len(names) + 3))})
+            ON CONFLICT (token_address, scan_ts) DO UPDATE SET {updates},
+                changed_columns = CASE
+                    WHEN scan_history.changed_columns IS NULL OR excluded.changed_columns IS NULL THEN NULL
+                    ELSE scan_history.changed_columns || ',' || excluded.changed_columns
+                END
+        ''', [scan_ts(row.get("scan_timestamp")), dex_liquidity(row.get("gp_dex_info")), changed_columns]
+            + [row[name] for name in names])
+
+    async def append(self, columns: Sequence[str], values: Sequence, changed: Optional[Sequence[str]] = None):
+        """Add one scan to the history through the writer thread"""
+        await self.db.write(lambda db: self.append_row(db, columns, values, changed))
+
+    def snapshot(self, token_address: str, at_ts: Optional[int] = None) -> Optional[Dict]:
+        """
+        Rebuild a token's full scan state from its stored scans
+
+        Args:
+            token_address: Token to read
+            at_ts: Latest scan_ts included, None for the latest scan
+
+        Returns:
+            Column values of the last scan at or before at_ts, None if there is none
+        """
+        with self.db.reader() as db:
+            cursor = db.execute('''
+                SELECT * FROM scan_history
+                WHERE token_address = ? AND scan_ts <= ?
+                ORDER BY scan_ts ASC
+            ''', (token_address, at_ts if at_ts is not None else 2 ** 62))
+            names = [description[0] for description in cursor.description]
+            state = None
+            for values in cursor:
+                row = dict(zip(names, values))
+                if row["changed_columns"] is None or state is None:
+                    state = row
+                    continue
+                for name in EVENT_COLUMNS + ("scan_ts", "gp_liquidity", "changed_columns"):
+                    state[name] = row[name]
+                for name in row["changed_columns"].split(","):
+                    if name:
+                        state[name] = row[name]
+        return state
+
+    def range(self, token_address: str, start_ts: Optional[int] = None, end_ts: Optional[int] = None,
+              columns: Sequence[str] = CHART_COLUMNS) -> List[tuple]:
+        """
+        Read a token's scans, oldest first
+
+        Args:
+            token_address: Token to read
+            start_ts: First scan_ts included, None for the first scan
+            end_ts: Last scan_ts included, None for the latest scan
+            columns: Columns to return
+
+        Returns:
+            Rows of the requested columns
+        """
+        return self.db.query(f'''
+            SELECT {", ".join(columns)}
+            FROM scan_history
+            WHERE token_address = ? AND scan_ts BETWEEN ? AND ?
+            ORDER BY scan_ts ASC
+        ''', (token_address, start_ts if start_ts is not None else 0,
+              end_ts if end_ts is not None else 2 ** 62))
+
+    def migrate(self, db: sqlite3.Connection) -> int:
+        """
+        Move the rows of per-token history tables into scan_history and drop them
+
+        Runs on startup; once token_tables is gone there is nothing left to do.
+
+        Returns:
+            Number of tables migrated
+        """
+        if db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='token_tables'").fetchone() is None:
+            return 0
+        db.create_function("scan_ts", 1, scan_ts, deterministic=True)
+        db.create_function("dex_liquidity", 1, dex_liquidity, deterministic=True)
+        history_columns = {name for _, name, *_ in db.execute("PRAGMA table_info(scan_history)")}
+        tables = [name for name, in db.execute("SELECT table_name FROM token_tables")]
+        migrated = 0
+        for table in tables:
+            if db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is None:
+                continue
+            columns = [name for _, name, *_ in db.execute(f'PRAGMA table_info("{table}")') if name in history_columns]
+            if "token_address" not in columns or "scan_timestamp" not in columns:
+                continue
+            db.execute(f'''
+                INSERT OR IGNORE INTO scan_history (scan_ts, gp_liquidity, {", ".join(columns)})
+                SELECT scan_ts(scan_timestamp), {"dex_liquidity(gp_dex_info)" if "gp_dex_info" in columns else "NULL"},
+                       {", ".join(columns)}
+                FROM "{table}"
+                WHERE scan_ts(scan_timestamp) IS NOT NULL
+            ''')
+            db.execute(f'DROP TABLE "{table}"')
+            migrated += 1
+        db.execute("DROP TABLE token_tables")
+        if migrated:
+            print(f"Migrated {migrated} per-token history tables into scan_history")
+        return migrated
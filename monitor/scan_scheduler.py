@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from clock import clock
+
+# Job priorities, lower is served first
+PRIORITY_NEW = 0
+PRIORITY_RESCAN = 1
+
+@dataclass
+class ScanJob:
+    token_address: str
+    pair_address: str
+    priority: int
+    due_time: float
+    block_number: Optional[int] = None
+
+class ScanScheduler:
+    """
+    Decides which token the analysis workers scan next
+
+    Fresh PairCreated tokens wait in a FIFO and are always served before
+    rescans. Rescans live in a heap keyed by next-due time, so only tokens
+    that are actually due are handed out and a large active set is spread
+    over time instead of being swept in one pass.
+    """
+
+    def __init__(self):
+        """Initialize empty new-pair queue and rescan heap"""
+        self.new_pairs = deque()
+        self.new_tokens = set()
+        self.rescan_heap = []
+        self.rescan_entries: Dict[str, Tuple[float, int, str, str]] = {}  # key -> live heap entry
+        self.in_progress = set()
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+
+    def add_new(self, token_address: str, pair_address: str, block_number: Optional[int] = None) -> bool:
+        """
+        Queue a freshly created pair ahead of all rescans
+
+        Returns:
+            False if the token is already queued or being scanned
+        """
+        key = token_address.lower()
+        if key in self.new_tokens or key in self.in_progress:
+            return False
+        self.rescan_entries.pop(key, None)
+        self.new_tokens.add(key)
+        self.new_pairs.append((token_address, pair_address, block_number))
+        self.wakeup.set()
+        return True
+
+    def schedule_rescan(self, token_address: str, pair_address: str, delay: float):
+        """Schedule (or move) the next rescan of a token `delay` seconds from now"""
+        key = token_address.lower()
+        entry = (clock.monotonic() + max(0.0, delay), next(self.counter), token_address, pair_address)
+        self.rescan_entries[key] = entry
+        heapq.heappush(self.rescan_heap, entry)
+        self.wakeup.set()
+
+    def expedite(self, token_address: str, delay: float) -> bool:
+        """
+        Move a scheduled rescan forward to `delay` seconds from now
+
+        The token may be given in any case; the rescan keeps the address it
+        was scheduled with.
+
+        Returns:
+            False if the token has no pending rescan or is already due sooner
+        """
+        entry = self.rescan_entries.get(token_address.lower())
+        if entry is None or entry[0] <= clock.monotonic() + delay:
+            return False
+        self.schedule_rescan(entry[2], entry[3], delay)
+        return True
+
+    def seed_rescans(self, tokens: Iterable[Tuple[str, str]], interval: float):
+        """
+        Schedule existing active tokens evenly across one rescan interval
+
+        Args:
+            tokens: (token_address, pair_address) pairs, most overdue first
+            interval: Seconds over which to spread the first rescans
+        """
+        tokens = list(tokens)
+        for i, (token_address, pair_address) in enumerate(tokens):
+            self.schedule_rescan(token_address, pair_address, interval * i / len(tokens))
+
+    def remove(self, token_address: str):
+        """Stop rescanning a token; stale heap entries are dropped lazily"""
+        self.rescan_entries.pop(token_address.lower(), None)
+
+    def done(self, token_address: str):
+        """Mark a token's scan as finished so it can be queued again"""
+        self.in_progress.discard(token_address.lower())
+
+    def pop_ready(self) -> Optional[ScanJob]:
+        """Return the highest-priority job that is ready now, if any"""
+        if self.new_pairs:
+            token_address, pair_address, block_number = self.new_pairs.popleft()
+            key = token_address.lower()
+            self.new_tokens.discard(key)
+            self.in_progress.add(key)
+            return ScanJob(token_address, pair_address, PRIORITY_NEW, clock.monotonic(), block_number)
+
+        now = clock.monotonic()
+        while self.rescan_heap:
+            due_time, seq, token_address, pair_address = self.rescan_heap[0]
+            key = token_address.lower()
+            entry = self.rescan_entries.get(key)
+            if entry is None or entry[1] != seq:
+                heapq.heappop(self.rescan_heap)  # superseded or removed
+                continue
+            if due_time > now:
+                return None
+            heapq.heappop(self.rescan_heap)
+            del self.rescan_entries[key]
+            if key in self.in_progress:
+                continue  # already being scanned; it is rescheduled when done
+            self.in_progress.add(key)
+            return ScanJob(token_address, pair_address, PRIORITY_RESCAN, due_time)
+        return None
+
+    async def get(self) -> ScanJob:
+        """Wait for and return the next job to scan"""
+        while True:
+            job = self.pop_ready()
+            if job:
+                return job
+            self.wakeup.clear()
+            timeout = None
+            next_due = self.next_due_in()
+            if next_due is not None:
+                timeout = max(0.01, next_due)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next rescan is due (negative if overdue), None if none scheduled"""
+        while self.rescan_heap:
+            due_time, seq, token_address, _ = self.rescan_heap[0]
+            entry = self.rescan_entries.get(token_address.lower())
+            if entry is None or entry[1] != seq:
+                heapq.heappop(self.rescan_heap)
+                continue
+            return due_time - clock.monotonic()
+        return None
+
+    def rescan_lag(self) -> float:
+        """Seconds the most overdue rescan has been waiting (0 if none overdue)"""
+        next_due = self.next_due_in()
+        return max(0.0, -next_due) if next_due is not None else 0.0
+
+    def due_in(self, token_address: str) -> Optional[float]:
+        """Seconds until the given token's next rescan, None if not scheduled"""
+        entry = self.rescan_entries.get(token_address.lower())
+        return entry[0] - clock.monotonic() if entry else None
+
+    @property
+    def pending_new(self) -> int:
+        """Number of fresh pairs waiting to be scanned"""
+        return len(self.new_pairs)
+
+    @property
+    def scheduled_rescans(self) -> int:
+        """Number of tokens with a pending rescan"""
+        return len(self.rescan_entries)
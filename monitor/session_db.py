@@ -0,0 +1,270 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from histogram import Histogram, LOCAL_LATENCY_BUCKETS
+
+# Defaults for the "session_db" section of config.json
+SESSION_DB_DEFAULTS = {
+    "synchronous": "NORMAL",        # Safe with WAL: a crash can lose the last commits, never corrupt
+    "cache_size_kb": 65536,         # Page cache per connection
+    "mmap_size": 268435456,         # Bytes of the file read through memory mapping
+    "temp_store": "MEMORY",
+    "busy_timeout_ms": 5000,        # How long a connection waits on a lock before failing
+    "statement_cache": 256,         # Prepared statements kept per connection, keyed by SQL text
+    "flush_interval": 0.05,         # Seconds the writer thread collects writes into one transaction
+    "max_batch": 500,               # Writes per transaction
+    "max_queue": 1000               # Writes waiting for the writer thread before callers wait
+}
+
+# Queued by close() to stop the writer thread
+STOP = object()
+
+class SessionDB:
+    """
+    Owns the connections to a session's scan_records.db
+
+    There is one long-lived writer connection in WAL mode, so its prepared
+    statement cache survives between scans and commits only append to the
+    WAL instead of rewriting the database. Reads go through separate
+    read-only connections (one per thread); with WAL they never block the
+    writer and the writer never blocks them, which also applies to the
+    backend reading the same file.
+
+    Writes made while the scanner runs go through write(): a writer thread
+    takes them from a bounded queue and runs every write that arrives within
+    flush_interval in one transaction (group commit), so the event loop never
+    waits on SQLite or an fsync and many scans share one commit. Each write
+    runs in its own savepoint, so a failing write is rolled back alone and
+    its error is raised to its caller.
+    """
+
+    def __init__(self, path: str, settings: Optional[Dict] = None):
+        """
+        Initialize the database layer; connections are opened on first use
+
+        Args:
+            path: Database file
+            settings: Overrides for SESSION_DB_DEFAULTS
+        """
+        self.path = path
+        self.settings = dict(SESSION_DB_DEFAULTS)
+        self.settings.update(settings or {})
+        self.writer: Optional[sqlite3.Connection] = None
+        self.write_lock = threading.RLock()
+        self.readers = threading.local()
+        self.reader_connections: List[sqlite3.Connection] = []
+        self.transactions = 0
+        self.queue: queue.Queue = queue.Queue()
+        self.slots: Optional[asyncio.Semaphore] = None   # Bounds writes queued or running
+        self.thread: Optional[threading.Thread] = None
+        self.commit_latency = Histogram(LOCAL_LATENCY_BUCKETS)  # Seconds per group commit
+        self.batch_sizes = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500])
+        self.writes = 0
+        self.failed_writes = 0
+        self.pending = set()   # Writes submitted from synchronous code
+
+    def apply_pragmas(self, connection: sqlite3.Connection):
+        """Apply the cache, mmap, temp store and lock timeout settings"""
+        connection.execute(f"PRAGMA cache_size = -{int(self.settings['cache_size_kb'])}")
+        connection.execute(f"PRAGMA mmap_size = {int(self.settings['mmap_size'])}")
+        connection.execute(f"PRAGMA temp_store = {self.settings['temp_store']}")
+        connection.execute(f"PRAGMA busy_timeout = {int(self.settings['busy_timeout_ms'])}")
+
+    def connection(self) -> sqlite3.Connection:
+        """The writer connection, opened in WAL mode on first use"""
+        if self.writer is None:
+            writer = sqlite3.connect(self.path, check_same_thread=False,
+                                     cached_statements=int(self.settings["statement_cache"]))
+            writer.execute("PRAGMA journal_mode = WAL")
+            writer.execute(f"PRAGMA synchronous = {self.settings['synchronous']}")
+            self.apply_pragmas(writer)
+            self.writer = writer
+        return self.writer
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run writes on the writer connection, committing on success and rolling back on error"""
+        with self.write_lock:
+            connection = self.connection()
+            try:
+                yield connection
+                connection.commit()
+                self.transactions += 1
+            except BaseException:
+                connection.rollback()
+                raise
+
+    async def write(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run a write on the writer thread and wait for its group commit
+
+        Args:
+            work: Function taking the writer connection; it must not commit
+
+        Returns:
+            The function's result, once the transaction holding it committed
+        """
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(max(1, int(self.settings["max_queue"])))
+        await self.slots.acquire()
+        self.start_writer()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put((work, future, loop))
+        return await future
+
+    def submit(self, work: Callable[[sqlite3.Connection], Any]) -> asyncio.Task:
+        """
+        Queue a write from synchronous code running on the event loop
+
+        The write is not awaited; drain() waits for every submitted write
+        and failures are printed.
+
+        Args:
+            work: Function taking the writer connection; it must not commit
+
+        Returns:
+            Task resolving to the function's result
+        """
+        task = asyncio.ensure_future(self.write(work))
+        self.pending.add(task)
+        task.add_done_callback(self.submitted)
+        return task
+
+    def submitted(self, task: asyncio.Task):
+        """Forget a finished submitted write and report its failure"""
+        self.pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Database write failed: {str(task.exception())}")
+
+    async def drain(self):
+        """Wait for every write submitted from synchronous code"""
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """Writes waiting for the writer thread"""
+        return self.queue.qsize()
+
+    def start_writer(self):
+        """Start the writer thread if it is not running"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run_writer, name="session-db-writer", daemon=True)
+            self.thread.start()
+
+    def run_writer(self):
+        """Writer thread: commit queued writes in batches until close()"""
+        flush_interval = float(self.settings["flush_interval"])
+        max_batch = max(1, int(self.settings["max_batch"]))
+        while True:
+            job = self.queue.get()
+            if job is STOP:
+                return
+            batch = [job]
+            stop = False
+            deadline = time.monotonic() + flush_interval
+            while len(batch) < max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    job = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is STOP:
+                    stop = True
+                    break
+                batch.append(job)
+            self.flush(batch)
+            if stop:
+                return
+
+    def flush(self, batch: List):
+        """Run a batch of writes in one transaction and resolve their futures"""
+        outcomes = []
+        with self.write_lock:
+            connection = self.connection()
+            try:
+                connection.execute("BEGIN")
+                for work, _, _ in batch:
+                    connection.execute("SAVEPOINT write")
+                    try:
+                        outcomes.append((work(connection), None))
+                        connection.execute("RELEASE write")
+                    except Exception as e:
+                        connection.execute("ROLLBACK TO write")
+                        connection.execute("RELEASE write")
+                        outcomes.append((None, e))
+                started = time.perf_counter()
+                connection.commit()
+                self.commit_latency.observe(time.perf_counter() - started)
+                self.transactions += 1
+            except Exception as e:
+                if connection.in_transaction:
+                    connection.rollback()
+                outcomes = [(None, e)] * len(batch)
+        self.batch_sizes.observe(len(batch))
+        self.writes += len(batch)
+        self.failed_writes += sum(1 for _, error in outcomes if error is not None)
+        for (_, future, loop), (result, error) in zip(batch, outcomes):
+            try:
+                loop.call_soon_threadsafe(self.resolve, future, result, error)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+    def resolve(self, future: asyncio.Future, result: Any, error: Optional[Exception]):
+        """Hand a write's outcome back to its caller (runs on the event loop)"""
+        self.slots.release()
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """This thread's read-only connection"""
+        connection = getattr(self.readers, "connection", None)
+        if connection is None:
+            self.connection()  # Creates the file and switches it to WAL before anyone reads
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False,
+                                         cached_statements=int(self.settings["statement_cache"]))
+            self.apply_pragmas(connection)
+            connection.execute("PRAGMA query_only = 1")
+            self.readers.connection = connection
+            self.reader_connections.append(connection)
+        yield connection
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        """Run a read and return all rows"""
+        with self.reader() as db:
+            return db.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()) -> Optional[tuple]:
+        """Run a read and return the first row, None if there is none"""
+        with self.reader() as db:
+            return db.execute(sql, params).fetchone()
+
+    def close(self):
+        """Finish queued writes, checkpoint the WAL into the database file and close every connection"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(STOP)
+            self.thread.join()
+        self.thread = None
+        for connection in self.reader_connections:
+            connection.close()
+        self.reader_connections = []
+        self.readers = threading.local()
+        with self.write_lock:
+            if self.writer is not None:
+                try:
+                    self.writer.execute("PRAGMA optimize")
+                    self.writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    print(f"Error checkpointing database: {str(e)}")
+                self.writer.close()
+                self.writer = None
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from aiohttp import web
+from rpc_router import RPCRouter
+
+class MockRPC:
+    """Local JSON-RPC server answering eth_blockNumber with a fixed block, optionally slow or failing"""
+
+    def __init__(self, block: int, delay: float = 0.0, status: int = 200):
+        self.block = block
+        self.delay = delay
+        self.status = status
+        self.hits = 0
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.hits += 1
+        body = await request.json()
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        if isinstance(body, list):
+            return web.json_response([self.reply(item) for item in body])
+        return web.json_response(self.reply(body))
+
+    def reply(self, request: dict) -> dict:
+        return {"jsonrpc": "2.0", "id": request["id"], "result": hex(self.block)}
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self.url
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def run_with_servers(servers, settings, scenario):
+    """Start the mock servers, route across them in order and run `scenario(router)`"""
+    async def main():
+        router = RPCRouter(settings)
+        for index, server in enumerate(servers):
+            router.add_endpoint(f"mock-{index}", await server.start())
+        try:
+            return await scenario(router)
+        finally:
+            await router.close()
+            for server in servers:
+                await server.stop()
+    return asyncio.run(main())
+
+def block_of(response: dict) -> int:
+    return int(response["result"], 16)
+
+def test_prefers_fastest_endpoint():
+    slow, fast = MockRPC(1, delay=0.05), MockRPC(2)
+
+    async def scenario(router):
+        for _ in range(20):
+            await router.request("eth_blockNumber", [])
+        return router.best_url()
+
+    best = run_with_servers([slow, fast], {}, scenario)
+    assert best == fast.url
+    assert fast.hits > slow.hits
+    assert slow.hits <= 2  # Measured once, then only used if the fast one degrades
+
+def test_fails_over_on_http_error():
+    broken, healthy = MockRPC(1, status=502), MockRPC(2)
+
+    async def scenario(router):
+        response = await router.request("eth_blockNumber", [])
+        return response, router.failovers
+
+    response, failovers = run_with_servers([broken, healthy], {}, scenario)
+    assert block_of(response) == 2
+    assert failovers == 1
+    assert broken.hits == 1
+
+def test_fails_over_on_timeout():
+    hanging, healthy = MockRPC(1, delay=2.0), MockRPC(2)
+
+    async def scenario(router):
+        return await router.request("eth_blockNumber", [])
+
+    response = run_with_servers([hanging, healthy], {"timeout": 0.2}, scenario)
+    assert block_of(response) == 2
+
+def test_skips_unhealthy_endpoint_until_probation_ends():
+    broken, healthy = MockRPC(1, status=500), MockRPC(2)
+    settings = {"min_samples": 2, "max_error_rate": 0.5, "probation": 0.3}
+
+    async def scenario(router):
+        for _ in range(2):
+            await router.request("eth_blockNumber", [])
+        hits_when_skipped = broken.hits
+        skipped = not router.healthy(router.endpoints[0], time.monotonic())
+        for _ in range(5):
+            await router.request("eth_blockNumber", [])
+        hits_during_probation = broken.hits
+        await asyncio.sleep(0.4)
+        # Back from probation with a clean window, it scores 0 and is tried first
+        await router.request("eth_blockNumber", [])
+        return hits_when_skipped, skipped, hits_during_probation, broken.hits
+
+    hits_when_skipped, skipped, hits_during_probation, hits_after = run_with_servers(
+        [broken, healthy], settings, scenario)
+    assert skipped
+    assert hits_during_probation == hits_when_skipped
+    assert hits_after == hits_when_skipped + 1
+
+def test_hedge_returns_first_answer():
+    slow, fast = MockRPC(1, delay=1.0), MockRPC(2)
+    settings = {"hedge": True, "hedge_delay": 0.05}
+
+    async def scenario(router):
+        response = await router.request("eth_blockNumber", [])
+        return response, router.hedged_requests, router.endpoints[1].hedges_won
+
+    response, hedged, won = run_with_servers([slow, fast], settings, scenario)
+    assert block_of(response) == 2
+    assert hedged == 1
+    assert won == 1
+
+def test_does_not_hedge_writes():
+    slow, fast = MockRPC(1, delay=0.2), MockRPC(2)
+    settings = {"hedge": True, "hedge_delay": 0.05}
+
+    async def scenario(router):
+        response = await router.request("eth_sendRawTransaction", ["0x00"])
+        return response, router.hedged_requests
+
+    response, hedged = run_with_servers([slow, fast], settings, scenario)
+    assert block_of(response) == 1
+    assert hedged == 0
+    assert fast.hits == 0
+
+def test_batch_fails_over():
+    broken, healthy = MockRPC(1, status=503), MockRPC(2)
+    requests = [{"jsonrpc": "2.0", "id": i, "method": "eth_blockNumber", "params": []} for i in (1, 2)]
+
+    async def scenario(router):
+        return await router.request_batch(requests)
+
+    replies = run_with_servers([broken, healthy], {}, scenario)
+    assert [reply["id"] for reply in replies] == [1, 2]
+    assert all(block_of(reply) == 2 for reply in replies)
+
+def test_cancelled_hedge_cancels_primary():
+    servers = [MockRPC(1), MockRPC(2)]
+    settings = {"hedge": True, "hedge_delay": 1.0}
+    cancelled = []
+
+    async def send(endpoint):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(endpoint.name)
+            raise
+
+    async def scenario(router):
+        primary, secondary = router.endpoints
+        caller = asyncio.create_task(router.hedged(primary, secondary, send, set()))
+        await asyncio.sleep(0.05)  # Still inside the hedge_delay wait
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        return caller.cancelled(), list(cancelled)
+
+    caller_cancelled, attempts_cancelled = run_with_servers(servers, settings, scenario)
+    assert caller_cancelled
+    assert attempts_cancelled == ["mock-0"]
@@ -0,0 +1,48 @@
+from session_db import SessionDB
+from scan_history import ScanHistory
+
+COLUMNS = ["token_address", "scan_timestamp", "token_name", "token_age_hours", "hp_liquidity_amount",
+           "gp_holder_count", "gp_lp_holder_count", "gp_dex_info", "total_scans"]
+
+def make_history(tmp_path):
+    db = SessionDB(str(tmp_path / "scan_records.db"))
+    history = ScanHistory(db)
+    with db.transaction() as connection:
+        connection.execute(f"CREATE TABLE scan_records ({', '.join(COLUMNS)}, PRIMARY KEY (token_address))")
+        history.create(connection)
+    return db, history
+
+def scan(timestamp, name, liquidity, holders, total_scans):
+    return ["0xabc", timestamp, name, 1.0, liquidity, holders, 1, '[{"liquidity": "7"}]', total_scans]
+
+def test_change_event_in_same_second_keeps_full_row(tmp_path):
+    db, history = make_history(tmp_path)
+    with db.transaction() as connection:
+        history.append_row(connection, COLUMNS, scan("2026-01-01 10:00:00", "Token", 100.0, 5, 1))
+        history.append_row(connection, COLUMNS, scan("2026-01-01 10:00:00", "Token", 150.0, 5, 2),
+                           ["hp_liquidity_amount"])
+
+    state = history.snapshot("0xabc")
+    db.close()
+    assert state["changed_columns"] is None
+    assert state["token_name"] == "Token"
+    assert state["hp_liquidity_amount"] == 150.0
+    assert state["total_scans"] == 2
+
+def test_snapshot_folds_change_events(tmp_path):
+    db, history = make_history(tmp_path)
+    with db.transaction() as connection:
+        history.append_row(connection, COLUMNS, scan("2026-01-01 10:00:00", "Token", 100.0, 5, 1))
+        history.append_row(connection, COLUMNS, scan("2026-01-01 10:05:00", "Token", 100.0, 9, 2),
+                           ["gp_holder_count"])
+        history.append_row(connection, COLUMNS, scan("2026-01-01 10:05:00", "Renamed", 100.0, 9, 3),
+                           ["token_name"])
+
+    state = history.snapshot("0xabc")
+    rows = history.range("0xabc")
+    db.close()
+    assert len(rows) == 2
+    assert state["gp_holder_count"] == 9
+    assert state["token_name"] == "Renamed"
+    assert state["gp_liquidity"] == 7.0
+    assert set(state["changed_columns"].split(",")) == {"gp_holder_count", "token_name"}
@@ -0,0 +1,20 @@
+from scan_scheduler import ScanScheduler
+
+def test_expedite_keeps_scheduled_address():
+    scheduler = ScanScheduler()
+    scheduler.schedule_rescan("0xAbCdEf", "0xPair", 100)
+
+    # The activity watcher refers to tokens by their lowercased address
+    assert scheduler.expedite("0xabcdef", 0)
+    job = scheduler.pop_ready()
+
+    assert job.token_address == "0xAbCdEf"
+    assert job.pair_address == "0xPair"
+    assert scheduler.scheduled_rescans == 0
+
+def test_expedite_ignores_later_due_time():
+    scheduler = ScanScheduler()
+    scheduler.schedule_rescan("0xAbCdEf", "0xPair", 10)
+
+    assert not scheduler.expedite("0xabcdef", 60)
+    assert 0 < scheduler.due_in("0xAbCdEf") <= 10